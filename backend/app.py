@@ -1,28 +1,55 @@
 import os
+import sys
 import json
 import re
 import ast
 import time
 import html
+import random
+import cProfile
 import hashlib
+import hmac
+import threading
+import zlib
+import gzip
+import csv
+import io
+import tempfile
+import unicodedata
 import http.cookiejar
 import urllib.parse
 import urllib.request
 from html.parser import HTMLParser
-from functools import wraps
+from collections import OrderedDict
+from bisect import bisect_left
+from functools import lru_cache, wraps
 from contextlib import contextmanager
 
 from dotenv import load_dotenv
-from flask import Flask, jsonify, g, request
-from openpyxl import load_workbook
+from flask import Flask, after_this_request, has_request_context, jsonify, g, request
+from flask.json.provider import DefaultJSONProvider
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.cursors import DictCursor, SSCursor
 from pymysql.err import IntegrityError
 from pymysql.err import OperationalError
+from werkzeug.datastructures import MultiDict
 from werkzeug.exceptions import HTTPException
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import date, datetime, time as datetime_time, timedelta, timezone
+
+try:
+  import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+  orjson = None
+
+try:
+  import brotli
+except ImportError:  # optional, responses fall back to gzip
+  brotli = None
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.dirname(BASE_DIR)
@@ -32,6 +59,7 @@ OPPORTUNITY_TYPES = {"normal", "host"}
 OPPORTUNITY_STATUSES = {"new", "assigned", "in_progress", "valid", "invalid"}
 OPPORTUNITY_STAGES = {"cold", "interest", "need_defined", "bid_preparing", "ready_for_handoff"}
 ORGANIZER_TYPES = {"foreign", "state_owned", "gov_joint", "government", "commercial"}
+OPPORTUNITY_STAGE_ORDER = ("cold", "interest", "need_defined", "bid_preparing", "ready_for_handoff")
 ACTIVITY_CHANNELS = {"phone", "email", "wechat", "onsite", "other"}
 COMPANY_STATUSES = {"active", "inactive"}
 USER_ROLES = {"group_admin", "subsidiary_admin", "sales", "marketing"}
@@ -46,6 +74,20 @@ CONTACT_ROLE_COLUMN_READY = None
 WORKFLOW_TABLES_READY = None
 ORG_DIMENSION_TABLES_READY = None
 HOST_POOL_TABLES_READY = None
+RESOURCE_VERSION_TABLE_READY = None
+OPPORTUNITY_DEDUP_COLUMNS_READY = None
+DASHBOARD_ROLLUP_TABLE_READY = None
+DASHBOARD_ROLLUP_SEED_PENDING = False
+FOLLOW_UP_TABLES_READY = None
+ACTIVITY_TIMELINE_INDEX_READY = None
+# the _ensure_* checks run per process until all succeed; the named lock serializes them across workers
+SCHEMA_ENSURED = False
+SCHEMA_RETRY_AT = 0.0
+SCHEMA_ENSURE_LOCK = threading.Lock()
+SCHEMA_LOCK_NAME = "lead_managerment_schema"
+SCHEMA_LOCK_TIMEOUT = max(int(os.getenv("SCHEMA_LOCK_TIMEOUT", "30")), 0)
+SCHEMA_RETRY_SECONDS = max(float(os.getenv("SCHEMA_RETRY_SECONDS", "30")), 0)
+WORKER_WARMUP_PROCESS_TEMPLATES = max(int(os.getenv("WORKER_WARMUP_PROCESS_TEMPLATES", "50")), 0)
 WORKFLOW_TEMPLATE_STATUSES = {"active", "inactive"}
 WORKFLOW_PROCESS_DEFAULT_STATUS = "inactive"
 ORG_DIMENSION_STATUSES = {"active", "inactive"}
@@ -95,7 +137,182 @@ WORKFLOW_TASK_STATUSES = {"pending", "waiting", "approved", "rejected", "skipped
 WORKFLOW_INSTANCE_ACTIONS = {"approve", "reject", "withdraw", "return", "transfer", "add_sign", "remind"}
 WORKFLOW_FIELD_KEY_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]{1,63}$")
 WORKFLOW_NODE_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+WORKFLOW_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 WORKFLOW_IDEMPOTENCY_KEY_MAX_LEN = 128
+WORKFLOW_IDEMPOTENCY_TTL_SECONDS = max(int(os.getenv("WORKFLOW_IDEMPOTENCY_TTL_SECONDS", "86400")), 60)
+WORKFLOW_IDEMPOTENCY_PURGE_INTERVAL_SECONDS = max(int(os.getenv("WORKFLOW_IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "600")), 1)
+WORKFLOW_IDEMPOTENCY_PURGE_BATCH = 1000
+WORKFLOW_IDEMPOTENCY_CACHE_SECONDS = max(float(os.getenv("WORKFLOW_IDEMPOTENCY_CACHE_SECONDS", "30")), 0)
+WORKFLOW_IDEMPOTENCY_CACHE_MAX = 1024
+WORKFLOW_IDEMPOTENCY_CACHE = {}
+WORKFLOW_IDEMPOTENCY_LOCK = threading.Lock()
+WORKFLOW_IDEMPOTENCY_LAST_PURGE_AT = 0.0
+WORKFLOW_DETAIL_FIELDS = {"full", "summary"}
+WORKFLOW_DETAIL_EVENT_LIMIT = max(int(os.getenv("WORKFLOW_DETAIL_EVENT_LIMIT", "50")), 1)
+WORKFLOW_EVENT_PAGE_MAX = 200
+WORKFLOW_SNAPSHOT_CACHE_SIZE = max(int(os.getenv("WORKFLOW_SNAPSHOT_CACHE_SIZE", "256")), 0)
+WORKFLOW_SNAPSHOT_CACHE = OrderedDict()
+WORKFLOW_SNAPSHOT_CACHE_LOCK = threading.Lock()
+# compiled published versions, keyed by (version id, process id, version no); shares the snapshot cache lock
+WORKFLOW_COMPILED_VERSION_CACHE_SIZE = max(int(os.getenv("WORKFLOW_COMPILED_VERSION_CACHE_SIZE", "256")), 0)
+WORKFLOW_COMPILED_VERSION_CACHE = OrderedDict()
+WORKFLOW_FORM_SCHEMA_CACHE_SIZE = max(int(os.getenv("WORKFLOW_FORM_SCHEMA_CACHE_SIZE", "256")), 0)
+WORKFLOW_FORM_SCHEMA_CACHE = OrderedDict()
+WORKFLOW_INSTANCE_LIST_COLUMNS = (
+  "ai.id, ai.process_template_id, ai.form_template_id, ai.process_name, ai.title, "
+  "ai.company_id, ai.applicant_id, ai.status, ai.current_step, ai.total_steps, "
+  "ai.current_step_name, ai.current_node_id, ai.created_at, ai.updated_at, ai.finished_at"
+)
+WORKFLOW_PROCESS_TEMPLATE_LIST_COLUMNS = (
+  "apt.id, apt.name, apt.description, apt.company_id, apt.form_template_id, apt.step_count, "
+  "apt.current_version, apt.published_version, apt.status, apt.created_by, apt.updated_by, "
+  "apt.created_at, apt.updated_at"
+)
+RESPONSE_CACHE_SECONDS = max(float(os.getenv("RESPONSE_CACHE_SECONDS", "0")), 0)
+RESPONSE_CACHE_MAX_ENTRIES = max(int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")), 0)
+RESPONSE_CACHE = OrderedDict()
+RESPONSE_CACHE_LOCK = threading.Lock()
+# cached list -> resources whose version changes its body (joined names included)
+CACHED_RESOURCE_DEPENDENCIES = {
+  "tags": ("tags",),
+  "companies": ("companies",),
+  "org_roles": ("org_roles", "companies"),
+  "org_positions": ("org_positions", "companies"),
+  "users": ("users", "org_roles", "org_positions"),
+  "approval_form_templates": ("approval_form_templates", "companies", "users")
+}
+WORKFLOW_EVENT_ARCHIVE_AFTER_DAYS = max(int(os.getenv("WORKFLOW_EVENT_ARCHIVE_AFTER_DAYS", "90")), 0)
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson").strip().lower()
+USE_ORJSON = orjson is not None and JSON_BACKEND == "orjson"
+# datetimes/dataclasses go through the provider's default() to keep Flask's formats
+ORJSON_RESPONSE_OPTIONS = (
+  orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+  if orjson is not None
+  else 0
+)
+RESPONSE_COMPRESSION_ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "1") != "0"
+RESPONSE_COMPRESSION_MIN_BYTES = max(int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")), 0)
+# level 5 / quality 4: most of the size win at a few ms per MB of JSON
+RESPONSE_COMPRESSION_GZIP_LEVEL = min(max(int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "5")), 1), 9)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = min(max(int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "4")), 0), 11)
+RESPONSE_COMPRESSION_MIMETYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+RESPONSE_COMPRESSION_STATS = {
+  "responses": 0,
+  "compressed": 0,
+  "skipped_small": 0,
+  "bytes_in": 0,
+  "bytes_out": 0,
+  "by_encoding": {"br": 0, "gzip": 0}
+}
+RESPONSE_COMPRESSION_LOCK = threading.Lock()
+QUERY_INSTRUMENTATION_ENABLED = os.getenv("QUERY_INSTRUMENTATION_ENABLED", "1").lower() not in {"0", "false", "no"}
+SLOW_QUERY_MS = max(float(os.getenv("SLOW_QUERY_MS", "500")), 0)
+# fingerprints kept per endpoint; the rest are folded into "other"
+QUERY_STATS_MAX_FINGERPRINTS = 50
+DB_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 1000, 5000)
+ENDPOINT_QUERY_STATS = {}
+ENDPOINT_QUERY_STATS_LOCK = threading.Lock()
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+REQUEST_DURATION_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+EXTERNAL_CALL_BUCKETS_S = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# process-local; each worker exposes its own series
+METRICS_LOCK = threading.Lock()
+REQUEST_METRICS = {"requests": {}, "durations": {}}
+EXTERNAL_CALL_METRICS = {}
+METRICS_COUNTERS = {
+  "db_connections_opened": 0,
+  "db_connect_errors": 0,
+  "db_reconnects": 0
+}
+THROUGHPUT_COUNTERS = {}
+# opt-in request profiling; nothing is profiled unless PROFILE_DIR is set
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_MODES = ("sample", "cprofile")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample") if os.getenv("PROFILE_MODE", "sample") in PROFILE_MODES else "sample"
+PROFILE_SAMPLE_RATE = min(max(float(os.getenv("PROFILE_SAMPLE_RATE", "0")), 0), 1)
+PROFILE_ENDPOINTS = {item.strip() for item in os.getenv("PROFILE_ENDPOINTS", "").split(",") if item.strip()}
+# X-Profile header is only honoured together with a matching X-Profile-Token
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = max(float(os.getenv("PROFILE_INTERVAL_MS", "5")), 1)
+PROFILE_MIN_MS = max(float(os.getenv("PROFILE_MIN_MS", "0")), 0)
+SQL_FINGERPRINT_RULES = (
+  (re.compile(r"'(?:[^'\\]|\\.)*'"), "?"),
+  (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+  (re.compile(r"%s"), "?"),
+  (re.compile(r"\s+"), " "),
+  (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?+)"),
+  (re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+"), "(?+)+")
+)
+OPPORTUNITY_LIST_COLUMNS = (
+  "id", "name", "type", "source", "industry", "city", "status", "stage", "owner_id", "company_id",
+  "organizer_name", "organizer_type", "exhibition_name", "exhibition_start_date", "exhibition_end_date",
+  "venue_name", "venue_address", "booth_count", "exhibition_area_sqm", "expected_visitors",
+  "exhibition_theme", "budget_range", "risk_notes", "contact_name", "contact_title", "contact_phone",
+  "contact_email", "contact_wechat", "company_name", "company_phone", "company_email",
+  "contact_department", "contact_person", "contact_address", "website", "country", "hall_no",
+  "booth_no", "booth_type", "booth_area_sqm", "invalid_reason", "last_follow_up_at",
+  "created_at", "updated_at"
+)
+# heavy columns are only returned when named in ?fields=
+OPPORTUNITY_LIST_DEFAULT_FIELDS = tuple(column for column in OPPORTUNITY_LIST_COLUMNS if column not in {"risk_notes"})
+HOST_POOL_EVENT_COLUMNS = (
+  "id", "source_site", "external_id", "name", "alias_name", "industry", "country", "city",
+  "organizer_name", "venue_name", "venue_address", "exhibition_start_date", "exhibition_end_date",
+  "cycle_text", "exhibition_area_sqm", "exhibitors_count", "visitors_count", "heat_score",
+  "source_url", "source_cover_url", "source_list_url", "is_domestic", "pool_status",
+  "converted_opportunity_id", "raw_json", "fetched_at", "created_at", "updated_at"
+)
+HOST_POOL_EVENT_DEFAULT_FIELDS = tuple(column for column in HOST_POOL_EVENT_COLUMNS if column not in {"raw_json"})
+EXPORT_FETCH_BATCH = max(int(os.getenv("EXPORT_FETCH_BATCH", "1000")), 1)
+EXPORT_CHUNK_BYTES = 64 * 1024
+# the server aborts an unbuffered query when the client stops reading for this
+# long, so give slow downloads room
+EXPORT_NET_WRITE_TIMEOUT_SECONDS = max(int(os.getenv("EXPORT_NET_WRITE_TIMEOUT_SECONDS", "600")), 60)
+# XLSX can only be sent once the whole workbook is built; larger exports go to CSV
+EXPORT_XLSX_MAX_ROWS = max(int(os.getenv("EXPORT_XLSX_MAX_ROWS", "50000")), 1)
+# spreadsheet apps evaluate cells starting with these as formulas
+EXPORT_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+EXPORT_FORMATS = {
+  "csv": "text/csv; charset=utf-8",
+  "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+BULK_OPPORTUNITY_MAX_ROWS = max(int(os.getenv("BULK_OPPORTUNITY_MAX_ROWS", "5000")), 1)
+BULK_OPPORTUNITY_CHUNK = 1000
+# first follow-up is due this long after creation; later ones after the last
+# activity unless it named its own follow_up_at
+FOLLOW_UP_FIRST_SLA_HOURS = max(int(os.getenv("FOLLOW_UP_FIRST_SLA_HOURS", "24")), 1)
+FOLLOW_UP_CADENCE_HOURS = max(int(os.getenv("FOLLOW_UP_CADENCE_HOURS", "168")), 1)
+FOLLOW_UP_REMINDER_MAX_IDS = max(int(os.getenv("FOLLOW_UP_REMINDER_MAX_IDS", "200")), 1)
+FOLLOW_UP_SCAN_BATCH = 1000
+OPPORTUNITY_DETAIL_MAX_IDS = 50
+OPPORTUNITY_DETAIL_INCLUDES = ("contacts", "activities", "tags", "insight")
+ACTIVITY_BATCH_MAX_ITEMS = max(int(os.getenv("ACTIVITY_BATCH_MAX_ITEMS", "1000")), 1)
+# opportunities in these states need no further follow-up
+FOLLOW_UP_CLOSED_STATUSES = ("invalid",)
+FOLLOW_UP_CLOSED_STAGES = ("ready_for_handoff",)
+# one rollup row per opportunity creation day and current state; measures are
+# sums over the opportunities in that cell
+DASHBOARD_ROLLUP_DIMENSIONS = (
+  "rollup_date", "company_id", "owner_id", "type", "source", "status", "stage", "organizer_type"
+)
+DASHBOARD_ROLLUP_MEASURES = (
+  "opportunity_count", "key_contact_count", "contact_count", "persona_count",
+  "followed_count", "followed_24h_count", "activity_count"
+)
+# list filters that are not rollup dimensions; with any of them set the list summary scans opportunities
+DASHBOARD_ROLLUP_UNSUPPORTED_FILTERS = ("city", "industry", "name")
+OPPORTUNITY_DEDUP_SOURCE_FIELDS = ("name", "contact_phone", "contact_email", "company_phone", "company_email")
+BULK_OPPORTUNITY_FIELDS = {"owner_id", "status", "stage", "type", "source", "industry", "city", "invalid_reason"}
+OPPORTUNITY_NAME_SPLIT_PATTERN = re.compile(r"[\s\-_.,，。、;；:：()（）\[\]【】{}<>《》&'\"/\\·|+]+")
+OPPORTUNITY_NAME_LATIN_SUFFIXES = {
+  "co", "ltd", "limited", "inc", "corp", "corporation", "company", "llc", "gmbh", "plc", "group"
+}
+# longest first so "股份有限公司" wins over "有限公司"
+OPPORTUNITY_NAME_CJK_SUFFIXES = ("股份有限公司", "有限责任公司", "集团有限公司", "有限公司", "集团", "公司")
+OPPORTUNITY_DEDUP_SIMILARITY = float(os.getenv("OPPORTUNITY_DEDUP_SIMILARITY", "0.8"))
+# n-grams shared by more names than this carry no signal ("科技", "国际") and are skipped
+OPPORTUNITY_DEDUP_MAX_BLOCK = max(int(os.getenv("OPPORTUNITY_DEDUP_MAX_BLOCK", "200")), 2)
 DB_CONNECT_RETRIES = 3
 DB_RETRY_DELAY_SECONDS = 0.35
 
@@ -235,6 +452,46 @@ def _strip_html(html):
   return text
 
 
+def _increment_metric(counters, key, amount=1):
+  with METRICS_LOCK:
+    counters[key] = counters.get(key, 0) + amount
+
+
+def _external_call_entry(name):
+  # caller holds METRICS_LOCK
+  entry = EXTERNAL_CALL_METRICS.get(name)
+  if entry is None:
+    entry = EXTERNAL_CALL_METRICS[name] = {"duration": _new_histogram(EXTERNAL_CALL_BUCKETS_S), "errors": 0}
+  return entry
+
+
+def _record_external_call(name, elapsed_seconds=None, failed=False):
+  with METRICS_LOCK:
+    entry = _external_call_entry(name)
+    if elapsed_seconds is not None:
+      _observe_histogram(entry["duration"], elapsed_seconds)
+    if failed:
+      entry["errors"] += 1
+
+
+def _timed_external_call(name):
+  """Record latency and raised errors of an outbound call under EXTERNAL_CALL_METRICS[name]."""
+  def decorator(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+      started = time.perf_counter()
+      failed = True
+      try:
+        result = fn(*args, **kwargs)
+        failed = False
+        return result
+      finally:
+        _record_external_call(name, time.perf_counter() - started, failed)
+    return wrapper
+  return decorator
+
+
+@_timed_external_call("fetch_url_text")
 def _fetch_url_text(url, timeout=12, max_chars=12000):
   try:
     req = urllib.request.Request(
@@ -253,6 +510,8 @@ def _fetch_url_text(url, timeout=12, max_chars=12000):
       text = _strip_html(html)
       return text[:max_chars]
   except Exception:
+    # swallowed for the caller, but still an error for the metrics
+    _record_external_call("fetch_url_text", failed=True)
     return ""
 
 
@@ -329,6 +588,7 @@ def _search_searxng(query, num=5):
   return results
 
 
+@_timed_external_call("search_web")
 def _search_web(query, num=5):
   provider = DEFAULT_SEARCH_PROVIDER
   if not provider:
@@ -347,6 +607,7 @@ def _search_web(query, num=5):
   raise RuntimeError("search_provider_not_configured")
 
 
+@_timed_external_call("chat_completion")
 def _call_chat_completion(messages, temperature=0.2):
   use_azure = os.getenv("AZURE_OPENAI_DEFAULT_FLAG", "").upper() == "Y"
   if use_azure:
@@ -436,6 +697,66 @@ def _normalize_contacts(raw):
   return normalized
 
 
+def _normalize_opportunity_name(name):
+  """Name key for dedup: NFKC, lowercase, punctuation dropped, legal-form suffixes stripped."""
+  if not name:
+    return None
+  text = unicodedata.normalize("NFKC", str(name)).lower()
+  tokens = [token for token in OPPORTUNITY_NAME_SPLIT_PATTERN.split(text) if token]
+  while len(tokens) > 1 and tokens[-1] in OPPORTUNITY_NAME_LATIN_SUFFIXES:
+    tokens.pop()
+  key = "".join(tokens)
+  stripped = True
+  while stripped:
+    stripped = False
+    for suffix in OPPORTUNITY_NAME_CJK_SUFFIXES:
+      if key.endswith(suffix) and len(key) > len(suffix):
+        key = key[:-len(suffix)]
+        stripped = True
+        break
+  return key[:255] or None
+
+
+def _normalize_phone_key(phone):
+  if not phone:
+    return None
+  digits = "".join(char for char in unicodedata.normalize("NFKC", str(phone)) if char.isdigit())
+  if digits.startswith("0086"):
+    digits = digits[4:]
+  elif digits.startswith("86") and len(digits) == 13:
+    digits = digits[2:]
+  if len(digits) < 7:
+    return None
+  return digits[:32]
+
+
+def _normalize_email_key(email):
+  if not email:
+    return None
+  text = unicodedata.normalize("NFKC", str(email)).strip().lower()
+  if "@" not in text:
+    return None
+  return text[:100]
+
+
+def _opportunity_dedup_keys(row):
+  return {
+    "name_key": _normalize_opportunity_name(row.get("name")),
+    "phone_key": _normalize_phone_key(row.get("contact_phone") or row.get("company_phone")),
+    "email_key": _normalize_email_key(row.get("contact_email") or row.get("company_email"))
+  }
+
+
+def _store_opportunity_dedup_keys(cur, opportunity_id, row):
+  if not OPPORTUNITY_DEDUP_COLUMNS_READY:
+    return
+  keys = _opportunity_dedup_keys(row)
+  cur.execute(
+    "UPDATE opportunities SET name_key = %s, phone_key = %s, email_key = %s, updated_at = updated_at WHERE id = %s",
+    (keys["name_key"], keys["phone_key"], keys["email_key"], opportunity_id)
+  )
+
+
 def _ensure_contact_role_column(db):
   global CONTACT_ROLE_COLUMN_READY
   if CONTACT_ROLE_COLUMN_READY is not None:
@@ -485,6 +806,7 @@ def _ensure_workflow_tables(db):
         "company_id BIGINT UNSIGNED NULL, "
         "form_template_id BIGINT UNSIGNED NOT NULL, "
         "steps_json LONGTEXT NOT NULL, "
+        "step_count INT NULL, "
         "current_version INT NOT NULL DEFAULT 1, "
         "published_version INT NULL, "
         "status ENUM('active', 'inactive') NOT NULL DEFAULT 'inactive', "
@@ -507,6 +829,8 @@ def _ensure_workflow_tables(db):
         "version_no INT NOT NULL, "
         "form_template_id BIGINT UNSIGNED NOT NULL, "
         "definition_json LONGTEXT NOT NULL, "
+        "compiled_json LONGTEXT NULL, "
+        "total_steps INT NULL, "
         "status ENUM('draft', 'published', 'archived') NOT NULL DEFAULT 'draft', "
         "published_at TIMESTAMP NULL, "
         "created_by BIGINT UNSIGNED NOT NULL, "
@@ -533,6 +857,8 @@ def _ensure_workflow_tables(db):
         "process_snapshot_json LONGTEXT NOT NULL, "
         "form_schema_json LONGTEXT NOT NULL, "
         "form_data_json LONGTEXT NOT NULL, "
+        "process_snapshot_hash CHAR(64) NULL, "
+        "form_schema_hash CHAR(64) NULL, "
         "status ENUM('pending', 'approved', 'rejected', 'withdrawn') NOT NULL DEFAULT 'pending', "
         "current_step INT NOT NULL DEFAULT 1, "
         "total_steps INT NOT NULL DEFAULT 1, "
@@ -583,6 +909,7 @@ def _ensure_workflow_tables(db):
         "comment TEXT NULL, "
         "created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
         "INDEX idx_instance_event_instance (instance_id, created_at), "
+        "INDEX idx_instance_event_instance_id (instance_id, id), "
         "INDEX idx_instance_event_action (action), "
         "CONSTRAINT fk_instance_event_instance FOREIGN KEY (instance_id) REFERENCES approval_instances(id) ON DELETE CASCADE, "
         "CONSTRAINT fk_instance_event_task FOREIGN KEY (task_id) REFERENCES approval_instance_tasks(id) ON DELETE SET NULL, "
@@ -597,6 +924,7 @@ def _ensure_workflow_tables(db):
         "actor_id BIGINT UNSIGNED NOT NULL, "
         "action VARCHAR(32) NOT NULL, "
         "response_json LONGTEXT NULL, "
+        "response_gz LONGBLOB NULL, "
         "status_code INT NOT NULL DEFAULT 200, "
         "created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
         "updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, "
@@ -612,6 +940,15 @@ def _ensure_workflow_tables(db):
       cur.execute("SHOW COLUMNS FROM approval_process_templates LIKE 'published_version'")
       if not cur.fetchone():
         cur.execute("ALTER TABLE approval_process_templates ADD COLUMN published_version INT NULL AFTER current_version")
+      cur.execute("SHOW COLUMNS FROM approval_process_templates LIKE 'step_count'")
+      if not cur.fetchone():
+        cur.execute("ALTER TABLE approval_process_templates ADD COLUMN step_count INT NULL AFTER steps_json")
+        cur.execute("SELECT id, steps_json FROM approval_process_templates")
+        for template_row in cur.fetchall():
+          cur.execute(
+            "UPDATE approval_process_templates SET step_count = %s WHERE id = %s",
+            (_count_definition_steps(template_row.get("steps_json")), template_row["id"])
+          )
       cur.execute(
         "UPDATE approval_process_templates "
         "SET current_version = 1 "
@@ -650,6 +987,49 @@ def _ensure_workflow_tables(db):
       cur.execute("SHOW COLUMNS FROM approval_instances LIKE 'current_node_id'")
       if not cur.fetchone():
         cur.execute("ALTER TABLE approval_instances ADD COLUMN current_node_id VARCHAR(64) NULL AFTER current_step_name")
+      cur.execute(
+        "CREATE TABLE IF NOT EXISTS approval_snapshots ("
+        "snapshot_hash CHAR(64) NOT NULL PRIMARY KEY, "
+        "body_json LONGTEXT NOT NULL, "
+        "created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+      )
+      cur.execute("SHOW COLUMNS FROM approval_process_template_versions LIKE 'compiled_json'")
+      if not cur.fetchone():
+        cur.execute(
+          "ALTER TABLE approval_process_template_versions "
+          "ADD COLUMN compiled_json LONGTEXT NULL AFTER definition_json, "
+          "ADD COLUMN total_steps INT NULL AFTER compiled_json"
+        )
+      cur.execute("SHOW COLUMNS FROM approval_instances LIKE 'process_snapshot_hash'")
+      if not cur.fetchone():
+        cur.execute(
+          "ALTER TABLE approval_instances "
+          "ADD COLUMN process_snapshot_hash CHAR(64) NULL AFTER form_data_json, "
+          "ADD COLUMN form_schema_hash CHAR(64) NULL AFTER process_snapshot_hash"
+        )
+      cur.execute(
+        "CREATE TABLE IF NOT EXISTS approval_instance_events_archive ("
+        "id BIGINT UNSIGNED NOT NULL PRIMARY KEY, "
+        "instance_id BIGINT UNSIGNED NOT NULL, "
+        "task_id BIGINT UNSIGNED NULL, "
+        "user_id BIGINT UNSIGNED NOT NULL, "
+        "action VARCHAR(32) NOT NULL, "
+        "detail_json LONGTEXT NULL, "
+        "comment TEXT NULL, "
+        "created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "INDEX idx_event_archive_instance (instance_id, id), "
+        "INDEX idx_event_archive_created (created_at), "
+        "CONSTRAINT fk_event_archive_instance FOREIGN KEY (instance_id) REFERENCES approval_instances(id) ON DELETE CASCADE"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+      )
+      cur.execute("SHOW INDEX FROM approval_instance_events WHERE Key_name = 'idx_instance_event_instance_id'")
+      if not cur.fetchone():
+        cur.execute("ALTER TABLE approval_instance_events ADD INDEX idx_instance_event_instance_id (instance_id, id)")
+      cur.execute("SHOW COLUMNS FROM approval_action_idempotency LIKE 'response_gz'")
+      if not cur.fetchone():
+        cur.execute("ALTER TABLE approval_action_idempotency ADD COLUMN response_gz LONGBLOB NULL AFTER response_json")
       cur.execute("SHOW COLUMNS FROM approval_instance_tasks LIKE 'status'")
       task_status_col = cur.fetchone()
       task_status_type = str((task_status_col or {}).get("Type") or (task_status_col or {}).get("type") or "").lower()
@@ -737,6 +1117,461 @@ def _ensure_org_dimension_tables(db):
     ORG_DIMENSION_TABLES_READY = False
 
 
+def _ensure_resource_version_table(db):
+  global RESOURCE_VERSION_TABLE_READY
+  if RESOURCE_VERSION_TABLE_READY is not None:
+    return
+  try:
+    with db.cursor() as cur:
+      cur.execute(
+        "CREATE TABLE IF NOT EXISTS resource_versions ("
+        "resource VARCHAR(64) NOT NULL PRIMARY KEY, "
+        "version BIGINT UNSIGNED NOT NULL DEFAULT 0, "
+        "updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+      )
+    RESOURCE_VERSION_TABLE_READY = True
+  except Exception:
+    RESOURCE_VERSION_TABLE_READY = False
+
+
+def _load_resource_versions(db, resources):
+  if not RESOURCE_VERSION_TABLE_READY:
+    return None
+  placeholders = ", ".join(["%s"] * len(resources))
+  try:
+    with db.cursor() as cur:
+      cur.execute(
+        f"SELECT resource, version FROM resource_versions WHERE resource IN ({placeholders})",
+        tuple(resources)
+      )
+      version_map = {row["resource"]: int(row["version"]) for row in cur.fetchall()}
+  except Exception:
+    return None
+  return tuple(version_map.get(resource, 0) for resource in resources)
+
+
+def _bump_resource_versions(db, resources):
+  if not RESOURCE_VERSION_TABLE_READY or not resources:
+    return
+  try:
+    with db.cursor() as cur:
+      cur.executemany(
+        "INSERT INTO resource_versions (resource, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1",
+        [(resource,) for resource in resources]
+      )
+  except Exception:
+    # the write itself succeeded; cached reads stay stale until the next bump
+    app.logger.exception("resource version bump failed: %s", ", ".join(resources))
+
+
+def _ensure_opportunity_dedup_columns(db):
+  global OPPORTUNITY_DEDUP_COLUMNS_READY
+  if OPPORTUNITY_DEDUP_COLUMNS_READY is not None:
+    return
+  try:
+    with db.cursor() as cur:
+      cur.execute("SHOW COLUMNS FROM opportunities LIKE 'name_key'")
+      if not cur.fetchone():
+        cur.execute(
+          "ALTER TABLE opportunities "
+          "ADD COLUMN name_key VARCHAR(255) NULL AFTER name, "
+          "ADD COLUMN phone_key VARCHAR(32) NULL AFTER name_key, "
+          "ADD COLUMN email_key VARCHAR(100) NULL AFTER phone_key"
+        )
+      for index_name, index_columns in (
+        ("idx_opportunity_name", "name"),
+        ("idx_opportunity_name_key", "name_key, city"),
+        ("idx_opportunity_phone_key", "phone_key"),
+        ("idx_opportunity_email_key", "email_key")
+      ):
+        cur.execute("SHOW INDEX FROM opportunities WHERE Key_name = %s", (index_name,))
+        if not cur.fetchone():
+          cur.execute(f"ALTER TABLE opportunities ADD INDEX {index_name} ({index_columns})")
+    OPPORTUNITY_DEDUP_COLUMNS_READY = True
+  except Exception:
+    OPPORTUNITY_DEDUP_COLUMNS_READY = False
+
+
+def _ensure_dashboard_rollup_table(db):
+  global DASHBOARD_ROLLUP_TABLE_READY, DASHBOARD_ROLLUP_SEED_PENDING
+  if DASHBOARD_ROLLUP_TABLE_READY is not None:
+    return
+  try:
+    with db.cursor() as cur:
+      cur.execute(
+        "CREATE TABLE IF NOT EXISTS opportunity_daily_rollups ("
+        "rollup_date DATE NOT NULL, "
+        "company_id BIGINT UNSIGNED NOT NULL, "
+        "owner_id BIGINT UNSIGNED NOT NULL, "
+        "type VARCHAR(20) NOT NULL, "
+        "source VARCHAR(100) NOT NULL, "
+        "status VARCHAR(20) NOT NULL, "
+        "stage VARCHAR(32) NOT NULL, "
+        "organizer_type VARCHAR(32) NOT NULL DEFAULT '', "
+        "opportunity_count INT NOT NULL DEFAULT 0, "
+        "key_contact_count INT NOT NULL DEFAULT 0, "
+        "contact_count INT NOT NULL DEFAULT 0, "
+        "persona_count INT NOT NULL DEFAULT 0, "
+        "followed_count INT NOT NULL DEFAULT 0, "
+        "followed_24h_count INT NOT NULL DEFAULT 0, "
+        "activity_count INT NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (rollup_date, company_id, owner_id, type, source, status, stage, organizer_type), "
+        "INDEX idx_rollup_company_date (company_id, rollup_date), "
+        "INDEX idx_rollup_owner_date (owner_id, rollup_date)"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+      )
+      cur.execute("SHOW INDEX FROM opportunities WHERE Key_name = 'idx_opportunity_company_created'")
+      if not cur.fetchone():
+        cur.execute("ALTER TABLE opportunities ADD INDEX idx_opportunity_company_created (company_id, created_at)")
+      # left behind by the old staging-table rebuild
+      cur.execute("DROP TABLE IF EXISTS opportunity_daily_rollups_next")
+      cur.execute("SELECT 1 FROM opportunity_daily_rollups LIMIT 1")
+      rollups_empty = not cur.fetchone()
+      cur.execute("SELECT 1 FROM opportunities LIMIT 1")
+      needs_seed = rollups_empty and cur.fetchone() is not None
+    # seeding scans every opportunity, far too slow for the request path;
+    # until scripts/reconcile_dashboard_rollups.py has run, readers fall back
+    # to the base tables and writers skip the deltas
+    DASHBOARD_ROLLUP_SEED_PENDING = needs_seed
+    DASHBOARD_ROLLUP_TABLE_READY = not needs_seed
+    if needs_seed:
+      app.logger.warning("opportunity_daily_rollups is empty; run scripts/reconcile_dashboard_rollups.py to seed it")
+  except Exception:
+    DASHBOARD_ROLLUP_TABLE_READY = False
+
+
+def _opportunity_rollup_source_sql(id_placeholders=None):
+  """Per-opportunity rollup contributions; restricted to an id list when placeholders are given."""
+  scope = f"WHERE opportunity_id IN ({id_placeholders}) " if id_placeholders else ""
+  where = f"WHERE o.id IN ({id_placeholders})" if id_placeholders else ""
+  return (
+    "SELECT o.id, DATE(o.created_at) AS rollup_date, o.company_id, o.owner_id, o.type, o.source, "
+    "o.status, o.stage, COALESCE(o.organizer_type, '') AS organizer_type, "
+    "1 AS opportunity_count, "
+    "CASE WHEN COALESCE(o.contact_name, '') <> '' OR COALESCE(o.contact_phone, '') <> '' "
+    "OR COALESCE(o.contact_email, '') <> '' OR COALESCE(c.contact_count, 0) > 0 THEN 1 ELSE 0 END AS key_contact_count, "
+    "COALESCE(c.contact_count, 0) AS contact_count, "
+    "CASE WHEN i.opportunity_id IS NULL THEN 0 ELSE 1 END AS persona_count, "
+    "CASE WHEN a.activity_count > 0 THEN 1 ELSE 0 END AS followed_count, "
+    "CASE WHEN a.first_activity_at <= o.created_at + INTERVAL 24 HOUR THEN 1 ELSE 0 END AS followed_24h_count, "
+    "COALESCE(a.activity_count, 0) AS activity_count "
+    "FROM opportunities o "
+    "LEFT JOIN (SELECT opportunity_id, COUNT(*) AS activity_count, MIN(created_at) AS first_activity_at "
+    f"FROM activities {scope}GROUP BY opportunity_id) a ON a.opportunity_id = o.id "
+    "LEFT JOIN (SELECT opportunity_id, COUNT(*) AS contact_count "
+    f"FROM opportunity_contacts {scope}GROUP BY opportunity_id) c ON c.opportunity_id = o.id "
+    "LEFT JOIN opportunity_insights i ON i.opportunity_id = o.id "
+    f"{where}"
+  )
+
+
+def _capture_opportunity_rollups(cur, opportunity_ids):
+  """Current rollup cell and measures of each opportunity, keyed by id."""
+  if not DASHBOARD_ROLLUP_TABLE_READY or not opportunity_ids:
+    return {}
+  captured = {}
+  for chunk in _chunked(list(opportunity_ids), BULK_OPPORTUNITY_CHUNK):
+    placeholders = ", ".join(["%s"] * len(chunk))
+    cur.execute(_opportunity_rollup_source_sql(placeholders), (*chunk, *chunk, *chunk))
+    for row in cur.fetchall():
+      captured[row["id"]] = (
+        tuple(row[column] for column in DASHBOARD_ROLLUP_DIMENSIONS),
+        tuple(_to_int(row[column]) for column in DASHBOARD_ROLLUP_MEASURES)
+      )
+  return captured
+
+
+def _apply_opportunity_rollup_delta(cur, before, after):
+  """Move opportunities' contributions from their old rollup cells to the new ones."""
+  if not DASHBOARD_ROLLUP_TABLE_READY:
+    return
+  deltas = {}
+  for sign, captured in ((-1, before), (1, after)):
+    for cell, measures in captured.values():
+      current = deltas.setdefault(cell, [0] * len(DASHBOARD_ROLLUP_MEASURES))
+      for idx, value in enumerate(measures):
+        current[idx] += sign * value
+  rows = [(*cell, *measures) for cell, measures in deltas.items() if any(measures)]
+  if not rows:
+    return
+  columns = (*DASHBOARD_ROLLUP_DIMENSIONS, *DASHBOARD_ROLLUP_MEASURES)
+  cur.executemany(
+    f"INSERT INTO opportunity_daily_rollups ({', '.join(columns)}) "
+    f"VALUES ({', '.join(['%s'] * len(columns))}) "
+    "ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{column} = {column} + VALUES({column})" for column in DASHBOARD_ROLLUP_MEASURES),
+    rows
+  )
+
+
+@contextmanager
+def _track_opportunity_rollups(cur, opportunity_ids):
+  before = _capture_opportunity_rollups(cur, opportunity_ids)
+  yield
+  _apply_opportunity_rollup_delta(cur, before, _capture_opportunity_rollups(cur, opportunity_ids))
+
+
+def _rebuild_dashboard_rollups(db, slice_days=31):
+  """Recompute the rollups from the base tables in place, one company and date slice at a time.
+
+  Each slice locks its opportunities, deletes the slice's rollup rows and
+  re-inserts them in one transaction, so deltas from concurrent writes land
+  either before (and are replaced) or after (and are kept). Only a write
+  whose base row commits before the slice and whose delta lands after it is
+  counted twice; the next run corrects it. Meant for the nightly reconcile
+  job on a connection without a read timeout. Returns the number of
+  opportunities aggregated.
+  """
+  columns = (*DASHBOARD_ROLLUP_DIMENSIONS, *DASHBOARD_ROLLUP_MEASURES)
+  dimensions = ", ".join(DASHBOARD_ROLLUP_DIMENSIONS)
+  sums = ", ".join(f"SUM({column})" for column in DASHBOARD_ROLLUP_MEASURES)
+  ranges = {}
+  with db.cursor() as cur:
+    # stale rollup cells of companies or days without opportunities are cleared too
+    cur.execute("SELECT company_id, MIN(created_at) AS first_at, MAX(created_at) AS last_at FROM opportunities GROUP BY company_id")
+    bounds = list(cur.fetchall())
+    cur.execute(
+      "SELECT company_id, MIN(rollup_date) AS first_at, MAX(rollup_date) AS last_at "
+      "FROM opportunity_daily_rollups GROUP BY company_id"
+    )
+    bounds.extend(cur.fetchall())
+  for row in bounds:
+    first_day, last_day = (value.date() if isinstance(value, datetime) else value for value in (row["first_at"], row["last_at"]))
+    known = ranges.get(row["company_id"])
+    ranges[row["company_id"]] = (min(known[0], first_day), max(known[1], last_day)) if known else (first_day, last_day)
+
+  aggregated = 0
+  for company_id, (first_day, last_day) in sorted(ranges.items()):
+    start = first_day
+    while start <= last_day:
+      end = start + timedelta(days=slice_days)
+      with _db_transaction(db):
+        with db.cursor() as cur:
+          cur.execute(
+            "SELECT id FROM opportunities WHERE company_id = %s AND created_at >= %s AND created_at < %s FOR UPDATE",
+            (company_id, start, end)
+          )
+          opportunity_ids = [row["id"] for row in cur.fetchall()]
+          cur.execute(
+            "DELETE FROM opportunity_daily_rollups WHERE company_id = %s AND rollup_date >= %s AND rollup_date < %s",
+            (company_id, start, end)
+          )
+          for chunk in _chunked(opportunity_ids, BULK_OPPORTUNITY_CHUNK):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cur.execute(
+              f"INSERT INTO opportunity_daily_rollups ({', '.join(columns)}) "
+              f"SELECT {dimensions}, {sums} FROM ({_opportunity_rollup_source_sql(placeholders)}) src GROUP BY {dimensions} "
+              "ON DUPLICATE KEY UPDATE "
+              + ", ".join(
+                f"opportunity_daily_rollups.{column} = opportunity_daily_rollups.{column} + VALUES({column})"
+                for column in DASHBOARD_ROLLUP_MEASURES
+              ),
+              (*chunk, *chunk, *chunk)
+            )
+      aggregated += len(opportunity_ids)
+      start = end
+  return aggregated
+
+
+def _ensure_follow_up_tables(db):
+  global FOLLOW_UP_TABLES_READY
+  if FOLLOW_UP_TABLES_READY is not None:
+    return
+  try:
+    with db.cursor() as cur:
+      cur.execute("SHOW COLUMNS FROM opportunities LIKE 'next_follow_up_due_at'")
+      if not cur.fetchone():
+        # existing rows are filled offline by scripts/backfill_follow_up_due.py
+        cur.execute(
+          "ALTER TABLE opportunities ADD COLUMN next_follow_up_due_at TIMESTAMP NULL AFTER last_follow_up_at"
+        )
+      cur.execute("SHOW COLUMNS FROM opportunities LIKE 'next_follow_up_due_changed_at'")
+      if not cur.fetchone():
+        cur.execute(
+          "ALTER TABLE opportunities ADD COLUMN next_follow_up_due_changed_at TIMESTAMP NULL AFTER next_follow_up_due_at"
+        )
+      for index_name, index_columns in (
+        ("idx_opportunity_follow_up_due", "next_follow_up_due_at"),
+        ("idx_opportunity_follow_up_due_changed", "next_follow_up_due_changed_at"),
+        ("idx_opportunity_company_follow_up_due", "company_id, next_follow_up_due_at"),
+        ("idx_opportunity_owner_follow_up_due", "owner_id, next_follow_up_due_at")
+      ):
+        cur.execute("SHOW INDEX FROM opportunities WHERE Key_name = %s", (index_name,))
+        if not cur.fetchone():
+          cur.execute(f"ALTER TABLE opportunities ADD INDEX {index_name} ({index_columns})")
+      cur.execute(
+        "CREATE TABLE IF NOT EXISTS follow_up_scans ("
+        "id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY, "
+        "window_start TIMESTAMP NULL, "
+        "window_end TIMESTAMP NOT NULL, "
+        "overdue_count INT NOT NULL DEFAULT 0, "
+        "reminder_count INT NOT NULL DEFAULT 0, "
+        "created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "INDEX idx_follow_up_scan_window (window_end)"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+      )
+      cur.execute(
+        "CREATE TABLE IF NOT EXISTS follow_up_reminders ("
+        "id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY, "
+        "scan_id BIGINT UNSIGNED NOT NULL, "
+        "owner_id BIGINT UNSIGNED NOT NULL, "
+        "company_id BIGINT UNSIGNED NOT NULL, "
+        "opportunity_count INT NOT NULL, "
+        "opportunity_ids_json LONGTEXT NOT NULL, "
+        "earliest_due_at TIMESTAMP NULL, "
+        "acknowledged_at TIMESTAMP NULL, "
+        "created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "INDEX idx_follow_up_reminder_owner (owner_id, id), "
+        "INDEX idx_follow_up_reminder_scan (scan_id)"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+      )
+    FOLLOW_UP_TABLES_READY = True
+  except Exception:
+    FOLLOW_UP_TABLES_READY = False
+
+
+def _refresh_follow_up_due(cur, opportunity_ids):
+  """Recompute next_follow_up_due_at of the given opportunities from status, creation time and the latest activity."""
+  if not FOLLOW_UP_TABLES_READY:
+    return
+  due_sql = (
+    "CASE "
+    f"WHEN o.status IN ({', '.join(['%s'] * len(FOLLOW_UP_CLOSED_STATUSES))}) "
+    f"OR o.stage IN ({', '.join(['%s'] * len(FOLLOW_UP_CLOSED_STAGES))}) THEN NULL "
+    "WHEN o.last_follow_up_at IS NULL THEN o.created_at + INTERVAL %s HOUR "
+    "ELSE COALESCE("
+    "(SELECT a.follow_up_at FROM activities a WHERE a.opportunity_id = o.id ORDER BY a.id DESC LIMIT 1), "
+    "o.last_follow_up_at + INTERVAL %s HOUR"
+    ") END"
+  )
+  # derived columns: keep updated_at, which the list sorts by, as the last user
+  # edit. next_follow_up_due_changed_at is assigned first so it still compares
+  # against the old due date; the scanner uses it to catch due dates that were
+  # already past when written.
+  sql = (
+    "UPDATE opportunities o SET o.updated_at = o.updated_at, "
+    f"o.next_follow_up_due_changed_at = IF(o.next_follow_up_due_at <=> ({due_sql}), "
+    "o.next_follow_up_due_changed_at, CURRENT_TIMESTAMP), "
+    f"o.next_follow_up_due_at = {due_sql}"
+  )
+  due_params = (*FOLLOW_UP_CLOSED_STATUSES, *FOLLOW_UP_CLOSED_STAGES, FOLLOW_UP_FIRST_SLA_HOURS, FOLLOW_UP_CADENCE_HOURS)
+  params = (*due_params, *due_params)
+  for chunk in _chunked(list(opportunity_ids), BULK_OPPORTUNITY_CHUNK):
+    cur.execute(f"{sql} WHERE o.id IN ({', '.join(['%s'] * len(chunk))})", (*params, *chunk))
+
+
+def _scan_overdue_follow_ups(db):
+  """Turn opportunities that became overdue since the previous scan into per-owner reminders.
+
+  Only the due-date range (previous window end, now] is read, through
+  idx_opportunity_follow_up_due, plus due dates written since the previous
+  scan that were already past by then (reopened opportunities, back-dated
+  follow_up_at, backfilled rows), through idx_opportunity_follow_up_due_changed.
+  Returns the scan summary.
+  """
+  with _db_transaction(db):
+    with db.cursor() as cur:
+      # serializes concurrent scanners on the last scan row
+      cur.execute("SELECT id, window_end FROM follow_up_scans ORDER BY id DESC LIMIT 1 FOR UPDATE")
+      previous = cur.fetchone()
+      window_start = previous["window_end"] if previous else None
+      cur.execute("SELECT CURRENT_TIMESTAMP AS now")
+      window_end = cur.fetchone()["now"]
+
+      by_owner = {}
+      overdue_count = 0
+
+      def collect(rows):
+        for row in rows:
+          batch = by_owner.setdefault(
+            (row["owner_id"], row["company_id"]),
+            {"ids": [], "count": 0, "earliest_due_at": row["next_follow_up_due_at"]}
+          )
+          batch["count"] += 1
+          batch["earliest_due_at"] = min(batch["earliest_due_at"], row["next_follow_up_due_at"])
+          if len(batch["ids"]) < FOLLOW_UP_REMINDER_MAX_IDS:
+            batch["ids"].append(row["id"])
+        return len(rows)
+
+      last_row = None
+      while True:
+        conditions = ["next_follow_up_due_at <= %s"]
+        params = [window_end]
+        if window_start is not None:
+          conditions.append("next_follow_up_due_at > %s")
+          params.append(window_start)
+        if last_row:
+          conditions.append("(next_follow_up_due_at > %s OR (next_follow_up_due_at = %s AND id > %s))")
+          params.extend([last_row["next_follow_up_due_at"], last_row["next_follow_up_due_at"], last_row["id"]])
+        cur.execute(
+          "SELECT id, owner_id, company_id, next_follow_up_due_at FROM opportunities "
+          f"WHERE {' AND '.join(conditions)} "
+          "ORDER BY next_follow_up_due_at, id LIMIT %s",
+          (*params, FOLLOW_UP_SCAN_BATCH)
+        )
+        rows = cur.fetchall()
+        overdue_count += collect(rows)
+        if len(rows) < FOLLOW_UP_SCAN_BATCH:
+          break
+        last_row = rows[-1]
+
+      if window_start is not None:
+        # the first scan reads every past due date, so this only runs afterwards
+        last_id = 0
+        while True:
+          cur.execute(
+            "SELECT id, owner_id, company_id, next_follow_up_due_at FROM opportunities "
+            "WHERE next_follow_up_due_changed_at > %s AND next_follow_up_due_changed_at <= %s "
+            "AND next_follow_up_due_at <= %s AND id > %s "
+            "ORDER BY id LIMIT %s",
+            (window_start, window_end, window_start, last_id, FOLLOW_UP_SCAN_BATCH)
+          )
+          rows = cur.fetchall()
+          overdue_count += collect(rows)
+          if len(rows) < FOLLOW_UP_SCAN_BATCH:
+            break
+          last_id = rows[-1]["id"]
+
+      cur.execute(
+        "INSERT INTO follow_up_scans (window_start, window_end, overdue_count, reminder_count) VALUES (%s, %s, %s, %s)",
+        (window_start, window_end, overdue_count, len(by_owner))
+      )
+      scan_id = cur.lastrowid
+      if by_owner:
+        cur.executemany(
+          "INSERT INTO follow_up_reminders "
+          "(scan_id, owner_id, company_id, opportunity_count, opportunity_ids_json, earliest_due_at) "
+          "VALUES (%s, %s, %s, %s, %s, %s)",
+          [
+            (scan_id, owner_id, company_id, batch["count"], _dump_json_column(batch["ids"]), batch["earliest_due_at"])
+            for (owner_id, company_id), batch in by_owner.items()
+          ]
+        )
+  return {
+    "scan_id": scan_id,
+    "window_start": window_start,
+    "window_end": window_end,
+    "overdue": overdue_count,
+    "reminders": len(by_owner)
+  }
+
+
+def _ensure_activity_timeline_index(db):
+  global ACTIVITY_TIMELINE_INDEX_READY
+  if ACTIVITY_TIMELINE_INDEX_READY is not None:
+    return
+  try:
+    with db.cursor() as cur:
+      cur.execute("SHOW INDEX FROM activities WHERE Key_name = 'idx_activity_timeline'")
+      if not cur.fetchone():
+        cur.execute("ALTER TABLE activities ADD INDEX idx_activity_timeline (opportunity_id, created_at, id)")
+    ACTIVITY_TIMELINE_INDEX_READY = True
+  except Exception:
+    ACTIVITY_TIMELINE_INDEX_READY = False
+
+
 def _ensure_host_pool_tables(db):
   global HOST_POOL_TABLES_READY
   if HOST_POOL_TABLES_READY is not None:
@@ -1048,6 +1883,7 @@ def _fetch_with_opener(opener, url, referer=None, timeout=20):
   return raw.decode(charset or "utf-8", errors="ignore")
 
 
+@_timed_external_call("qufair_page")
 def _fetch_qufair_page(opener, url):
   html_text = _fetch_with_opener(opener, url)
   if "验证不是机器人" in html_text and "go_url" in html_text:
@@ -1294,7 +2130,7 @@ def _upsert_host_pool_event(cur, item):
     _clip_text(item.get("source_cover_url"), 500),
     _clip_text(item.get("source_list_url"), 500),
     1 if _to_bool(item.get("is_domestic"), default=True) else 0,
-    json.dumps(item, ensure_ascii=False)
+    _dump_json_column(item)
   )
   return cur.execute(sql, params)
 
@@ -1483,8 +2319,28 @@ def _serialize_insight(row):
   }
 
 
+def _dump_json_column(value):
+  """Serialize a value for a *_json column (compact, UTF-8)."""
+  if USE_ORJSON:
+    try:
+      return orjson.dumps(value).decode("utf-8")
+    except TypeError:
+      pass
+  return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _parse_list_fields(raw_fields, allowed_columns, default_columns):
+  """Turn ?fields=a,b into a column tuple checked against allowed_columns; id is always first."""
+  if raw_fields is None or not raw_fields.strip():
+    return default_columns
+  requested = [part.strip() for part in raw_fields.split(",") if part.strip()]
+  if not requested or any(column not in allowed_columns for column in requested):
+    raise ValueError("invalid_fields")
+  return ("id", *[column for column in dict.fromkeys(requested) if column != "id"])
+
+
 def _workflow_json_dump(value):
-  return json.dumps(value, ensure_ascii=False)
+  return _dump_json_column(value)
 
 
 def _normalize_company_id(raw_value):
@@ -1787,6 +2643,7 @@ def _repair_process_form_template_conflicts(db):
     return 0
 
   repaired = 0
+  repaired_process_ids = []
   with _db_transaction(db):
     for item in duplicate_rows:
       form_template_id = item.get("form_template_id")
@@ -1855,7 +2712,11 @@ def _repair_process_form_template_conflicts(db):
             "WHERE process_template_id = %s",
             (new_form_template_id, process_updated_by, process_id)
           )
+        _bump_resource_versions(db, ("approval_form_templates",))
+        repaired_process_ids.append(process_id)
         repaired += 1
+  # cached compiled versions still carry the old form_template_id
+  _evict_compiled_process_versions(repaired_process_ids)
   return repaired
 
 
@@ -1880,16 +2741,83 @@ def _normalize_idempotency_key(raw_key):
   return key[:WORKFLOW_IDEMPOTENCY_KEY_MAX_LEN]
 
 
+def _get_cached_action_idempotency_response(idempotency_key, instance_id, actor_id, action):
+  if not idempotency_key or WORKFLOW_IDEMPOTENCY_CACHE_SECONDS <= 0:
+    return None, None
+  cache_key = (idempotency_key, instance_id, actor_id, action)
+  with WORKFLOW_IDEMPOTENCY_LOCK:
+    entry = WORKFLOW_IDEMPOTENCY_CACHE.get(cache_key)
+    if not entry:
+      return None, None
+    if entry[0] < time.monotonic():
+      WORKFLOW_IDEMPOTENCY_CACHE.pop(cache_key, None)
+      return None, None
+  return entry[1], entry[2]
+
+
+def _remember_action_idempotency_response(idempotency_key, instance_id, actor_id, action, response_body, status_code):
+  if not idempotency_key or WORKFLOW_IDEMPOTENCY_CACHE_SECONDS <= 0:
+    return
+  now = time.monotonic()
+  with WORKFLOW_IDEMPOTENCY_LOCK:
+    if len(WORKFLOW_IDEMPOTENCY_CACHE) >= WORKFLOW_IDEMPOTENCY_CACHE_MAX:
+      for cache_key in [key for key, entry in WORKFLOW_IDEMPOTENCY_CACHE.items() if entry[0] < now]:
+        WORKFLOW_IDEMPOTENCY_CACHE.pop(cache_key, None)
+      while len(WORKFLOW_IDEMPOTENCY_CACHE) >= WORKFLOW_IDEMPOTENCY_CACHE_MAX:
+        WORKFLOW_IDEMPOTENCY_CACHE.pop(next(iter(WORKFLOW_IDEMPOTENCY_CACHE)))
+    WORKFLOW_IDEMPOTENCY_CACHE[(idempotency_key, instance_id, actor_id, action)] = (
+      now + WORKFLOW_IDEMPOTENCY_CACHE_SECONDS,
+      response_body,
+      status_code
+    )
+
+
+def _purge_expired_idempotency_records():
+  try:
+    db = _open_db_connection()
+  except OperationalError as err:
+    app.logger.warning("idempotency purge skipped: %s", err)
+    return
+  try:
+    while True:
+      with db.cursor() as cur:
+        deleted = cur.execute(
+          "DELETE FROM approval_action_idempotency "
+          "WHERE created_at < NOW() - INTERVAL %s SECOND "
+          "LIMIT %s",
+          (WORKFLOW_IDEMPOTENCY_TTL_SECONDS, WORKFLOW_IDEMPOTENCY_PURGE_BATCH)
+        )
+      if deleted < WORKFLOW_IDEMPOTENCY_PURGE_BATCH:
+        break
+  except Exception:
+    # best effort on a daemon thread; the next scheduled purge retries
+    app.logger.warning("idempotency purge failed", exc_info=True)
+  finally:
+    db.close()
+
+
+def _schedule_idempotency_purge():
+  global WORKFLOW_IDEMPOTENCY_LAST_PURGE_AT
+  now = time.monotonic()
+  with WORKFLOW_IDEMPOTENCY_LOCK:
+    if WORKFLOW_IDEMPOTENCY_LAST_PURGE_AT and now - WORKFLOW_IDEMPOTENCY_LAST_PURGE_AT < WORKFLOW_IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+      return
+    WORKFLOW_IDEMPOTENCY_LAST_PURGE_AT = now
+  # Own connection on a daemon thread so the purge never holds the request's transaction.
+  threading.Thread(target=_purge_expired_idempotency_records, daemon=True).start()
+
+
 def _load_action_idempotency_response(db, idempotency_key, instance_id, actor_id, action):
   if not idempotency_key:
     return None, None
   with db.cursor() as cur:
     cur.execute(
-      "SELECT response_json, status_code "
+      "SELECT response_json, response_gz, status_code "
       "FROM approval_action_idempotency "
       "WHERE idem_key = %s AND instance_id = %s AND actor_id = %s AND action = %s "
+      "AND created_at >= NOW() - INTERVAL %s SECOND "
       "LIMIT 1",
-      (idempotency_key, instance_id, actor_id, action)
+      (idempotency_key, instance_id, actor_id, action, WORKFLOW_IDEMPOTENCY_TTL_SECONDS)
     )
     row = cur.fetchone()
 
@@ -1897,6 +2825,11 @@ def _load_action_idempotency_response(db, idempotency_key, instance_id, actor_id
     return None, None
 
   response_json = row.get("response_json")
+  if row.get("response_gz"):
+    try:
+      response_json = zlib.decompress(row.get("response_gz")).decode("utf-8")
+    except (zlib.error, UnicodeDecodeError):
+      response_json = None
   if response_json in (None, ""):
     return None, None
 
@@ -1917,24 +2850,29 @@ def _save_action_idempotency_response(db, idempotency_key, instance_id, actor_id
   if not idempotency_key:
     return
   payload = response_body if isinstance(response_body, dict) else {"data": response_body}
+  response_gz = zlib.compress(_workflow_json_dump(payload).encode("utf-8"), 6)
   with db.cursor() as cur:
+    # A key reused after expiry starts a fresh TTL window.
     cur.execute(
       "INSERT INTO approval_action_idempotency "
-      "(idem_key, instance_id, actor_id, action, response_json, status_code) "
-      "VALUES (%s, %s, %s, %s, %s, %s) "
+      "(idem_key, instance_id, actor_id, action, response_json, response_gz, status_code) "
+      "VALUES (%s, %s, %s, %s, NULL, %s, %s) "
       "ON DUPLICATE KEY UPDATE "
-      "response_json = VALUES(response_json), "
+      "response_json = NULL, "
+      "response_gz = VALUES(response_gz), "
       "status_code = VALUES(status_code), "
+      "created_at = CURRENT_TIMESTAMP, "
       "updated_at = CURRENT_TIMESTAMP",
       (
         idempotency_key,
         instance_id,
         actor_id,
         action,
-        _workflow_json_dump(payload),
+        response_gz,
         int(status_code or 200)
       )
     )
+  _schedule_idempotency_purge()
 
 
 def _create_process_template_version(
@@ -1975,37 +2913,140 @@ def _publish_process_template_version(db, template_id, version_no, user_id):
       "WHERE process_template_id = %s",
       (version_no, version_no, user_id, template_id)
     )
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT id, definition_json FROM approval_process_template_versions "
+      "WHERE process_template_id = %s AND version_no = %s",
+      (template_id, version_no)
+    )
+    version_row = cur.fetchone()
+  if version_row:
+    _compile_process_template_version(db, version_row["id"], version_row.get("definition_json"))
 
 
-def _get_process_template_version(db, template_id, version_no):
+def _compile_process_template_version(db, version_id, definition_json):
+  """Normalize and validate a version definition once, persisting the result.
+
+  Returns (definition, total_steps, errors); errors is a list of validation
+  issues when the definition is unusable, in which case nothing is stored.
+  """
+  try:
+    definition = _normalize_workflow_definition(_safe_json_load(definition_json))
+  except ValueError:
+    return None, 0, [_workflow_validation_issue("invalid_process_steps", "流程定义格式不合法。")]
+  if not definition.get("nodes"):
+    return None, 0, [_workflow_validation_issue("invalid_process_steps", "流程定义格式不合法。")]
+  validation = _validate_workflow_definition(definition)
+  if not validation["valid"]:
+    return None, 0, validation["errors"]
+  total_steps = len(_extract_steps_from_definition(definition))
   with db.cursor() as cur:
     cur.execute(
-      "SELECT * FROM approval_process_template_versions "
+      "UPDATE approval_process_template_versions "
+      "SET compiled_json = %s, total_steps = %s "
+      "WHERE id = %s",
+      (_workflow_json_dump(definition), total_steps, version_id)
+    )
+  return definition, total_steps, []
+
+
+def _load_compiled_process_version(db, template_id, version_no):
+  # Published versions never change, so the compiled artifact is cached per
+  # process. Versions published before compilation existed compile on first use.
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT id, form_template_id, total_steps FROM approval_process_template_versions "
       "WHERE process_template_id = %s AND version_no = %s "
       "LIMIT 1",
       (template_id, version_no)
     )
-    return cur.fetchone()
+    version_row = cur.fetchone()
+  if not version_row:
+    return None
 
+  cache_key = (version_row["id"], template_id, version_no)
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    compiled = WORKFLOW_COMPILED_VERSION_CACHE.get(cache_key)
+    if compiled is not None:
+      WORKFLOW_COMPILED_VERSION_CACHE.move_to_end(cache_key)
+      return compiled
 
-def _log_instance_event(db, instance_id, user_id, action, task_id=None, comment=None, detail=None):
   with db.cursor() as cur:
     cur.execute(
-      "INSERT INTO approval_instance_events "
-      "(instance_id, task_id, user_id, action, detail_json, comment) "
-      "VALUES (%s, %s, %s, %s, %s, %s)",
-      (
-        instance_id,
-        task_id,
-        user_id,
-        action,
-        _workflow_json_dump(detail) if detail not in (None, "") else None,
-        comment
-      )
+      "SELECT definition_json, compiled_json FROM approval_process_template_versions WHERE id = %s",
+      (version_row["id"],)
+    )
+    blob_row = cur.fetchone() or {}
+  definition = _safe_json_load(blob_row.get("compiled_json"))
+  total_steps = version_row.get("total_steps")
+  errors = []
+  if not isinstance(definition, dict) or not definition.get("nodes") or total_steps is None:
+    definition, total_steps, errors = _compile_process_template_version(
+      db,
+      version_row["id"],
+      blob_row.get("definition_json")
     )
+  compiled = {
+    "id": version_row["id"],
+    "form_template_id": version_row.get("form_template_id"),
+    "definition": definition,
+    "total_steps": total_steps,
+    "errors": errors,
+    "snapshot_hashes": {}
+  }
+  if not errors and WORKFLOW_COMPILED_VERSION_CACHE_SIZE > 0:
+    with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+      WORKFLOW_COMPILED_VERSION_CACHE[cache_key] = compiled
+      while len(WORKFLOW_COMPILED_VERSION_CACHE) > WORKFLOW_COMPILED_VERSION_CACHE_SIZE:
+        WORKFLOW_COMPILED_VERSION_CACHE.popitem(last=False)
+  return compiled
 
 
-def _normalize_workflow_schema(raw_schema):
+def _evict_compiled_process_versions(template_ids):
+  template_ids = set(template_ids)
+  if not template_ids:
+    return
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    for cache_key in [key for key in WORKFLOW_COMPILED_VERSION_CACHE if key[1] in template_ids]:
+      del WORKFLOW_COMPILED_VERSION_CACHE[cache_key]
+
+
+def _remember_process_snapshot_hash(version_row, process_name, snapshot_hash):
+  # version_row is shared through the compiled version cache: swap in a new
+  # dict instead of mutating the one other requests may be reading
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    version_row["snapshot_hashes"] = {**version_row["snapshot_hashes"], process_name: snapshot_hash}
+
+
+def _get_process_template_version(db, template_id, version_no):
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT * FROM approval_process_template_versions "
+      "WHERE process_template_id = %s AND version_no = %s "
+      "LIMIT 1",
+      (template_id, version_no)
+    )
+    return cur.fetchone()
+
+
+def _log_instance_event(db, instance_id, user_id, action, task_id=None, comment=None, detail=None):
+  with db.cursor() as cur:
+    cur.execute(
+      "INSERT INTO approval_instance_events "
+      "(instance_id, task_id, user_id, action, detail_json, comment) "
+      "VALUES (%s, %s, %s, %s, %s, %s)",
+      (
+        instance_id,
+        task_id,
+        user_id,
+        action,
+        _dump_json_column(detail) if detail not in (None, "") else None,
+        comment
+      )
+    )
+
+
+def _normalize_workflow_schema(raw_schema):
   if not isinstance(raw_schema, list) or not raw_schema:
     raise ValueError("invalid_schema")
 
@@ -2770,29 +3811,37 @@ def _is_default_branch_edge(edge):
   return not isinstance(edge.get("condition"), dict)
 
 
-def _graph_has_cycle_from_start(start_node_id, outgoing_edges, allowed_nodes):
-  if not start_node_id:
-    return False
-  visited = set()
-  stack = set()
-
-  def dfs(node_id):
-    if node_id not in allowed_nodes:
-      return False
-    if node_id in stack:
-      return True
-    if node_id in visited:
-      return False
-    visited.add(node_id)
-    stack.add(node_id)
-    for edge in outgoing_edges.get(node_id, []):
+def _walk_definition_from_start(start_node_id, outgoing_edges, nodes_by_id):
+  # Iterative DFS: long approval chains overflow the recursion limit. Collects
+  # reachable nodes and detects back edges (cycles) in the same pass.
+  reachable_nodes = set()
+  if start_node_id not in nodes_by_id:
+    return reachable_nodes, False
+  has_cycle = False
+  on_path = {start_node_id}
+  reachable_nodes.add(start_node_id)
+  stack = [(start_node_id, iter(outgoing_edges.get(start_node_id, [])))]
+  while stack:
+    node_id, edge_iter = stack[-1]
+    next_node_id = None
+    for edge in edge_iter:
       target = edge.get("target")
-      if target in allowed_nodes and dfs(target):
-        return True
-    stack.remove(node_id)
-    return False
-
-  return dfs(start_node_id)
+      if target not in nodes_by_id:
+        continue
+      if target in on_path:
+        has_cycle = True
+        continue
+      if target not in reachable_nodes:
+        next_node_id = target
+        break
+    if next_node_id is None:
+      stack.pop()
+      on_path.discard(node_id)
+      continue
+    reachable_nodes.add(next_node_id)
+    on_path.add(next_node_id)
+    stack.append((next_node_id, iter(outgoing_edges.get(next_node_id, []))))
+  return reachable_nodes, has_cycle
 
 
 def _validate_workflow_definition(definition):
@@ -2957,18 +4006,7 @@ def _validate_workflow_definition(definition):
           )
         )
 
-  reachable_nodes = set()
-  if start_node_id in nodes_by_id:
-    pending = [start_node_id]
-    while pending:
-      current = pending.pop()
-      if current in reachable_nodes:
-        continue
-      reachable_nodes.add(current)
-      for edge in outgoing_edges.get(current, []):
-        target = edge.get("target")
-        if target in nodes_by_id and target not in reachable_nodes:
-          pending.append(target)
+  reachable_nodes, has_cycle = _walk_definition_from_start(start_node_id, outgoing_edges, nodes_by_id)
 
   unreachable_nodes = [node_id for node_id in nodes_by_id.keys() if node_id not in reachable_nodes]
   if unreachable_nodes:
@@ -3006,11 +4044,7 @@ def _validate_workflow_definition(definition):
       )
     )
 
-  if (
-    start_node_id in nodes_by_id
-    and reachable_nodes
-    and _graph_has_cycle_from_start(start_node_id, outgoing_edges, reachable_nodes)
-  ):
+  if has_cycle:
     errors.append(
       _workflow_validation_issue(
         "graph_has_cycle",
@@ -3063,143 +4097,200 @@ def _extract_steps_from_definition(definition):
   return steps
 
 
-def _validate_workflow_form_data(schema, raw_data):
-  if raw_data is None:
-    raw_data = {}
-  if not isinstance(raw_data, dict):
-    raise ValueError("invalid_form_data")
+def _compile_option_lookup(options):
+  if not isinstance(options, (list, tuple)):
+    return options
+  try:
+    return frozenset(options)
+  except TypeError:
+    return options
 
-  known_keys = {field["key"] for field in schema}
-  normalized = {}
 
-  for field in schema:
-    key = field["key"]
-    value = raw_data.get(key)
-    if value == "":
-      value = None
+def _compile_form_value_coercer(field, error_key, nested=False):
+  field_type = field.get("type")
+  type_error = f"invalid_field_type:{error_key}"
 
-    if value is None:
-      if field.get("required"):
-        raise ValueError(f"missing_required_field:{key}")
-      normalized[key] = None
-      continue
+  if field_type in {"text", "textarea"}:
+    def coerce(value):
+      return value if isinstance(value, str) else str(value)
+    return coerce
 
-    field_type = field.get("type")
-    if field_type in {"text", "textarea"}:
-      if not isinstance(value, str):
-        value = str(value)
-    elif field_type == "number":
+  if field_type == "number":
+    def coerce(value):
       if isinstance(value, bool):
-        raise ValueError(f"invalid_field_type:{key}")
+        raise ValueError(type_error)
       try:
         number_value = float(value)
       except (TypeError, ValueError):
-        raise ValueError(f"invalid_field_type:{key}")
-      if number_value.is_integer():
-        value = int(number_value)
-      else:
-        value = number_value
-    elif field_type == "date":
-      if not isinstance(value, str) or not re.match(r"^\d{4}-\d{2}-\d{2}$", value):
-        raise ValueError(f"invalid_field_type:{key}")
-    elif field_type == "select":
+        raise ValueError(type_error)
+      return int(number_value) if number_value.is_integer() else number_value
+    return coerce
+
+  if field_type == "date":
+    match_date = WORKFLOW_DATE_PATTERN.match
+
+    def coerce(value):
+      if not isinstance(value, str) or not match_date(value):
+        raise ValueError(type_error)
+      return value
+    return coerce
+
+  if field_type == "select":
+    if nested:
+      options = field.get("options") if isinstance(field.get("options"), list) else []
+    else:
+      options = field.get("options") or []
+    option_lookup = _compile_option_lookup(options)
+    option_error = f"invalid_field_option:{error_key}"
+
+    def coerce(value):
       if not isinstance(value, str):
         value = str(value)
-      options = field.get("options") or []
-      if options and value not in options:
-        raise ValueError(f"invalid_field_option:{key}")
-    elif field_type == "boolean":
+      if option_lookup and value not in option_lookup:
+        raise ValueError(option_error)
+      return value
+    return coerce
+
+  if field_type == "boolean":
+    def coerce(value):
       if isinstance(value, bool):
-        pass
-      elif isinstance(value, str) and value.lower() in {"true", "false"}:
-        value = value.lower() == "true"
-      elif isinstance(value, (int, float)) and value in (0, 1):
-        value = bool(value)
-      else:
-        raise ValueError(f"invalid_field_type:{key}")
-    elif field_type == "attachment":
+        return value
+      if isinstance(value, str) and value.lower() in {"true", "false"}:
+        return value.lower() == "true"
+      if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+      raise ValueError(type_error)
+    return coerce
+
+  if field_type == "attachment" and not nested:
+    max_count = field.get("max_count")
+    if not (isinstance(max_count, int) and max_count > 0):
+      max_count = None
+    max_count_error = f"invalid_field_max_count:{error_key}"
+
+    def coerce(value):
       if not isinstance(value, list):
-        raise ValueError(f"invalid_field_type:{key}")
+        raise ValueError(type_error)
       normalized_files = []
       for item in value:
         if isinstance(item, str):
           file_ref = item.strip()
-          if file_ref:
-            normalized_files.append(file_ref)
         elif isinstance(item, dict):
           file_ref = str(item.get("url") or item.get("name") or "").strip()
-          if file_ref:
-            normalized_files.append(file_ref)
         else:
-          raise ValueError(f"invalid_field_type:{key}")
-      max_count = field.get("max_count")
-      if isinstance(max_count, int) and max_count > 0 and len(normalized_files) > max_count:
-        raise ValueError(f"invalid_field_max_count:{key}")
-      value = normalized_files
-    elif field_type == "table":
-      if not isinstance(value, list):
-        raise ValueError(f"invalid_field_type:{key}")
-      columns = field.get("columns") if isinstance(field.get("columns"), list) else []
-      if not columns:
-        raise ValueError(f"invalid_field_type:{key}")
-      column_map = {}
-      for column in columns:
-        if isinstance(column, dict) and column.get("key"):
-          column_map[column["key"]] = column
+          raise ValueError(type_error)
+        if file_ref:
+          normalized_files.append(file_ref)
+      if max_count and len(normalized_files) > max_count:
+        raise ValueError(max_count_error)
+      return normalized_files
+    return coerce
+
+  if field_type == "table" and not nested:
+    columns = field.get("columns") if isinstance(field.get("columns"), list) else []
+    column_map = {}
+    for column in columns:
+      if isinstance(column, dict) and column.get("key"):
+        column_map[column["key"]] = column
+    column_coercers = [
+      (col_key, _compile_form_value_coercer(col_schema, error_key, nested=True))
+      for col_key, col_schema in column_map.items()
+    ]
+    column_keys = frozenset(column_map)
+
+    def coerce(value):
+      if not isinstance(value, list) or not column_coercers:
+        raise ValueError(type_error)
       normalized_rows = []
       for row in value:
         if not isinstance(row, dict):
-          raise ValueError(f"invalid_field_type:{key}")
+          raise ValueError(type_error)
         normalized_row = {}
-        for col_key, col_schema in column_map.items():
+        for col_key, col_coerce in column_coercers:
           col_value = row.get(col_key)
           if col_value in ("", None):
             normalized_row[col_key] = None
-            continue
-          col_type = col_schema.get("type")
-          if col_type in {"text", "textarea"}:
-            if not isinstance(col_value, str):
-              col_value = str(col_value)
-          elif col_type == "number":
-            if isinstance(col_value, bool):
-              raise ValueError(f"invalid_field_type:{key}")
-            try:
-              number_value = float(col_value)
-            except (TypeError, ValueError):
-              raise ValueError(f"invalid_field_type:{key}")
-            col_value = int(number_value) if number_value.is_integer() else number_value
-          elif col_type == "date":
-            if not isinstance(col_value, str) or not re.match(r"^\d{4}-\d{2}-\d{2}$", col_value):
-              raise ValueError(f"invalid_field_type:{key}")
-          elif col_type == "select":
-            if not isinstance(col_value, str):
-              col_value = str(col_value)
-            options = col_schema.get("options") if isinstance(col_schema.get("options"), list) else []
-            if options and col_value not in options:
-              raise ValueError(f"invalid_field_option:{key}")
-          elif col_type == "boolean":
-            if isinstance(col_value, bool):
-              pass
-            elif isinstance(col_value, str) and col_value.lower() in {"true", "false"}:
-              col_value = col_value.lower() == "true"
-            elif isinstance(col_value, (int, float)) and col_value in (0, 1):
-              col_value = bool(col_value)
-            else:
-              raise ValueError(f"invalid_field_type:{key}")
-          normalized_row[col_key] = col_value
-        unknown_columns = [col for col in row.keys() if col not in column_map and row.get(col) not in (None, "")]
-        if unknown_columns:
-          raise ValueError(f"invalid_field_type:{key}")
+          else:
+            normalized_row[col_key] = col_coerce(col_value)
+        for col_key, col_value in row.items():
+          if col_key not in column_keys and col_value not in (None, ""):
+            raise ValueError(type_error)
         normalized_rows.append(normalized_row)
-      value = normalized_rows
+      return normalized_rows
+    return coerce
 
-    normalized[key] = value
+  def coerce(value):
+    return value
+  return coerce
 
-  unknown_keys = [key for key in raw_data.keys() if key not in known_keys and raw_data.get(key) not in (None, "")]
-  if unknown_keys:
-    raise ValueError("unknown_form_fields")
 
-  return normalized
+def _compile_form_data_validator(schema):
+  field_checks = [
+    (field["key"], bool(field.get("required")), _compile_form_value_coercer(field, field["key"]))
+    for field in schema
+  ]
+  known_keys = frozenset(key for key, _required, _coerce in field_checks)
+
+  def validate(raw_data):
+    if raw_data is None:
+      raw_data = {}
+    if not isinstance(raw_data, dict):
+      raise ValueError("invalid_form_data")
+    normalized = {}
+    for key, required, coerce in field_checks:
+      value = raw_data.get(key)
+      if value == "":
+        value = None
+      if value is None:
+        if required:
+          raise ValueError(f"missing_required_field:{key}")
+        normalized[key] = None
+        continue
+      normalized[key] = coerce(value)
+    for key, value in raw_data.items():
+      if key not in known_keys and value not in (None, ""):
+        raise ValueError("unknown_form_fields")
+    return normalized
+
+  return validate
+
+
+def _get_compiled_form_schema(schema_source, schema_hash=None):
+  """Return {"schema", "validate", "snapshot_hash"} for a form schema.
+
+  schema_source is either the raw schema_json text or a parsed schema list.
+  Compiled validators are cached by schema_hash: any key that changes with
+  the schema, such as an instance's stored form_schema_hash or the SHA1 of
+  schema_json computed by MySQL. The schema is only hashed here when no key
+  is given.
+  Returns None when the source does not hold a schema list.
+  """
+  if not schema_hash:
+    raw_text = schema_source if isinstance(schema_source, str) else _workflow_json_dump(schema_source)
+    schema_hash = hashlib.sha1((raw_text or "").encode("utf-8")).hexdigest()
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    compiled = WORKFLOW_FORM_SCHEMA_CACHE.get(schema_hash)
+    if compiled is not None:
+      WORKFLOW_FORM_SCHEMA_CACHE.move_to_end(schema_hash)
+      return compiled
+
+  schema = _safe_json_load(schema_source) if isinstance(schema_source, str) else schema_source
+  if not isinstance(schema, list):
+    return None
+  compiled = {"schema": schema, "validate": _compile_form_data_validator(schema), "snapshot_hash": None}
+  if WORKFLOW_FORM_SCHEMA_CACHE_SIZE > 0:
+    with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+      WORKFLOW_FORM_SCHEMA_CACHE[schema_hash] = compiled
+      while len(WORKFLOW_FORM_SCHEMA_CACHE) > WORKFLOW_FORM_SCHEMA_CACHE_SIZE:
+        WORKFLOW_FORM_SCHEMA_CACHE.popitem(last=False)
+  return compiled
+
+
+def _validate_workflow_form_data(schema, raw_data, schema_hash=None):
+  compiled = _get_compiled_form_schema(schema, schema_hash=schema_hash)
+  if compiled is None:
+    raise ValueError("invalid_form_schema")
+  return compiled["validate"](raw_data)
 
 
 def _serialize_form_template(row, include_schema=True):
@@ -3228,18 +4319,31 @@ def _serialize_form_template(row, include_schema=True):
   return data
 
 
-def _serialize_process_template(row, include_steps=True, include_form_schema=False):
-  if not row:
-    return None
-  raw_definition = _safe_json_load(row.get("steps_json"))
+def _count_definition_steps(steps_json):
   try:
-    definition = _normalize_workflow_definition(raw_definition)
+    definition = _normalize_workflow_definition(_safe_json_load(steps_json))
   except ValueError:
-    definition = _steps_to_graph_definition([])
-  steps = _extract_steps_from_definition(definition)
-  form_schema = _safe_json_load(row.get("form_schema_json"))
-  if not isinstance(form_schema, list):
-    form_schema = []
+    return 0
+  return len(_extract_steps_from_definition(definition))
+
+
+def _serialize_process_template(row, include_steps=True, include_form_schema=False, include_definition=True):
+  if not row:
+    return None
+  step_count = row.get("step_count")
+  definition = None
+  steps = None
+  # steps_json is only decoded when the caller asked for steps/definition or
+  # the row predates the step_count column
+  if include_steps or include_definition or step_count is None:
+    raw_definition = _safe_json_load(row.get("steps_json"))
+    try:
+      definition = _normalize_workflow_definition(raw_definition)
+    except ValueError:
+      definition = _steps_to_graph_definition([])
+    steps = _extract_steps_from_definition(definition)
+    if step_count is None:
+      step_count = len(steps)
 
   data = {
     "id": row.get("id"),
@@ -3256,18 +4360,28 @@ def _serialize_process_template(row, include_steps=True, include_form_schema=Fal
     "updated_by_name": row.get("updated_by_name"),
     "created_at": row.get("created_at"),
     "updated_at": row.get("updated_at"),
-    "step_count": len(steps),
+    "step_count": step_count,
     "current_version": row.get("current_version"),
     "published_version": row.get("published_version")
   }
   if include_steps:
     data["steps"] = steps
-  data["definition"] = definition
+  if include_definition:
+    data["definition"] = definition
   if include_form_schema:
-    data["form_schema"] = form_schema
+    form_schema = _safe_json_load(row.get("form_schema_json"))
+    data["form_schema"] = form_schema if isinstance(form_schema, list) else []
   return data
 
 
+def _json_response_with_etag(payload):
+  """jsonify payload with a body-hash ETag; matching If-None-Match gets a 304."""
+  response = jsonify(payload)
+  response.headers["Cache-Control"] = "private, no-cache"
+  response.add_etag()
+  return response.make_conditional(request)
+
+
 def _serialize_process_template_version(row, include_definition=False, include_form_schema=False):
   if not row:
     return None
@@ -3347,8 +4461,8 @@ def _serialize_approval_instance(row, include_payload=False):
     "finished_at": row.get("finished_at")
   }
   if include_payload:
-    process_snapshot = _safe_json_load(row.get("process_snapshot_json"))
-    form_schema = _safe_json_load(row.get("form_schema_json"))
+    process_snapshot = _get_instance_process_snapshot(row)
+    form_schema = _get_instance_form_schema(row)
     form_data = _safe_json_load(row.get("form_data_json"))
     data["process_snapshot"] = process_snapshot if isinstance(process_snapshot, dict) else {}
     data["form_schema"] = form_schema if isinstance(form_schema, list) else []
@@ -3555,6 +4669,60 @@ def _evaluate_step_condition(form_data, step):
   return _evaluate_condition_definition(form_data, step.get("condition"))
 
 
+def _store_workflow_snapshot(db, payload):
+  # stdlib on purpose: the hash must not depend on which JSON backend is installed
+  body_json = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+  snapshot_hash = hashlib.sha256(body_json.encode("utf-8")).hexdigest()
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    known = snapshot_hash in WORKFLOW_SNAPSHOT_CACHE
+  if not known:
+    with db.cursor() as cur:
+      cur.execute(
+        "INSERT IGNORE INTO approval_snapshots (snapshot_hash, body_json) VALUES (%s, %s)",
+        (snapshot_hash, body_json)
+      )
+  return snapshot_hash
+
+
+def _load_workflow_snapshot(snapshot_hash, db=None):
+  # Snapshots are immutable, so the parsed body is shared read-only across requests.
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    if snapshot_hash in WORKFLOW_SNAPSHOT_CACHE:
+      WORKFLOW_SNAPSHOT_CACHE.move_to_end(snapshot_hash)
+      return WORKFLOW_SNAPSHOT_CACHE[snapshot_hash]
+  db = db or get_db()
+  with db.cursor() as cur:
+    cur.execute("SELECT body_json FROM approval_snapshots WHERE snapshot_hash = %s", (snapshot_hash,))
+    row = cur.fetchone()
+  if not row:
+    return None
+  parsed = _safe_json_load(row.get("body_json"))
+  if parsed is not None:
+    _put_workflow_snapshot_cache(snapshot_hash, parsed)
+  return parsed
+
+
+def _put_workflow_snapshot_cache(cache_key, value):
+  if WORKFLOW_SNAPSHOT_CACHE_SIZE <= 0:
+    return
+  with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+    WORKFLOW_SNAPSHOT_CACHE[cache_key] = value
+    while len(WORKFLOW_SNAPSHOT_CACHE) > WORKFLOW_SNAPSHOT_CACHE_SIZE:
+      WORKFLOW_SNAPSHOT_CACHE.popitem(last=False)
+
+
+def _get_instance_process_snapshot(instance, db=None):
+  if instance.get("process_snapshot_hash"):
+    return _load_workflow_snapshot(instance.get("process_snapshot_hash"), db)
+  return _safe_json_load(instance.get("process_snapshot_json"))
+
+
+def _get_instance_form_schema(instance, db=None):
+  if instance.get("form_schema_hash"):
+    return _load_workflow_snapshot(instance.get("form_schema_hash"), db)
+  return _safe_json_load(instance.get("form_schema_json"))
+
+
 def _load_instance_form_data(instance):
   form_data = _safe_json_load(instance.get("form_data_json"))
   if isinstance(form_data, dict):
@@ -3563,8 +4731,20 @@ def _load_instance_form_data(instance):
 
 
 def _load_instance_definition(instance):
-  snapshot = _safe_json_load(instance.get("process_snapshot_json"))
-
+  # Hashed snapshots are immutable, so their normalized definition is cached too.
+  snapshot_hash = instance.get("process_snapshot_hash")
+  if snapshot_hash:
+    with WORKFLOW_SNAPSHOT_CACHE_LOCK:
+      cached = WORKFLOW_SNAPSHOT_CACHE.get(f"definition:{snapshot_hash}")
+    if cached is not None:
+      return cached
+    definition = _normalize_instance_snapshot_definition(_get_instance_process_snapshot(instance))
+    _put_workflow_snapshot_cache(f"definition:{snapshot_hash}", definition)
+    return definition
+  return _normalize_instance_snapshot_definition(_get_instance_process_snapshot(instance))
+
+
+def _normalize_instance_snapshot_definition(snapshot):
   raw_definition = None
   if isinstance(snapshot, dict):
     if isinstance(snapshot.get("definition"), dict):
@@ -3642,10 +4822,8 @@ def _build_definition_index(definition):
     outgoing_edges.setdefault(source, []).append(edge)
 
   for source, items in outgoing_edges.items():
-    outgoing_edges[source] = sorted(
-      items,
-      key=lambda edge: (int(edge.get("priority") or 9999), str(edge.get("id") or ""))
-    )
+    if len(items) > 1:
+      items.sort(key=lambda edge: (int(edge.get("priority") or 9999), str(edge.get("id") or "")))
 
   return nodes_by_id, outgoing_edges
 
@@ -4147,59 +5325,199 @@ def _can_access_instance(user, instance_row):
   return bool(instance_row.get("has_task_access"))
 
 
-def _get_instance_detail(db, instance_id, user):
+def _normalize_instance_detail_fields(raw_value):
+  value = str(raw_value or "").strip().lower()
+  if not value:
+    return "full"
+  if value not in WORKFLOW_DETAIL_FIELDS:
+    raise ValueError("invalid_fields")
+  return value
+
+
+def _serialize_instance_event(row):
+  return {
+    "id": row.get("id"),
+    "task_id": row.get("task_id"),
+    "user_id": row.get("user_id"),
+    "user_name": row.get("user_name"),
+    "action": row.get("action"),
+    "comment": row.get("comment"),
+    "detail": _safe_json_load(row.get("detail_json")),
+    "created_at": row.get("created_at")
+  }
+
+
+def _load_instance_tasks_and_events(cur, instance_id, event_limit):
+  # Tasks and the latest events (live or archived) share one round trip; the
+  # column layout is aligned by position and split back apart by row_kind.
+  cur.execute(
+    "(SELECT 'task' AS row_kind, ait.id, ait.step_no AS ref_no, ait.step_name AS label, "
+    "ait.approval_mode, ait.approver_id AS user_id, u.name AS user_name, ait.status, ait.decision, "
+    "ait.comment, NULL AS detail_json, ait.acted_at, ait.created_at, ait.updated_at "
+    "FROM approval_instance_tasks ait "
+    "LEFT JOIN users u ON u.id = ait.approver_id "
+    "WHERE ait.instance_id = %s) "
+    "UNION ALL "
+    "(SELECT 'event' AS row_kind, aie.id, aie.task_id AS ref_no, aie.action AS label, "
+    "NULL, aie.user_id, u.name, NULL, NULL, "
+    "aie.comment, aie.detail_json, NULL, aie.created_at, NULL "
+    "FROM approval_instance_events aie "
+    "LEFT JOIN users u ON u.id = aie.user_id "
+    "WHERE aie.instance_id = %s "
+    "ORDER BY aie.id DESC "
+    "LIMIT %s) "
+    "UNION ALL "
+    "(SELECT 'event' AS row_kind, aea.id, aea.task_id AS ref_no, aea.action AS label, "
+    "NULL, aea.user_id, u.name, NULL, NULL, "
+    "aea.comment, aea.detail_json, NULL, aea.created_at, NULL "
+    "FROM approval_instance_events_archive aea "
+    "LEFT JOIN users u ON u.id = aea.user_id "
+    "WHERE aea.instance_id = %s "
+    "ORDER BY aea.id DESC "
+    "LIMIT %s)",
+    (instance_id, instance_id, event_limit + 1, instance_id, event_limit + 1)
+  )
+  task_rows = []
+  event_rows = []
+  for row in cur.fetchall():
+    if row.get("row_kind") == "task":
+      task_rows.append({
+        "id": row.get("id"),
+        "instance_id": instance_id,
+        "step_no": row.get("ref_no"),
+        "step_name": row.get("label"),
+        "approval_mode": row.get("approval_mode"),
+        "approver_id": row.get("user_id"),
+        "approver_name": row.get("user_name"),
+        "status": row.get("status"),
+        "decision": row.get("decision"),
+        "comment": row.get("comment"),
+        "acted_at": row.get("acted_at"),
+        "created_at": row.get("created_at"),
+        "updated_at": row.get("updated_at")
+      })
+    else:
+      event_rows.append({
+        "id": row.get("id"),
+        "task_id": row.get("ref_no"),
+        "user_id": row.get("user_id"),
+        "user_name": row.get("user_name"),
+        "action": row.get("label"),
+        "comment": row.get("comment"),
+        "detail_json": row.get("detail_json"),
+        "created_at": row.get("created_at")
+      })
+  task_rows.sort(key=lambda item: (item.get("step_no") or 0, item.get("id") or 0))
+  event_rows.sort(key=lambda item: item.get("id") or 0, reverse=True)
+  has_more = len(event_rows) > event_limit
+  return task_rows, event_rows[:event_limit], has_more
+
+
+def _list_instance_events(db, instance_id, before_id=None, limit=WORKFLOW_DETAIL_EVENT_LIMIT):
+  cursor_sql = " AND id < %s" if before_id else ""
+  cursor_params = [before_id] if before_id else []
+  params = [instance_id, *cursor_params, limit + 1, instance_id, *cursor_params, limit + 1, limit + 1]
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT ev.*, u.name AS user_name FROM ("
+      "(SELECT id, task_id, user_id, action, detail_json, comment, created_at "
+      "FROM approval_instance_events "
+      f"WHERE instance_id = %s{cursor_sql} "
+      "ORDER BY id DESC LIMIT %s) "
+      "UNION ALL "
+      "(SELECT id, task_id, user_id, action, detail_json, comment, created_at "
+      "FROM approval_instance_events_archive "
+      f"WHERE instance_id = %s{cursor_sql} "
+      "ORDER BY id DESC LIMIT %s)"
+      ") ev "
+      "LEFT JOIN users u ON u.id = ev.user_id "
+      "ORDER BY ev.id DESC "
+      "LIMIT %s",
+      params
+    )
+    rows = cur.fetchall()
+  has_more = len(rows) > limit
+  return [_serialize_instance_event(row) for row in rows[:limit]], has_more
+
+
+def _archive_finished_instance_events(db, older_than_days=WORKFLOW_EVENT_ARCHIVE_AFTER_DAYS, batch_size=200):
+  # Moves whole instances at a time so each instance's history lives in one table.
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT ai.id FROM approval_instances ai "
+      "WHERE ai.status <> 'pending' AND ai.finished_at IS NOT NULL "
+      "AND ai.finished_at < NOW() - INTERVAL %s DAY "
+      "AND EXISTS(SELECT 1 FROM approval_instance_events aie WHERE aie.instance_id = ai.id) "
+      "ORDER BY ai.finished_at ASC "
+      "LIMIT %s",
+      (older_than_days, batch_size)
+    )
+    instance_ids = [row["id"] for row in cur.fetchall()]
+  if not instance_ids:
+    return 0
+
+  placeholders = ", ".join(["%s"] * len(instance_ids))
+  with _db_transaction(db):
+    with db.cursor() as cur:
+      cur.execute(
+        "INSERT IGNORE INTO approval_instance_events_archive "
+        "(id, instance_id, task_id, user_id, action, detail_json, comment, created_at) "
+        "SELECT id, instance_id, task_id, user_id, action, detail_json, comment, created_at "
+        f"FROM approval_instance_events WHERE instance_id IN ({placeholders})",
+        tuple(instance_ids)
+      )
+      cur.execute(
+        f"DELETE FROM approval_instance_events WHERE instance_id IN ({placeholders})",
+        tuple(instance_ids)
+      )
+  return len(instance_ids)
+
+
+def _get_instance_detail(db, instance_id, user, fields="full", event_limit=WORKFLOW_DETAIL_EVENT_LIMIT):
+  user_id = user.get("id")
+  if fields == "summary":
+    # Action responses only need the header row, so skip tasks, events and
+    # every JSON payload column.
+    with db.cursor() as cur:
+      cur.execute(
+        f"SELECT {WORKFLOW_INSTANCE_LIST_COLUMNS}, c.name AS company_name, au.name AS applicant_name, "
+        "EXISTS(SELECT 1 FROM approval_instance_tasks ait WHERE ait.instance_id = ai.id AND ait.approver_id = %s) AS has_task_access, "
+        "EXISTS(SELECT 1 FROM approval_instance_tasks ait WHERE ait.instance_id = ai.id AND ait.approver_id = %s AND ait.status = 'pending') AS pending_action "
+        "FROM approval_instances ai "
+        "LEFT JOIN companies c ON c.id = ai.company_id "
+        "LEFT JOIN users au ON au.id = ai.applicant_id "
+        "WHERE ai.id = %s",
+        (user_id, user_id, instance_id)
+      )
+      instance_row = cur.fetchone()
+    if not instance_row or not _can_access_instance(user, instance_row):
+      return None
+    return _serialize_approval_instance(instance_row)
+
   with db.cursor() as cur:
     cur.execute(
-      "SELECT ai.*, c.name AS company_name, au.name AS applicant_name, "
-      "EXISTS(SELECT 1 FROM approval_instance_tasks ait WHERE ait.instance_id = ai.id AND ait.approver_id = %s) AS has_task_access, "
-      "EXISTS(SELECT 1 FROM approval_instance_tasks ait WHERE ait.instance_id = ai.id AND ait.approver_id = %s AND ait.status = 'pending') AS pending_action "
+      "SELECT ai.*, c.name AS company_name, au.name AS applicant_name "
       "FROM approval_instances ai "
       "LEFT JOIN companies c ON c.id = ai.company_id "
       "LEFT JOIN users au ON au.id = ai.applicant_id "
       "WHERE ai.id = %s",
-      (user.get("id"), user.get("id"), instance_id)
+      (instance_id,)
     )
     instance_row = cur.fetchone()
     if not instance_row:
       return None
+    task_rows, event_rows, events_has_more = _load_instance_tasks_and_events(cur, instance_id, event_limit)
 
-    if not _can_access_instance(user, instance_row):
-      return None
-
-    cur.execute(
-      "SELECT ait.*, u.name AS approver_name "
-      "FROM approval_instance_tasks ait "
-      "LEFT JOIN users u ON u.id = ait.approver_id "
-      "WHERE ait.instance_id = %s "
-      "ORDER BY ait.step_no ASC, ait.id ASC",
-      (instance_id,)
-    )
-    task_rows = cur.fetchall()
-    cur.execute(
-      "SELECT aie.*, u.name AS user_name "
-      "FROM approval_instance_events aie "
-      "LEFT JOIN users u ON u.id = aie.user_id "
-      "WHERE aie.instance_id = %s "
-      "ORDER BY aie.id DESC",
-      (instance_id,)
-    )
-    event_rows = cur.fetchall()
+  own_tasks = [row for row in task_rows if row.get("approver_id") == user_id]
+  instance_row["has_task_access"] = bool(own_tasks)
+  instance_row["pending_action"] = any(row.get("status") == "pending" for row in own_tasks)
+  if not _can_access_instance(user, instance_row):
+    return None
 
   data = _serialize_approval_instance(instance_row, include_payload=True)
   data["tasks"] = [_serialize_approval_task(row) for row in task_rows]
-  data["events"] = [
-    {
-      "id": row.get("id"),
-      "task_id": row.get("task_id"),
-      "user_id": row.get("user_id"),
-      "user_name": row.get("user_name"),
-      "action": row.get("action"),
-      "comment": row.get("comment"),
-      "detail": _safe_json_load(row.get("detail_json")),
-      "created_at": row.get("created_at")
-    }
-    for row in event_rows
-  ]
+  data["events"] = [_serialize_instance_event(row) for row in event_rows]
+  data["events_has_more"] = events_has_more
   definition = _load_instance_definition(instance_row)
   current_node = _get_instance_current_node(instance_row, definition=definition)
   permission_map = _build_field_permission_map((current_node or {}).get("field_permissions"))
@@ -4247,11 +5565,11 @@ def _get_instance_detail(db, instance_id, user):
   return data
 
 
-def _open_db_connection():
+def _open_db_connection(read_timeout=10, write_timeout=10):
   last_error = None
   for attempt in range(DB_CONNECT_RETRIES):
     try:
-      return pymysql.connect(
+      db = pymysql.connect(
         host=os.getenv("DB_HOST"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
@@ -4259,11 +5577,14 @@ def _open_db_connection():
         port=int(os.getenv("DB_PORT", "3306")),
         autocommit=True,
         connect_timeout=6,
-        read_timeout=10,
-        write_timeout=10,
-        cursorclass=DictCursor
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
+        cursorclass=_InstrumentedCursor
       )
+      _increment_metric(METRICS_COUNTERS, "db_connections_opened")
+      return db
     except OperationalError as err:
+      _increment_metric(METRICS_COUNTERS, "db_connect_errors")
       last_error = err
       if attempt < DB_CONNECT_RETRIES - 1:
         time.sleep(DB_RETRY_DELAY_SECONDS * (attempt + 1))
@@ -4274,22 +5595,86 @@ def _open_db_connection():
   raise OperationalError("db_connect_failed")
 
 
+def _open_maintenance_connection():
+  """Connection for batch scripts: same settings as requests but no read/write timeout."""
+  db = _open_db_connection(read_timeout=None, write_timeout=None)
+  _ensure_schema(db)
+  return db
+
+
+def _ensure_schema(db):
+  """Run the _ensure_* checks until every one of them succeeds.
+
+  Under gunicorn several workers hit their first request together. Without
+  the MySQL named lock two of them can race the same ALTER, so a worker that
+  cannot get the lock skips the checks and tries again later. A check that
+  failed (READY flag False) is retried every SCHEMA_RETRY_SECONDS, e.g. the
+  rollups once the reconcile job has seeded them.
+  """
+  global SCHEMA_ENSURED, SCHEMA_RETRY_AT
+  if SCHEMA_ENSURED or time.monotonic() < SCHEMA_RETRY_AT:
+    return
+  with SCHEMA_ENSURE_LOCK:
+    if SCHEMA_ENSURED or time.monotonic() < SCHEMA_RETRY_AT:
+      return
+    locked = False
+    try:
+      deadline = time.monotonic() + SCHEMA_LOCK_TIMEOUT
+      with db.cursor() as cur:
+        # short waits stay under the connection's read_timeout
+        while True:
+          cur.execute("SELECT GET_LOCK(%s, 5) AS acquired", (SCHEMA_LOCK_NAME,))
+          locked = (cur.fetchone() or {}).get("acquired") == 1
+          if locked or time.monotonic() >= deadline:
+            break
+    except OperationalError:
+      locked = False
+    if not locked:
+      SCHEMA_RETRY_AT = time.monotonic() + SCHEMA_RETRY_SECONDS
+      app.logger.warning("schema lock busy; schema checks deferred for %ss", SCHEMA_RETRY_SECONDS)
+      return
+    steps = (
+      ("RESOURCE_VERSION_TABLE_READY", _ensure_resource_version_table),
+      ("CONTACT_ROLE_COLUMN_READY", _ensure_contact_role_column),
+      ("OPPORTUNITY_DEDUP_COLUMNS_READY", _ensure_opportunity_dedup_columns),
+      ("WORKFLOW_TABLES_READY", _ensure_workflow_tables),
+      ("ORG_DIMENSION_TABLES_READY", _ensure_org_dimension_tables),
+      ("HOST_POOL_TABLES_READY", _ensure_host_pool_tables),
+      ("DASHBOARD_ROLLUP_TABLE_READY", _ensure_dashboard_rollup_table),
+      ("FOLLOW_UP_TABLES_READY", _ensure_follow_up_tables),
+      ("ACTIVITY_TIMELINE_INDEX_READY", _ensure_activity_timeline_index)
+    )
+    try:
+      for flag, ensure in steps:
+        if globals()[flag] is False:
+          # failed last time; the ensure only runs while its flag is None
+          globals()[flag] = None
+        ensure(db)
+      failed = [flag for flag, _ensure in steps if not globals()[flag]]
+      if failed:
+        SCHEMA_RETRY_AT = time.monotonic() + SCHEMA_RETRY_SECONDS
+        app.logger.warning("schema checks not ready, retrying in %ss: %s", SCHEMA_RETRY_SECONDS, ", ".join(failed))
+      else:
+        SCHEMA_ENSURED = True
+    finally:
+      with db.cursor() as cur:
+        cur.execute("SELECT RELEASE_LOCK(%s)", (SCHEMA_LOCK_NAME,))
+
+
 def get_db():
   if "db" not in g:
     g.db = _open_db_connection()
-    _ensure_contact_role_column(g.db)
-    _ensure_workflow_tables(g.db)
-    _ensure_org_dimension_tables(g.db)
-    _ensure_host_pool_tables(g.db)
+    _ensure_schema(g.db)
   else:
     try:
+      thread_id = g.db.thread_id()
       g.db.ping(reconnect=True)
+      if g.db.thread_id() != thread_id:
+        _increment_metric(METRICS_COUNTERS, "db_reconnects")
     except OperationalError:
+      _increment_metric(METRICS_COUNTERS, "db_reconnects")
       g.db = _open_db_connection()
-      _ensure_contact_role_column(g.db)
-      _ensure_workflow_tables(g.db)
-      _ensure_org_dimension_tables(g.db)
-      _ensure_host_pool_tables(g.db)
+      _ensure_schema(g.db)
   return g.db
 
 
@@ -4348,7 +5733,130 @@ def require_user(fn):
   return wrapper
 
 
+def _get_cached_response_body(cache_key):
+  if RESPONSE_CACHE_SECONDS <= 0:
+    return None
+  with RESPONSE_CACHE_LOCK:
+    cached = RESPONSE_CACHE.get(cache_key)
+    if not cached:
+      return None
+    expires_at, body = cached
+    if expires_at < time.time():
+      RESPONSE_CACHE.pop(cache_key, None)
+      return None
+    RESPONSE_CACHE.move_to_end(cache_key)
+    return body
+
+
+def _remember_response_body(cache_key, body):
+  if RESPONSE_CACHE_SECONDS <= 0 or RESPONSE_CACHE_MAX_ENTRIES <= 0:
+    return
+  with RESPONSE_CACHE_LOCK:
+    RESPONSE_CACHE[cache_key] = (time.time() + RESPONSE_CACHE_SECONDS, body)
+    RESPONSE_CACHE.move_to_end(cache_key)
+    while len(RESPONSE_CACHE) > RESPONSE_CACHE_MAX_ENTRIES:
+      RESPONSE_CACHE.popitem(last=False)
+
+
+def cached_read(resource):
+  """Serve a read-mostly list with a weak ETag built from resource versions.
+
+  The ETag covers the endpoint, the caller's scope (role + company), the query
+  args and the versions of every resource the body depends on, so a matching
+  If-None-Match returns 304 without running the list query. Must sit below
+  require_user.
+  """
+  dependencies = CACHED_RESOURCE_DEPENDENCIES[resource]
+
+  def decorator(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+      versions = _load_resource_versions(get_db(), dependencies)
+      if versions is None:
+        return fn(*args, **kwargs)
+
+      scope = f"{g.user.get('role')}:{g.user.get('company_id') or 0}"
+      query_key = "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+      cache_key = (request.endpoint, scope, query_key, versions)
+      etag = hashlib.sha1(repr(cache_key).encode("utf-8")).hexdigest()
+
+      if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+      else:
+        body = _get_cached_response_body(cache_key)
+        if body is not None:
+          response = app.response_class(body, mimetype="application/json")
+        else:
+          response = app.make_response(fn(*args, **kwargs))
+          if response.status_code != 200:
+            return response
+          _remember_response_body(cache_key, response.get_data())
+      response.set_etag(etag, weak=True)
+      response.headers["Cache-Control"] = "private, no-cache"
+      return response
+
+    return wrapper
+
+  return decorator
+
+
+def bumps_resource_version(*resources):
+  """Bump the version of resources after a successful (< 400) mutation."""
+  def decorator(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+      response = app.make_response(fn(*args, **kwargs))
+      if response.status_code < 400 and request.method != "OPTIONS":
+        _bump_resource_versions(get_db(), resources)
+      return response
+
+    return wrapper
+
+  return decorator
+
+
+HTTP_DATE_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HTTP_DATE_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def _fast_json_default(value):
+  # same output as werkzeug.http.http_date, which Flask uses for dates, without
+  # the email.utils round trip
+  if isinstance(value, date):
+    if not isinstance(value, datetime):
+      value = datetime.combine(value, datetime_time())
+    elif value.tzinfo is not None:
+      value = value.astimezone(timezone.utc)
+    return (
+      f"{HTTP_DATE_WEEKDAYS[value.weekday()]}, {value.day:02d} {HTTP_DATE_MONTHS[value.month - 1]} "
+      f"{value.year:04d} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+  return DefaultJSONProvider.default(value)
+
+
+class _FastJSONProvider(DefaultJSONProvider):
+  """Flask JSON provider that renders compact responses with orjson.
+
+  Output matches DefaultJSONProvider (sorted keys, HTTP dates, Decimal as
+  str); anything orjson rejects, such as non-str keys or ints over 64 bits,
+  falls back to the stdlib path. Indented debug output always uses stdlib.
+  """
+
+  default = staticmethod(_fast_json_default)
+
+  def response(self, *args, **kwargs):
+    if not USE_ORJSON or self.compact is False or (self.compact is None and self._app.debug):
+      return super().response(*args, **kwargs)
+    obj = self._prepare_response_obj(args, kwargs)
+    try:
+      body = orjson.dumps(obj, default=self.default, option=ORJSON_RESPONSE_OPTIONS)
+    except TypeError:
+      return super().response(*args, **kwargs)
+    return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = _FastJSONProvider(app)
 app.teardown_appcontext(close_db)
 
 
@@ -4372,47 +5880,496 @@ def add_cors_headers(response):
   return response
 
 
-@app.route("/health")
-def health():
-  return jsonify({"status": "ok"})
+def _negotiate_response_encoding():
+  accept_encodings = request.accept_encodings
+  br_quality = accept_encodings["br"] if brotli is not None else 0
+  gzip_quality = accept_encodings["gzip"]
+  if br_quality and br_quality >= gzip_quality:
+    return "br"
+  if gzip_quality:
+    return "gzip"
+  return None
 
 
-@app.route("/me", methods=["GET"])
-@require_user
-def get_me():
-  return jsonify({"data": g.user})
+def _record_compression(bytes_in, bytes_out, encoding=None, skipped_small=False):
+  with RESPONSE_COMPRESSION_LOCK:
+    RESPONSE_COMPRESSION_STATS["responses"] += 1
+    RESPONSE_COMPRESSION_STATS["bytes_in"] += bytes_in
+    RESPONSE_COMPRESSION_STATS["bytes_out"] += bytes_out
+    if skipped_small:
+      RESPONSE_COMPRESSION_STATS["skipped_small"] += 1
+    if encoding:
+      RESPONSE_COMPRESSION_STATS["compressed"] += 1
+      RESPONSE_COMPRESSION_STATS["by_encoding"][encoding] += 1
 
 
-@app.route("/login", methods=["POST"])
-def login():
-  body = request.get_json(silent=True) or {}
-  username = body.get("username")
-  password = body.get("password")
+def _compression_stats_snapshot():
+  with RESPONSE_COMPRESSION_LOCK:
+    stats = dict(RESPONSE_COMPRESSION_STATS)
+    stats["by_encoding"] = dict(RESPONSE_COMPRESSION_STATS["by_encoding"])
+  stats["ratio"] = round(stats["bytes_in"] / stats["bytes_out"], 2) if stats["bytes_out"] else None
+  stats["brotli_available"] = brotli is not None
+  return stats
 
-  if not username or not password:
-    return jsonify({"error": "missing_credentials"}), 400
 
-  db = get_db()
-  admin_username = os.getenv("ADMIN_USERNAME", "admin-pico")
-  admin_password = os.getenv("ADMIN_PASSWORD", "pico@2026")
+@app.after_request
+def compress_response(response):
+  if (
+    not RESPONSE_COMPRESSION_ENABLED
+    or request.method == "HEAD"
+    or response.status_code < 200
+    or response.status_code in (204, 206, 304)
+    or response.direct_passthrough
+    or response.is_streamed
+    or "Content-Encoding" in response.headers
+    or response.mimetype not in RESPONSE_COMPRESSION_MIMETYPES
+  ):
+    return response
+
+  response.vary.add("Accept-Encoding")
+  data = response.get_data()
+  if len(data) < RESPONSE_COMPRESSION_MIN_BYTES:
+    _record_compression(len(data), len(data), skipped_small=True)
+    return response
+  encoding = _negotiate_response_encoding()
+  if not encoding:
+    _record_compression(len(data), len(data))
+    return response
+
+  if encoding == "br":
+    compressed = brotli.compress(data, quality=RESPONSE_COMPRESSION_BROTLI_QUALITY)
+  else:
+    compressed = gzip.compress(data, compresslevel=RESPONSE_COMPRESSION_GZIP_LEVEL, mtime=0)
+  if len(compressed) >= len(data):
+    _record_compression(len(data), len(data))
+    return response
+
+  response.set_data(compressed)
+  response.headers["Content-Encoding"] = encoding
+  # the encoded body differs byte-wise, so a strong validator no longer applies
+  etag, is_weak = response.get_etag()
+  if etag and not is_weak:
+    response.set_etag(etag, weak=True)
+  _record_compression(len(data), len(compressed), encoding=encoding)
+  return response
 
-  if username == admin_username and password == admin_password:
-    with db.cursor() as cur:
-      cur.execute(
-        "SELECT id, name, role, company_id, status FROM users WHERE name = %s AND role = 'group_admin' LIMIT 1",
-        (username,)
-      )
-      user = cur.fetchone()
 
-      if not user:
-        cur.execute(
-          "INSERT INTO users (name, role, status) VALUES (%s, 'group_admin', 'active')",
-          (username,)
-        )
-        user_id = cur.lastrowid
-        cur.execute(
-          "SELECT id, name, role, company_id, status FROM users WHERE id = %s",
-          (user_id,)
+@lru_cache(maxsize=1024)
+def _sql_fingerprint(query):
+  """Statement shape with literals and placeholder lists collapsed, e.g. "... WHERE id IN (?+)"."""
+  fingerprint = query.strip()
+  for pattern, replacement in SQL_FINGERPRINT_RULES:
+    fingerprint = pattern.sub(replacement, fingerprint)
+  return fingerprint[:500]
+
+
+def _record_query(query, elapsed_ms):
+  if isinstance(query, (bytes, bytearray)):
+    query = query.decode("utf-8", "replace")
+  fingerprint = _sql_fingerprint(query)
+  endpoint = "-"
+  if has_request_context():
+    endpoint = request.endpoint or "unmatched"
+    stats = g.get("query_stats")
+    if stats is None:
+      stats = g.query_stats = {"count": 0, "ms": 0.0, "fingerprints": {}}
+    stats["count"] += 1
+    stats["ms"] += elapsed_ms
+    entry = stats["fingerprints"].setdefault(fingerprint, [0, 0.0, 0.0])
+    entry[0] += 1
+    entry[1] += elapsed_ms
+    entry[2] = max(entry[2], elapsed_ms)
+  if elapsed_ms >= SLOW_QUERY_MS:
+    app.logger.warning("slow query %.1f ms endpoint=%s sql=%s", elapsed_ms, endpoint, fingerprint)
+
+
+class _InstrumentedCursor(DictCursor):
+  """DictCursor that times each statement into the request's query stats.
+
+  executemany is recorded once under its template rather than per generated
+  statement.
+  """
+
+  _batch_depth = 0
+
+  def execute(self, query, args=None):
+    if self._batch_depth or not QUERY_INSTRUMENTATION_ENABLED:
+      return super().execute(query, args)
+    started = time.perf_counter()
+    try:
+      return super().execute(query, args)
+    finally:
+      _record_query(query, (time.perf_counter() - started) * 1000)
+
+  def executemany(self, query, args):
+    if not QUERY_INSTRUMENTATION_ENABLED:
+      return super().executemany(query, args)
+    started = time.perf_counter()
+    self._batch_depth += 1
+    try:
+      return super().executemany(query, args)
+    finally:
+      self._batch_depth -= 1
+      _record_query(query, (time.perf_counter() - started) * 1000)
+
+
+def _new_histogram(bounds):
+  return {"bounds": bounds, "counts": [0] * (len(bounds) + 1), "sum": 0.0}
+
+
+def _observe_histogram(histogram, value):
+  histogram["counts"][bisect_left(histogram["bounds"], value)] += 1
+  histogram["sum"] += value
+
+
+def _record_endpoint_queries(endpoint, stats):
+  with ENDPOINT_QUERY_STATS_LOCK:
+    entry = ENDPOINT_QUERY_STATS.get(endpoint)
+    if entry is None:
+      entry = ENDPOINT_QUERY_STATS[endpoint] = {
+        "requests": 0,
+        "db_ms": _new_histogram(DB_TIME_BUCKETS_MS),
+        "queries": _new_histogram(QUERY_COUNT_BUCKETS),
+        "fingerprints": {}
+      }
+    entry["requests"] += 1
+    _observe_histogram(entry["db_ms"], stats["ms"])
+    _observe_histogram(entry["queries"], stats["count"])
+    fingerprints = entry["fingerprints"]
+    for fingerprint, (count, total_ms, max_ms) in stats["fingerprints"].items():
+      if fingerprint not in fingerprints and len(fingerprints) >= QUERY_STATS_MAX_FINGERPRINTS:
+        fingerprint = "other"
+      current = fingerprints.setdefault(fingerprint, [0, 0.0, 0.0])
+      current[0] += count
+      current[1] += total_ms
+      current[2] = max(current[2], max_ms)
+
+
+def _endpoint_query_stats_snapshot():
+  with ENDPOINT_QUERY_STATS_LOCK:
+    snapshot = {}
+    for endpoint, entry in ENDPOINT_QUERY_STATS.items():
+      top = sorted(entry["fingerprints"].items(), key=lambda item: -item[1][1])[:10]
+      snapshot[endpoint] = {
+        "requests": entry["requests"],
+        "queries": int(entry["queries"]["sum"]),
+        "db_ms": round(entry["db_ms"]["sum"], 1),
+        "db_ms_histogram": {"bounds": list(entry["db_ms"]["bounds"]), "counts": list(entry["db_ms"]["counts"])},
+        "query_count_histogram": {"bounds": list(entry["queries"]["bounds"]), "counts": list(entry["queries"]["counts"])},
+        "top_fingerprints": [
+          {"sql": fingerprint, "count": count, "total_ms": round(total_ms, 1), "max_ms": round(max_ms, 1)}
+          for fingerprint, (count, total_ms, max_ms) in top
+        ]
+      }
+  return snapshot
+
+
+@app.before_request
+def start_request_timer():
+  g.request_started_at = time.perf_counter()
+
+
+class _StackSampler(threading.Thread):
+  """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+  def __init__(self, thread_id, interval_seconds):
+    super().__init__(name="request-profiler", daemon=True)
+    self.thread_id = thread_id
+    self.interval_seconds = interval_seconds
+    self.stacks = {}
+    self._stopped = threading.Event()
+
+  def run(self):
+    while not self._stopped.wait(self.interval_seconds):
+      frame = sys._current_frames().get(self.thread_id)
+      frames = []
+      while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+      if frames:
+        stack = ";".join(reversed(frames))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+  def stop(self):
+    self._stopped.set()
+    self.join()
+
+
+def _requested_profile_mode():
+  # returns (mode, forced) or None; forced profiles ignore PROFILE_MIN_MS
+  if not PROFILE_DIR:
+    return None
+  requested = request.headers.get("X-Profile", "").strip().lower()
+  if requested and PROFILE_TOKEN and hmac.compare_digest(request.headers.get("X-Profile-Token", ""), PROFILE_TOKEN):
+    return (requested if requested in PROFILE_MODES else PROFILE_MODE), True
+  if (
+    PROFILE_SAMPLE_RATE
+    and (not PROFILE_ENDPOINTS or request.endpoint in PROFILE_ENDPOINTS)
+    and random.random() < PROFILE_SAMPLE_RATE
+  ):
+    return PROFILE_MODE, False
+  return None
+
+
+@app.before_request
+def start_request_profile():
+  requested = _requested_profile_mode()
+  if requested is None:
+    return
+  mode, forced = requested
+  if mode == "cprofile":
+    profiler = cProfile.Profile()
+    try:
+      profiler.enable()
+    except ValueError:
+      # another profiler is already active on this thread
+      return
+  else:
+    profiler = _StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+    profiler.start()
+  g.request_profile = (mode, forced, profiler, time.perf_counter())
+
+
+def _finish_request_profile():
+  profile = g.pop("request_profile", None)
+  if profile is None:
+    return None
+  mode, forced, profiler, started_at = profile
+  if mode == "cprofile":
+    profiler.disable()
+  else:
+    profiler.stop()
+  elapsed_ms = (time.perf_counter() - started_at) * 1000
+  if not forced and elapsed_ms < PROFILE_MIN_MS:
+    return None
+  endpoint = secure_filename(request.endpoint or "unmatched") or "unmatched"
+  filename = (
+    f"{endpoint}-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{elapsed_ms:.0f}ms-{os.getpid()}-{random.randrange(16 ** 6):06x}"
+    + (".pstats" if mode == "cprofile" else ".collapsed")
+  )
+  path = os.path.join(PROFILE_DIR, filename)
+  try:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if mode == "cprofile":
+      profiler.dump_stats(path)
+    else:
+      with open(path, "w", encoding="utf-8") as handle:
+        for stack, count in sorted(profiler.stacks.items()):
+          handle.write(f"{stack} {count}\n")
+  except OSError as err:
+    app.logger.warning("could not write request profile %s: %s", path, err)
+    return None
+  return filename
+
+
+@app.after_request
+def stop_request_profile(response):
+  filename = _finish_request_profile()
+  if filename:
+    response.headers["X-Profile-File"] = filename
+  return response
+
+
+@app.teardown_request
+def discard_request_profile(_error=None):
+  # after_request is skipped when a request dies before a response exists
+  _finish_request_profile()
+
+
+@app.after_request
+def add_query_timing(response):
+  if not QUERY_INSTRUMENTATION_ENABLED:
+    return response
+  stats = g.get("query_stats") or {"count": 0, "ms": 0.0, "fingerprints": {}}
+  _record_endpoint_queries(request.endpoint or "unmatched", stats)
+  timings = [f'db;dur={stats["ms"]:.1f};desc="{stats["count"]} queries"']
+  started_at = g.get("request_started_at")
+  if started_at is not None:
+    timings.append(f"app;dur={(time.perf_counter() - started_at) * 1000:.1f}")
+  response.headers["Server-Timing"] = ", ".join(timings)
+  return response
+
+
+@app.after_request
+def record_request_metrics(response):
+  started_at = g.get("request_started_at")
+  if started_at is None:
+    return response
+  elapsed = time.perf_counter() - started_at
+  route_key = (request.method, request.endpoint or "unmatched")
+  with METRICS_LOCK:
+    status_key = (*route_key, str(response.status_code))
+    REQUEST_METRICS["requests"][status_key] = REQUEST_METRICS["requests"].get(status_key, 0) + 1
+    histogram = REQUEST_METRICS["durations"].get(route_key)
+    if histogram is None:
+      histogram = REQUEST_METRICS["durations"][route_key] = _new_histogram(REQUEST_DURATION_BUCKETS_S)
+    _observe_histogram(histogram, elapsed)
+  return response
+
+
+def _prometheus_labels(labels):
+  if not labels:
+    return ""
+  parts = []
+  for key, value in labels:
+    escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    parts.append(f'{key}="{escaped}"')
+  return "{" + ",".join(parts) + "}"
+
+
+def _prometheus_histogram_lines(name, labels, histogram, scale=1):
+  lines = []
+  cumulative = 0
+  for bound, count in zip(histogram["bounds"], histogram["counts"]):
+    cumulative += count
+    lines.append(f"{name}_bucket{_prometheus_labels([*labels, ('le', f'{bound * scale:g}')])} {cumulative}")
+  cumulative += histogram["counts"][-1]
+  lines.append(f"{name}_bucket{_prometheus_labels([*labels, ('le', '+Inf')])} {cumulative}")
+  lines.append(f"{name}_sum{_prometheus_labels(labels)} {histogram['sum'] * scale:.6f}")
+  lines.append(f"{name}_count{_prometheus_labels(labels)} {cumulative}")
+  return lines
+
+
+def _render_prometheus_metrics():
+  """All in-process metrics in the Prometheus text exposition format (0.0.4)."""
+  lines = []
+
+  def header(name, metric_type, help_text):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+  with METRICS_LOCK:
+    requests_by_status = sorted(REQUEST_METRICS["requests"].items())
+    durations = sorted((key, dict(value, counts=list(value["counts"]))) for key, value in REQUEST_METRICS["durations"].items())
+    external_calls = sorted(
+      (name, dict(entry["duration"], counts=list(entry["duration"]["counts"])), entry["errors"])
+      for name, entry in EXTERNAL_CALL_METRICS.items()
+    )
+    counters = dict(METRICS_COUNTERS)
+    throughput = sorted(THROUGHPUT_COUNTERS.items())
+  with ENDPOINT_QUERY_STATS_LOCK:
+    db_stats = sorted(
+      (endpoint, dict(entry["db_ms"], counts=list(entry["db_ms"]["counts"])), entry["queries"]["sum"])
+      for endpoint, entry in ENDPOINT_QUERY_STATS.items()
+    )
+  compression = _compression_stats_snapshot()
+
+  header("lead_http_requests_total", "counter", "HTTP requests by method, endpoint and status.")
+  for (method, endpoint, status), count in requests_by_status:
+    lines.append(f"lead_http_requests_total{_prometheus_labels([('method', method), ('endpoint', endpoint), ('status', status)])} {count}")
+  header("lead_http_request_duration_seconds", "histogram", "Request handling time.")
+  for (method, endpoint), histogram in durations:
+    lines.extend(_prometheus_histogram_lines("lead_http_request_duration_seconds", [("method", method), ("endpoint", endpoint)], histogram))
+
+  header("lead_db_time_seconds", "histogram", "Database time per request.")
+  for endpoint, histogram, _queries in db_stats:
+    lines.extend(_prometheus_histogram_lines("lead_db_time_seconds", [("endpoint", endpoint)], histogram, scale=0.001))
+  header("lead_db_queries_total", "counter", "SQL statements executed per endpoint.")
+  for endpoint, _histogram, queries in db_stats:
+    lines.append(f"lead_db_queries_total{_prometheus_labels([('endpoint', endpoint)])} {int(queries)}")
+  for key, help_text in (
+    ("db_connections_opened", "Database connections opened."),
+    ("db_connect_errors", "Failed database connection attempts."),
+    ("db_reconnects", "Request connections that had to reconnect.")
+  ):
+    header(f"lead_{key}_total", "counter", help_text)
+    lines.append(f"lead_{key}_total {counters.get(key, 0)}")
+
+  header("lead_external_call_duration_seconds", "histogram", "Outbound call latency (search, page fetch, LLM, qufair).")
+  for name, histogram, _errors in external_calls:
+    lines.extend(_prometheus_histogram_lines("lead_external_call_duration_seconds", [("call", name)], histogram))
+  header("lead_external_call_errors_total", "counter", "Outbound calls that failed.")
+  for name, _histogram, errors in external_calls:
+    lines.append(f"lead_external_call_errors_total{_prometheus_labels([('call', name)])} {errors}")
+
+  for metric, help_text in (
+    ("import_rows", "Rows processed by opportunity imports, by result."),
+    ("host_pool_sync_events", "Events processed by host pool syncs, by result.")
+  ):
+    header(f"lead_{metric}_total", "counter", help_text)
+    for (name, result), count in throughput:
+      if name == metric:
+        lines.append(f"lead_{metric}_total{_prometheus_labels([('result', result)])} {count}")
+
+  header("lead_response_compression_bytes_total", "counter", "Response bytes before and after compression.")
+  lines.append(f'lead_response_compression_bytes_total{{direction="in"}} {compression["bytes_in"]}')
+  lines.append(f'lead_response_compression_bytes_total{{direction="out"}} {compression["bytes_out"]}')
+  header("lead_compressed_responses_total", "counter", "Compressed responses by encoding.")
+  for encoding, count in sorted(compression["by_encoding"].items()):
+    lines.append(f"lead_compressed_responses_total{_prometheus_labels([('encoding', encoding)])} {count}")
+  return "\n".join(lines) + "\n"
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+  if METRICS_TOKEN:
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}"):
+      return jsonify({"error": "unauthorized"}), 401
+  return app.response_class(_render_prometheus_metrics(), mimetype="text/plain", headers={"Cache-Control": "no-store"})
+
+
+@app.route("/health")
+def health():
+  return jsonify({"status": "ok"})
+
+
+@app.route("/health/compression", methods=["GET"])
+@require_user
+def get_compression_stats():
+  guard = ensure_group_admin()
+  if guard:
+    return guard
+  return jsonify({"data": _compression_stats_snapshot()})
+
+
+@app.route("/health/queries", methods=["GET"])
+@require_user
+def get_query_stats():
+  guard = ensure_group_admin()
+  if guard:
+    return guard
+  return jsonify({"data": _endpoint_query_stats_snapshot(), "slow_query_ms": SLOW_QUERY_MS})
+
+
+@app.route("/me", methods=["GET"])
+@require_user
+def get_me():
+  return jsonify({"data": g.user})
+
+
+@app.route("/login", methods=["POST"])
+def login():
+  body = request.get_json(silent=True) or {}
+  username = body.get("username")
+  password = body.get("password")
+
+  if not username or not password:
+    return jsonify({"error": "missing_credentials"}), 400
+
+  db = get_db()
+  admin_username = os.getenv("ADMIN_USERNAME", "admin-pico")
+  admin_password = os.getenv("ADMIN_PASSWORD", "pico@2026")
+
+  if username == admin_username and password == admin_password:
+    with db.cursor() as cur:
+      cur.execute(
+        "SELECT id, name, role, company_id, status FROM users WHERE name = %s AND role = 'group_admin' LIMIT 1",
+        (username,)
+      )
+      user = cur.fetchone()
+
+      if not user:
+        cur.execute(
+          "INSERT INTO users (name, role, status) VALUES (%s, 'group_admin', 'active')",
+          (username,)
+        )
+        user_id = cur.lastrowid
+        _bump_resource_versions(db, ("users",))
+        cur.execute(
+          "SELECT id, name, role, company_id, status FROM users WHERE id = %s",
+          (user_id,)
         )
         user = cur.fetchone()
 
@@ -4451,6 +6408,7 @@ def login():
 
 @app.route("/companies", methods=["GET"])
 @require_user
+@cached_read("companies")
 def list_companies():
   guard = ensure_org_access()
   if guard:
@@ -4502,6 +6460,7 @@ def list_companies():
 
 @app.route("/companies", methods=["POST"])
 @require_user
+@bumps_resource_version("companies")
 def create_company():
   guard = ensure_group_admin()
   if guard:
@@ -4545,6 +6504,7 @@ def create_company():
 
 @app.route("/companies/<int:company_id>", methods=["PATCH"])
 @require_user
+@bumps_resource_version("companies")
 def update_company(company_id):
   guard = ensure_group_admin()
   if guard:
@@ -4601,6 +6561,7 @@ def update_company(company_id):
 
 @app.route("/companies/<int:company_id>", methods=["DELETE"])
 @require_user
+@bumps_resource_version("companies")
 def delete_company(company_id):
   guard = ensure_group_admin()
   if guard:
@@ -4631,6 +6592,7 @@ def delete_company(company_id):
 
 @app.route("/org/roles", methods=["GET"])
 @require_user
+@cached_read("org_roles")
 def list_org_roles():
   guard = ensure_org_access()
   if guard:
@@ -4697,6 +6659,7 @@ def list_org_roles():
 
 @app.route("/org/roles", methods=["POST"])
 @require_user
+@bumps_resource_version("org_roles")
 def create_org_role():
   guard = ensure_org_access()
   if guard:
@@ -4762,6 +6725,7 @@ def create_org_role():
 
 @app.route("/org/roles/<int:role_id>", methods=["PATCH"])
 @require_user
+@bumps_resource_version("org_roles")
 def update_org_role(role_id):
   guard = ensure_org_access()
   if guard:
@@ -4847,6 +6811,7 @@ def update_org_role(role_id):
 
 @app.route("/org/roles/<int:role_id>", methods=["DELETE"])
 @require_user
+@bumps_resource_version("org_roles")
 def delete_org_role(role_id):
   guard = ensure_org_access()
   if guard:
@@ -4868,6 +6833,7 @@ def delete_org_role(role_id):
 
 @app.route("/org/positions", methods=["GET"])
 @require_user
+@cached_read("org_positions")
 def list_org_positions():
   guard = ensure_org_access()
   if guard:
@@ -4934,6 +6900,7 @@ def list_org_positions():
 
 @app.route("/org/positions", methods=["POST"])
 @require_user
+@bumps_resource_version("org_positions")
 def create_org_position():
   guard = ensure_org_access()
   if guard:
@@ -4999,6 +6966,7 @@ def create_org_position():
 
 @app.route("/org/positions/<int:position_id>", methods=["PATCH"])
 @require_user
+@bumps_resource_version("org_positions")
 def update_org_position(position_id):
   guard = ensure_org_access()
   if guard:
@@ -5084,6 +7052,7 @@ def update_org_position(position_id):
 
 @app.route("/org/positions/<int:position_id>", methods=["DELETE"])
 @require_user
+@bumps_resource_version("org_positions")
 def delete_org_position(position_id):
   guard = ensure_org_access()
   if guard:
@@ -5105,6 +7074,7 @@ def delete_org_position(position_id):
 
 @app.route("/users", methods=["GET"])
 @require_user
+@cached_read("users")
 def list_users():
   guard = ensure_org_access()
   if guard:
@@ -5162,6 +7132,7 @@ def list_users():
 
 @app.route("/users", methods=["POST"])
 @require_user
+@bumps_resource_version("users")
 def create_user():
   body = request.get_json(silent=True) or {}
   name = body.get("name")
@@ -5250,6 +7221,7 @@ def create_user():
 
 @app.route("/users/<int:user_id>", methods=["PATCH"])
 @require_user
+@bumps_resource_version("users")
 def update_user(user_id):
   body = request.get_json(silent=True) or {}
   allowed = {"name", "email", "role", "company_id", "status", "password"}
@@ -5419,39 +7391,93 @@ def update_my_password():
   return jsonify({"data": {"id": g.user["id"]}})
 
 
-@app.route("/opportunities", methods=["GET"])
-@require_user
-def list_opportunities():
-  user = g.user
+def _build_opportunity_filters(user, args):
+  """WHERE fragments for opportunity list filters, scoped to the user's company.
+
+  args is a MultiDict (request.args or a filter object wrapped in one).
+  """
   filters = []
   params = []
 
-  company_id = request.args.get("company_id", type=int)
+  company_id = args.get("company_id", type=int)
   if is_group_admin(user):
     if company_id:
       filters.append("company_id = %s")
       params.append(company_id)
   else:
     if not user.get("company_id"):
-      return jsonify({"error": "user_missing_company"}), 400
+      raise ValueError("user_missing_company")
     filters.append("company_id = %s")
     params.append(user["company_id"])
 
   for field in ["type", "status", "stage", "source", "city", "industry"]:
-    value = request.args.get(field)
+    value = args.get(field)
     if value:
       filters.append(f"{field} = %s")
       params.append(value)
 
-  owner_id = request.args.get("owner_id", type=int)
+  owner_id = args.get("owner_id", type=int)
   if owner_id:
     filters.append("owner_id = %s")
     params.append(owner_id)
 
-  name = request.args.get("name")
+  name = args.get("name")
   if name:
     filters.append("name LIKE %s")
     params.append(f"%{name}%")
+  return filters, params
+
+
+def _scan_opportunity_list_summary(cur, where_clause, params):
+  cur.execute(
+    f"SELECT COUNT(*) AS total, "
+    "SUM(CASE WHEN status = 'valid' THEN 1 ELSE 0 END) AS valid_count, "
+    "SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress_count, "
+    "SUM(CASE WHEN stage = 'ready_for_handoff' THEN 1 ELSE 0 END) AS ready_for_handoff_count, "
+    "SUM(CASE WHEN type = 'host' THEN 1 ELSE 0 END) AS host_count "
+    f"FROM opportunities {where_clause}",
+    params
+  )
+  summary_row = dict(cur.fetchone() or {})
+  for alias, table in (
+    ("follow_up_count", "activities"),
+    ("contact_count", "opportunity_contacts"),
+    ("persona_count", "opportunity_insights")
+  ):
+    cur.execute(
+      f"SELECT COUNT(*) AS {alias} FROM {table} "
+      f"WHERE opportunity_id IN (SELECT id FROM opportunities {where_clause})",
+      params
+    )
+    summary_row.update(cur.fetchone() or {})
+  return summary_row
+
+
+def _load_rollup_list_summary(cur, where_clause, params):
+  cur.execute(
+    "SELECT SUM(opportunity_count) AS total, "
+    "SUM(CASE WHEN status = 'valid' THEN opportunity_count ELSE 0 END) AS valid_count, "
+    "SUM(CASE WHEN status = 'in_progress' THEN opportunity_count ELSE 0 END) AS in_progress_count, "
+    "SUM(CASE WHEN stage = 'ready_for_handoff' THEN opportunity_count ELSE 0 END) AS ready_for_handoff_count, "
+    "SUM(CASE WHEN type = 'host' THEN opportunity_count ELSE 0 END) AS host_count, "
+    "SUM(activity_count) AS follow_up_count, "
+    "SUM(contact_count) AS contact_count, "
+    "SUM(persona_count) AS persona_count "
+    f"FROM opportunity_daily_rollups {where_clause}",
+    params
+  )
+  return cur.fetchone() or {}
+
+
+@app.route("/opportunities", methods=["GET"])
+@require_user
+def list_opportunities():
+  user = g.user
+  try:
+    columns = _parse_list_fields(request.args.get("fields"), OPPORTUNITY_LIST_COLUMNS, OPPORTUNITY_LIST_DEFAULT_FIELDS)
+    filters, params = _build_opportunity_filters(user, request.args)
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
 
   where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
   page = max(request.args.get("page", default=1, type=int), 1)
@@ -5464,37 +7490,14 @@ def list_opportunities():
 
   db = get_db()
   with db.cursor() as cur:
-    cur.execute(
-      f"SELECT COUNT(*) AS total, "
-      "SUM(CASE WHEN status = 'valid' THEN 1 ELSE 0 END) AS valid_count, "
-      "SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) AS in_progress_count, "
-      "SUM(CASE WHEN stage = 'ready_for_handoff' THEN 1 ELSE 0 END) AS ready_for_handoff_count, "
-      "SUM(CASE WHEN type = 'host' THEN 1 ELSE 0 END) AS host_count "
-      f"FROM opportunities {where_clause}",
-      params
-    )
-    summary_row = cur.fetchone() or {}
-    cur.execute(
-      f"SELECT COUNT(*) AS follow_up_count FROM activities "
-      f"WHERE opportunity_id IN (SELECT id FROM opportunities {where_clause})",
-      params
-    )
-    follow_up_row = cur.fetchone() or {}
-    cur.execute(
-      f"SELECT COUNT(*) AS contact_count FROM opportunity_contacts "
-      f"WHERE opportunity_id IN (SELECT id FROM opportunities {where_clause})",
-      params
-    )
-    contact_row = cur.fetchone() or {}
-    cur.execute(
-      f"SELECT COUNT(*) AS persona_count FROM opportunity_insights "
-      f"WHERE opportunity_id IN (SELECT id FROM opportunities {where_clause})",
-      params
-    )
-    persona_row = cur.fetchone() or {}
+    if DASHBOARD_ROLLUP_TABLE_READY and not any(request.args.get(key) for key in DASHBOARD_ROLLUP_UNSUPPORTED_FILTERS):
+      # the remaining filters are all rollup dimensions, so the same WHERE applies
+      summary_row = _load_rollup_list_summary(cur, where_clause, params)
+    else:
+      summary_row = _scan_opportunity_list_summary(cur, where_clause, params)
     total = summary_row.get("total", 0)
     cur.execute(
-      f"SELECT * FROM opportunities {where_clause} ORDER BY updated_at DESC LIMIT %s OFFSET %s",
+      f"SELECT {', '.join(columns)} FROM opportunities {where_clause} ORDER BY updated_at DESC LIMIT %s OFFSET %s",
       params + [limit, offset]
     )
     rows = cur.fetchall()
@@ -5505,9 +7508,9 @@ def list_opportunities():
     "in_progress": _to_int(summary_row.get("in_progress_count", 0)),
     "ready_for_handoff": _to_int(summary_row.get("ready_for_handoff_count", 0)),
     "host": _to_int(summary_row.get("host_count", 0)),
-    "follow_ups": _to_int(follow_up_row.get("follow_up_count", 0)),
-    "contacts": _to_int(contact_row.get("contact_count", 0)),
-    "personas": _to_int(persona_row.get("persona_count", 0))
+    "follow_ups": _to_int(summary_row.get("follow_up_count", 0)),
+    "contacts": _to_int(summary_row.get("contact_count", 0)),
+    "personas": _to_int(summary_row.get("persona_count", 0))
   }
 
   return jsonify(
@@ -5521,62 +7524,344 @@ def list_opportunities():
   )
 
 
-@app.route("/opportunities", methods=["POST"])
-@require_user
-def create_opportunity():
-  user = g.user
-  body = request.get_json(silent=True) or {}
+def _parse_iso_date(raw_value, error_code):
+  if not raw_value:
+    return None
+  try:
+    return date.fromisoformat(raw_value.strip())
+  except ValueError:
+    raise ValueError(error_code)
+
+
+def _ratio(numerator, denominator):
+  return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def _summarize_dashboard_rollups(rows):
+  totals = dict.fromkeys(DASHBOARD_ROLLUP_MEASURES, 0)
+  valid = assigned = assigned_followed_24h = 0
+  stage_counts = {}
+  source_counts = {}
+  organizer_counts = {}
+  host_total = host_key_contacts = 0
+  for row in rows:
+    count = _to_int(row["opportunity_count"])
+    for measure in DASHBOARD_ROLLUP_MEASURES:
+      totals[measure] += _to_int(row[measure])
+    if row["status"] == "valid":
+      valid += count
+    if row["status"] != "new":
+      assigned += count
+      assigned_followed_24h += _to_int(row["followed_24h_count"])
+    type_stages = stage_counts.setdefault(row["type"], dict.fromkeys(OPPORTUNITY_STAGE_ORDER, 0))
+    type_stages[row["stage"]] = type_stages.get(row["stage"], 0) + count
+    source_counts[row["source"]] = source_counts.get(row["source"], 0) + count
+    if row["type"] == "host":
+      host_total += count
+      host_key_contacts += _to_int(row["key_contact_count"])
+      organizer_type = row["organizer_type"] or "unknown"
+      organizer_counts[organizer_type] = organizer_counts.get(organizer_type, 0) + count
+
+  stage_conversion = {}
+  for opportunity_type, counts in stage_counts.items():
+    type_total = sum(counts.values())
+    # an opportunity in a later stage has passed through every earlier one
+    reached = type_total
+    stages = []
+    for stage in OPPORTUNITY_STAGE_ORDER:
+      stages.append({"stage": stage, "count": counts.get(stage, 0), "reached": reached, "rate": _ratio(reached, type_total)})
+      reached -= counts.get(stage, 0)
+    stage_conversion[opportunity_type] = stages
+
+  total = totals["opportunity_count"]
+  return {
+    "total": total,
+    "valid": valid,
+    "valid_rate": _ratio(valid, total),
+    "assigned": assigned,
+    "followed_within_24h": assigned_followed_24h,
+    "follow_up_timeliness_rate": _ratio(assigned_followed_24h, assigned),
+    "followed": totals["followed_count"],
+    "activities": totals["activity_count"],
+    "contacts": totals["contact_count"],
+    "personas": totals["persona_count"],
+    "stage_conversion": stage_conversion,
+    "source_distribution": [
+      {"source": source, "count": count, "share": _ratio(count, total)}
+      for source, count in sorted(source_counts.items(), key=lambda item: -item[1])
+    ],
+    "host": {
+      "total": host_total,
+      "key_contact_coverage": _ratio(host_key_contacts, host_total),
+      "organizer_type_share": [
+        {"organizer_type": organizer_type, "count": count, "share": _ratio(count, host_total)}
+        for organizer_type, count in sorted(organizer_counts.items(), key=lambda item: -item[1])
+      ]
+    }
+  }
 
-  if not body.get("name") or not body.get("type") or not body.get("source"):
-    return jsonify({"error": "missing_required_fields"}), 400
-  if body["type"] not in OPPORTUNITY_TYPES:
-    return jsonify({"error": "invalid_type"}), 400
-  if body.get("status") and body["status"] not in OPPORTUNITY_STATUSES:
-    return jsonify({"error": "invalid_status"}), 400
-  if body.get("stage") and body["stage"] not in OPPORTUNITY_STAGES:
-    return jsonify({"error": "invalid_stage"}), 400
-  if body.get("organizer_type") and body["organizer_type"] not in ORGANIZER_TYPES:
-    return jsonify({"error": "invalid_organizer_type"}), 400
 
+@app.route("/dashboard", methods=["GET"])
+@require_user
+def get_dashboard():
+  """Dashboard KPIs for opportunities created in [date_from, date_to], read from the daily rollups."""
+  user = g.user
+  if not DASHBOARD_ROLLUP_TABLE_READY:
+    return jsonify({"error": "dashboard_unavailable"}), 503
+  filters = []
+  params = []
+  company_id = request.args.get("company_id", type=int)
   if is_group_admin(user):
-    company_id = int(body.get("company_id") or 0)
-    if not company_id:
-      return jsonify({"error": "company_id_required"}), 400
-    owner_id = int(body.get("owner_id") or user["id"])
+    if company_id:
+      filters.append("company_id = %s")
+      params.append(company_id)
   else:
-    company_id = user.get("company_id")
-    if not company_id:
+    if not user.get("company_id"):
       return jsonify({"error": "user_missing_company"}), 400
-    owner_id = user["id"]
+    filters.append("company_id = %s")
+    params.append(user["company_id"])
+  owner_id = request.args.get("owner_id", type=int)
+  if owner_id:
+    filters.append("owner_id = %s")
+    params.append(owner_id)
+  try:
+    date_from = _parse_iso_date(request.args.get("date_from"), "invalid_date_from")
+    date_to = _parse_iso_date(request.args.get("date_to"), "invalid_date_to")
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
+  if date_from:
+    filters.append("rollup_date >= %s")
+    params.append(date_from)
+  if date_to:
+    filters.append("rollup_date <= %s")
+    params.append(date_to)
+  where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
 
-  contacts = _normalize_contacts(body.get("contacts"))
-  if contacts:
-    primary = contacts[0]
-    body.setdefault("contact_name", primary.get("name"))
-    body.setdefault("contact_title", primary.get("title"))
-    body.setdefault("contact_phone", primary.get("phone"))
-    body.setdefault("contact_email", primary.get("email"))
-    body.setdefault("contact_wechat", primary.get("wechat"))
-  if body.get("contact_person") and not body.get("contact_name"):
-    body["contact_name"] = body.get("contact_person")
+  db = get_db()
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT type, source, status, stage, organizer_type, "
+      + ", ".join(f"SUM({measure}) AS {measure}" for measure in DASHBOARD_ROLLUP_MEASURES)
+      + f" FROM opportunity_daily_rollups {where_clause} "
+      "GROUP BY type, source, status, stage, organizer_type",
+      params
+    )
+    rows = cur.fetchall()
+    cur.execute(
+      "SELECT rollup_date, SUM(opportunity_count) AS created, "
+      "SUM(CASE WHEN status = 'valid' THEN opportunity_count ELSE 0 END) AS valid, "
+      "SUM(followed_24h_count) AS followed_within_24h "
+      f"FROM opportunity_daily_rollups {where_clause} "
+      "GROUP BY rollup_date ORDER BY rollup_date",
+      params
+    )
+    trend_rows = cur.fetchall()
 
-  sql = (
-    "INSERT INTO opportunities ("
-    "name, type, source, industry, city, status, stage, "
-    "owner_id, company_id, "
-    "organizer_name, organizer_type, exhibition_name, "
-    "exhibition_start_date, exhibition_end_date, venue_name, venue_address, "
-    "booth_count, exhibition_area_sqm, expected_visitors, exhibition_theme, budget_range, "
-    "risk_notes, "
-    "contact_name, contact_title, contact_phone, contact_email, contact_wechat, "
-    "company_name, company_phone, company_email, contact_department, contact_person, "
-    "contact_address, website, country, hall_no, booth_no, booth_type, booth_area_sqm, "
-    "invalid_reason"
-    ") VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
-  )
-  params = (
-    body["name"],
-    body["type"],
+  data = _summarize_dashboard_rollups(rows)
+  data["trend"] = [
+    {
+      "date": row["rollup_date"].isoformat(),
+      "created": _to_int(row["created"]),
+      "valid": _to_int(row["valid"]),
+      "followed_within_24h": _to_int(row["followed_within_24h"])
+    }
+    for row in trend_rows
+    if _to_int(row["created"])
+  ]
+  return jsonify({"data": data})
+
+
+def _open_export_cursor(sql, params):
+  """Run sql on a dedicated connection with an unbuffered cursor.
+
+  Returns (db, cursor); rows are fetched from the server as they are read.
+  The caller owns the connection and must close it.
+  """
+  db = _open_db_connection()
+  try:
+    cur = db.cursor(SSCursor)
+    cur.execute("SET SESSION net_write_timeout = %s", (EXPORT_NET_WRITE_TIMEOUT_SECONDS,))
+    cur.execute(sql, params)
+  except Exception:
+    db.close()
+    raise
+  return db, cur
+
+
+def _close_export_connection(db):
+  if db.open:
+    db.close()
+
+
+def _iter_export_rows(cur):
+  while True:
+    rows = cur.fetchmany(EXPORT_FETCH_BATCH)
+    if not rows:
+      return
+    yield rows
+
+
+def _export_csv_cell(value):
+  if value is None:
+    return ""
+  if isinstance(value, datetime):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+  if isinstance(value, date):
+    return value.isoformat()
+  if isinstance(value, str) and value.startswith(EXPORT_FORMULA_PREFIXES):
+    # user-entered text such as "=HYPERLINK(...)" must stay text in Excel
+    return f"'{value}"
+  return value
+
+
+def _export_xlsx_cell(sheet, value):
+  if isinstance(value, str):
+    value = ILLEGAL_CHARACTERS_RE.sub("", value)
+    if value.startswith("="):
+      # openpyxl would store it as a formula; force a string cell
+      cell = WriteOnlyCell(sheet, value=value)
+      cell.data_type = "s"
+      return cell
+  return value
+
+
+def _stream_export_csv(db, cur, columns):
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  try:
+    # BOM so Excel opens UTF-8 (Chinese) text correctly
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for rows in _iter_export_rows(cur):
+      for row in rows:
+        writer.writerow([_export_csv_cell(value) for value in row])
+      yield buffer.getvalue().encode("utf-8")
+      buffer.seek(0)
+      buffer.truncate(0)
+    if buffer.tell():
+      yield buffer.getvalue().encode("utf-8")
+  finally:
+    _close_export_connection(db)
+
+
+def _stream_export_xlsx(db, cur, columns):
+  # write-only workbooks spool rows to a temp file, so memory stays flat; the
+  # zip can only be sent once complete
+  workbook = Workbook(write_only=True)
+  sheet = workbook.create_sheet("opportunities")
+  try:
+    sheet.append(list(columns))
+    for rows in _iter_export_rows(cur):
+      for row in rows:
+        sheet.append([_export_xlsx_cell(sheet, value) for value in row])
+  finally:
+    _close_export_connection(db)
+  with tempfile.TemporaryFile() as handle:
+    workbook.save(handle)
+    handle.seek(0)
+    while True:
+      chunk = handle.read(EXPORT_CHUNK_BYTES)
+      if not chunk:
+        return
+      yield chunk
+
+
+@app.route("/opportunities/export", methods=["GET"])
+@require_user
+def export_opportunities():
+  export_format = (request.args.get("format") or "csv").strip().lower()
+  if export_format not in EXPORT_FORMATS:
+    return jsonify({"error": "invalid_format"}), 400
+  try:
+    columns = _parse_list_fields(request.args.get("fields"), OPPORTUNITY_LIST_COLUMNS, OPPORTUNITY_LIST_COLUMNS)
+    filters, params = _build_opportunity_filters(g.user, request.args)
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
+
+  where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
+  if export_format == "xlsx":
+    with get_db().cursor() as cur:
+      cur.execute(
+        f"SELECT COUNT(*) AS total FROM (SELECT id FROM opportunities {where_clause} LIMIT %s) capped",
+        (*params, EXPORT_XLSX_MAX_ROWS + 1)
+      )
+      if int((cur.fetchone() or {}).get("total") or 0) > EXPORT_XLSX_MAX_ROWS:
+        return jsonify({"error": "too_many_rows_for_xlsx", "max": EXPORT_XLSX_MAX_ROWS}), 400
+  # primary-key order lets MySQL start sending rows without sorting the whole set
+  db, cur = _open_export_cursor(
+    f"SELECT {', '.join(columns)} FROM opportunities {where_clause} ORDER BY id ASC",
+    tuple(params)
+  )
+  if export_format == "xlsx":
+    body = _stream_export_xlsx(db, cur, columns)
+  else:
+    body = _stream_export_csv(db, cur, columns)
+
+  response = app.response_class(body, mimetype=EXPORT_FORMATS[export_format])
+  # generators that never start skip their finally block
+  response.call_on_close(lambda: _close_export_connection(db))
+  filename = f"opportunities-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+  response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+  response.headers["X-Accel-Buffering"] = "no"
+  return response
+
+
+@app.route("/opportunities", methods=["POST"])
+@require_user
+def create_opportunity():
+  user = g.user
+  body = request.get_json(silent=True) or {}
+
+  if not body.get("name") or not body.get("type") or not body.get("source"):
+    return jsonify({"error": "missing_required_fields"}), 400
+  if body["type"] not in OPPORTUNITY_TYPES:
+    return jsonify({"error": "invalid_type"}), 400
+  if body.get("status") and body["status"] not in OPPORTUNITY_STATUSES:
+    return jsonify({"error": "invalid_status"}), 400
+  if body.get("stage") and body["stage"] not in OPPORTUNITY_STAGES:
+    return jsonify({"error": "invalid_stage"}), 400
+  if body.get("organizer_type") and body["organizer_type"] not in ORGANIZER_TYPES:
+    return jsonify({"error": "invalid_organizer_type"}), 400
+
+  if is_group_admin(user):
+    company_id = int(body.get("company_id") or 0)
+    if not company_id:
+      return jsonify({"error": "company_id_required"}), 400
+    owner_id = int(body.get("owner_id") or user["id"])
+  else:
+    company_id = user.get("company_id")
+    if not company_id:
+      return jsonify({"error": "user_missing_company"}), 400
+    owner_id = user["id"]
+
+  contacts = _normalize_contacts(body.get("contacts"))
+  if contacts:
+    primary = contacts[0]
+    body.setdefault("contact_name", primary.get("name"))
+    body.setdefault("contact_title", primary.get("title"))
+    body.setdefault("contact_phone", primary.get("phone"))
+    body.setdefault("contact_email", primary.get("email"))
+    body.setdefault("contact_wechat", primary.get("wechat"))
+  if body.get("contact_person") and not body.get("contact_name"):
+    body["contact_name"] = body.get("contact_person")
+
+  sql = (
+    "INSERT INTO opportunities ("
+    "name, type, source, industry, city, status, stage, "
+    "owner_id, company_id, "
+    "organizer_name, organizer_type, exhibition_name, "
+    "exhibition_start_date, exhibition_end_date, venue_name, venue_address, "
+    "booth_count, exhibition_area_sqm, expected_visitors, exhibition_theme, budget_range, "
+    "risk_notes, "
+    "contact_name, contact_title, contact_phone, contact_email, contact_wechat, "
+    "company_name, company_phone, company_email, contact_department, contact_person, "
+    "contact_address, website, country, hall_no, booth_no, booth_type, booth_area_sqm, "
+    "invalid_reason"
+    ") VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+  )
+  params = (
+    body["name"],
+    body["type"],
     body["source"],
     body.get("industry"),
     body.get("city"),
@@ -5621,129 +7906,703 @@ def create_opportunity():
   with db.cursor() as cur:
     cur.execute(sql, params)
     new_id = cur.lastrowid
+    _store_opportunity_dedup_keys(cur, new_id, body)
     if contacts:
       _insert_contacts(cur, new_id, contacts)
+    _refresh_follow_up_due(cur, [new_id])
+    _apply_opportunity_rollup_delta(cur, {}, _capture_opportunity_rollups(cur, [new_id]))
     cur.execute("SELECT * FROM opportunities WHERE id = %s", (new_id,))
     created = cur.fetchone()
 
   return jsonify({"data": created}), 201
 
 
-@app.route("/opportunities/<int:opportunity_id>", methods=["GET"])
-@require_user
-def get_opportunity(opportunity_id):
-  user = g.user
+@app.route("/opportunities/<int:opportunity_id>", methods=["GET"])
+@require_user
+def get_opportunity(opportunity_id):
+  user = g.user
+  db = get_db()
+  with db.cursor() as cur:
+    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
+    opportunity = cur.fetchone()
+
+  if not opportunity:
+    return jsonify({"error": "not_found"}), 404
+
+  if not is_group_admin(user) and opportunity.get("company_id") != user.get("company_id"):
+    return jsonify({"error": "not_found"}), 404
+
+  return jsonify({"data": opportunity})
+
+
+def _load_detail_contacts(cur, opportunity_ids, placeholders):
+  role_column = "role, " if CONTACT_ROLE_COLUMN_READY is True else ""
+  cur.execute(
+    f"SELECT id, opportunity_id, name, {role_column}title, phone, email, wechat, created_at "
+    f"FROM opportunity_contacts WHERE opportunity_id IN ({placeholders}) ORDER BY id ASC",
+    tuple(opportunity_ids)
+  )
+  return cur.fetchall()
+
+
+def _load_detail_activities(cur, opportunity_ids, limit):
+  # one statement; each branch is a LIMIT range read on idx_activity_timeline
+  branch = "(SELECT * FROM activities WHERE opportunity_id = %s ORDER BY created_at DESC, id DESC LIMIT %s)"
+  cur.execute(
+    " UNION ALL ".join([branch] * len(opportunity_ids)),
+    tuple(value for opportunity_id in opportunity_ids for value in (opportunity_id, limit + 1))
+  )
+  return cur.fetchall()
+
+
+def _load_detail_tags(cur, opportunity_ids, placeholders):
+  cur.execute(
+    "SELECT ot.opportunity_id, t.id, t.name, t.type FROM opportunity_tags ot "
+    f"JOIN tags t ON t.id = ot.tag_id WHERE ot.opportunity_id IN ({placeholders}) ORDER BY t.id ASC",
+    tuple(opportunity_ids)
+  )
+  return cur.fetchall()
+
+
+def _load_detail_insights(cur, opportunity_ids, placeholders):
+  cur.execute(
+    f"SELECT * FROM opportunity_insights WHERE opportunity_id IN ({placeholders})",
+    tuple(opportunity_ids)
+  )
+  return cur.fetchall()
+
+
+@app.route("/opportunities/details", methods=["GET"])
+@require_user
+def get_opportunity_details():
+  """Several opportunities with selected child collections in one request.
+
+  ?ids=1,2,3&include=contacts,activities,tags,insight. The company scope is
+  checked once for the whole batch and each included collection is one query.
+  """
+  user = g.user
+  try:
+    opportunity_ids = list(dict.fromkeys(
+      int(part) for part in (request.args.get("ids") or "").split(",") if part.strip()
+    ))
+  except ValueError:
+    return jsonify({"error": "invalid_ids"}), 400
+  if not opportunity_ids or any(opportunity_id <= 0 for opportunity_id in opportunity_ids):
+    return jsonify({"error": "invalid_ids"}), 400
+  if len(opportunity_ids) > OPPORTUNITY_DETAIL_MAX_IDS:
+    return jsonify({"error": "too_many_ids", "max": OPPORTUNITY_DETAIL_MAX_IDS}), 400
+  includes = [part.strip() for part in (request.args.get("include") or "").split(",") if part.strip()]
+  if any(part not in OPPORTUNITY_DETAIL_INCLUDES for part in includes):
+    return jsonify({"error": "invalid_include"}), 400
+  activity_limit = min(max(request.args.get("activity_limit", default=20, type=int), 1), 200)
+
+  db = get_db()
+  with db.cursor() as cur:
+    placeholders = ", ".join(["%s"] * len(opportunity_ids))
+    sql = f"SELECT * FROM opportunities WHERE id IN ({placeholders})"
+    params = list(opportunity_ids)
+    if not is_group_admin(user):
+      sql += " AND company_id = %s"
+      params.append(user.get("company_id"))
+    cur.execute(sql, params)
+    opportunities = {row["id"]: row for row in cur.fetchall()}
+
+    found_ids = [opportunity_id for opportunity_id in opportunity_ids if opportunity_id in opportunities]
+    details = {
+      opportunity_id: {"opportunity": opportunities[opportunity_id]}
+      for opportunity_id in found_ids
+    }
+    for detail in details.values():
+      for include in includes:
+        detail[include] = None if include == "insight" else []
+    if found_ids:
+      found_placeholders = ", ".join(["%s"] * len(found_ids))
+      if "contacts" in includes:
+        for row in _load_detail_contacts(cur, found_ids, found_placeholders):
+          details[row.pop("opportunity_id")]["contacts"].append(row)
+      if "activities" in includes:
+        for row in _load_detail_activities(cur, found_ids, activity_limit):
+          details[row["opportunity_id"]]["activities"].append(row)
+      if "tags" in includes:
+        for row in _load_detail_tags(cur, found_ids, found_placeholders):
+          details[row.pop("opportunity_id")]["tags"].append(row)
+      if "insight" in includes:
+        for row in _load_detail_insights(cur, found_ids, found_placeholders):
+          details[row["opportunity_id"]]["insight"] = _serialize_insight(row)
+
+  if "activities" in includes:
+    for detail in details.values():
+      activities = detail["activities"]
+      detail["activities_next_cursor"] = None
+      if len(activities) > activity_limit:
+        del activities[activity_limit:]
+        detail["activities_next_cursor"] = _encode_keyset_cursor(activities[-1]["created_at"], activities[-1]["id"])
+
+  return jsonify(
+    {
+      "data": [details[opportunity_id] for opportunity_id in found_ids],
+      "not_found": [opportunity_id for opportunity_id in opportunity_ids if opportunity_id not in opportunities]
+    }
+  )
+
+
+@app.route("/opportunities/<int:opportunity_id>", methods=["PATCH"])
+@require_user
+def update_opportunity(opportunity_id):
+  user = g.user
+  db = get_db()
+
+  with db.cursor() as cur:
+    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
+    opportunity = cur.fetchone()
+
+  if not opportunity:
+    return jsonify({"error": "not_found"}), 404
+
+  if not is_group_admin(user) and opportunity.get("company_id") != user.get("company_id"):
+    return jsonify({"error": "not_found"}), 404
+
+  body = request.get_json(silent=True) or {}
+  contacts_in_body = "contacts" in body
+  contacts = _normalize_contacts(body.get("contacts"))
+  allowed = {
+    "name",
+    "type",
+    "source",
+    "industry",
+    "city",
+    "status",
+    "stage",
+    "organizer_name",
+    "organizer_type",
+    "exhibition_name",
+    "exhibition_start_date",
+    "exhibition_end_date",
+    "venue_name",
+    "venue_address",
+    "booth_count",
+    "exhibition_area_sqm",
+    "expected_visitors",
+    "exhibition_theme",
+    "budget_range",
+    "risk_notes",
+    "contact_name",
+    "contact_title",
+    "contact_phone",
+    "contact_email",
+    "contact_wechat",
+    "company_name",
+    "company_phone",
+    "company_email",
+    "contact_department",
+    "contact_person",
+    "contact_address",
+    "website",
+    "country",
+    "hall_no",
+    "booth_no",
+    "booth_type",
+    "booth_area_sqm",
+    "invalid_reason",
+    "owner_id"
+  }
+
+  updates = []
+  params = []
+
+  for key in allowed:
+    if key not in body:
+      continue
+    if key == "type" and body[key] not in OPPORTUNITY_TYPES:
+      return jsonify({"error": "invalid_type"}), 400
+    if key == "status" and body[key] not in OPPORTUNITY_STATUSES:
+      return jsonify({"error": "invalid_status"}), 400
+    if key == "stage" and body[key] not in OPPORTUNITY_STAGES:
+      return jsonify({"error": "invalid_stage"}), 400
+    if key == "organizer_type" and body[key] and body[key] not in ORGANIZER_TYPES:
+      return jsonify({"error": "invalid_organizer_type"}), 400
+    if key == "owner_id" and not is_group_admin(user):
+      continue
+
+    updates.append(f"{key} = %s")
+    params.append(body[key])
+
+  if not updates:
+    if not contacts_in_body:
+      return jsonify({"error": "no_updates"}), 400
+
+  params.append(opportunity_id)
+
+  with db.cursor() as cur, _track_opportunity_rollups(cur, [opportunity_id]):
+    if updates:
+      cur.execute(f"UPDATE opportunities SET {', '.join(updates)} WHERE id = %s", params)
+      if any(key in body for key in OPPORTUNITY_DEDUP_SOURCE_FIELDS):
+        _store_opportunity_dedup_keys(cur, opportunity_id, {**opportunity, **body})
+      if "status" in body or "stage" in body:
+        _refresh_follow_up_due(cur, [opportunity_id])
+    if contacts_in_body:
+      cur.execute("DELETE FROM opportunity_contacts WHERE opportunity_id = %s", (opportunity_id,))
+      _insert_contacts(cur, opportunity_id, contacts)
+    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
+    updated = cur.fetchone()
+
+  return jsonify({"data": updated})
+
+
+def _parse_positive_id_list(raw_ids, error_code):
+  if raw_ids is None:
+    return []
+  if not isinstance(raw_ids, list):
+    raise ValueError(error_code)
+  ids = []
+  for raw_id in raw_ids:
+    if isinstance(raw_id, bool):
+      raise ValueError(error_code)
+    try:
+      value = int(raw_id)
+    except (TypeError, ValueError):
+      raise ValueError(error_code)
+    if value <= 0:
+      raise ValueError(error_code)
+    ids.append(value)
+  return list(dict.fromkeys(ids))
+
+
+def _chunked(values, size):
+  for start in range(0, len(values), size):
+    yield values[start:start + size]
+
+
+@app.route("/opportunities/bulk", methods=["POST"])
+@require_user
+def bulk_update_opportunities():
+  """Apply field updates and tag changes to many opportunities in one transaction.
+
+  Targets are either "ids" or a "filter" object using the list filters; the
+  company scope is enforced in SQL. Returns one result per requested id.
+  """
+  user = g.user
+  body = request.get_json(silent=True) or {}
+  raw_updates = body.get("updates") or {}
+  if not isinstance(raw_updates, dict):
+    return jsonify({"error": "invalid_updates"}), 400
+  try:
+    requested_ids = _parse_positive_id_list(body.get("ids"), "invalid_ids")
+    add_tag_ids = _parse_positive_id_list(body.get("add_tag_ids"), "invalid_tag_ids")
+    remove_tag_ids = _parse_positive_id_list(body.get("remove_tag_ids"), "invalid_tag_ids")
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
+
+  unknown_fields = sorted(set(raw_updates) - BULK_OPPORTUNITY_FIELDS)
+  if unknown_fields:
+    return jsonify({"error": "invalid_update_fields", "fields": unknown_fields}), 400
+  if "type" in raw_updates and raw_updates["type"] not in OPPORTUNITY_TYPES:
+    return jsonify({"error": "invalid_type"}), 400
+  if "status" in raw_updates and raw_updates["status"] not in OPPORTUNITY_STATUSES:
+    return jsonify({"error": "invalid_status"}), 400
+  if "stage" in raw_updates and raw_updates["stage"] not in OPPORTUNITY_STAGES:
+    return jsonify({"error": "invalid_stage"}), 400
+  if "owner_id" in raw_updates and not is_group_admin(user):
+    return jsonify({"error": "forbidden"}), 403
+  if not raw_updates and not add_tag_ids and not remove_tag_ids:
+    return jsonify({"error": "no_updates"}), 400
+  if set(add_tag_ids) & set(remove_tag_ids):
+    return jsonify({"error": "conflicting_tag_ids"}), 400
+
+  filter_body = body.get("filter")
+  if requested_ids and filter_body is not None:
+    return jsonify({"error": "ids_or_filter"}), 400
+  if not requested_ids and not isinstance(filter_body, dict):
+    return jsonify({"error": "ids_or_filter"}), 400
+  if len(requested_ids) > BULK_OPPORTUNITY_MAX_ROWS:
+    return jsonify({"error": "too_many_opportunities", "max": BULK_OPPORTUNITY_MAX_ROWS}), 400
+
+  scope_sql = ""
+  scope_params = []
+  if not is_group_admin(user):
+    if not user.get("company_id"):
+      return jsonify({"error": "user_missing_company"}), 400
+    scope_sql = " AND company_id = %s"
+    scope_params = [user["company_id"]]
+
+  db = get_db()
+  with db.cursor() as cur:
+    if "owner_id" in raw_updates:
+      cur.execute("SELECT id FROM users WHERE id = %s AND status = 'active'", (raw_updates["owner_id"],))
+      if not cur.fetchone():
+        return jsonify({"error": "invalid_owner"}), 400
+    tag_ids = sorted(set(add_tag_ids) | set(remove_tag_ids))
+    if tag_ids:
+      cur.execute(
+        f"SELECT id FROM tags WHERE id IN ({', '.join(['%s'] * len(tag_ids))})",
+        tuple(tag_ids)
+      )
+      if len(cur.fetchall()) != len(tag_ids):
+        return jsonify({"error": "invalid_tag_ids"}), 400
+
+  where_clause = ""
+  params = []
+  if not requested_ids:
+    try:
+      filters, params = _build_opportunity_filters(user, MultiDict(filter_body))
+    except ValueError as err:
+      return jsonify({"error": str(err)}), 400
+    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+  update_columns = sorted(raw_updates)
+  set_clause = ", ".join(f"{column} = %s" for column in update_columns)
+  update_values = [raw_updates[column] for column in update_columns]
+  matched_ids = []
+
+  with _db_transaction(db):
+    with db.cursor() as cur:
+      if requested_ids:
+        for chunk in _chunked(requested_ids, BULK_OPPORTUNITY_CHUNK):
+          cur.execute(
+            f"SELECT id FROM opportunities WHERE id IN ({', '.join(['%s'] * len(chunk))}){scope_sql} FOR UPDATE",
+            (*chunk, *scope_params)
+          )
+          matched_ids.extend(row["id"] for row in cur.fetchall())
+      else:
+        cur.execute(
+          f"SELECT id FROM opportunities {where_clause} ORDER BY id ASC LIMIT %s FOR UPDATE",
+          (*params, BULK_OPPORTUNITY_MAX_ROWS + 1)
+        )
+        matched_ids = [row["id"] for row in cur.fetchall()]
+        if len(matched_ids) > BULK_OPPORTUNITY_MAX_ROWS:
+          # nothing written yet; leaving the block just releases the row locks
+          return jsonify({"error": "too_many_opportunities", "max": BULK_OPPORTUNITY_MAX_ROWS}), 400
+
+      for chunk in _chunked(matched_ids, BULK_OPPORTUNITY_CHUNK):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        if update_columns:
+          with _track_opportunity_rollups(cur, chunk):
+            cur.execute(
+              f"UPDATE opportunities SET {set_clause} WHERE id IN ({placeholders})",
+              (*update_values, *chunk)
+            )
+          if "status" in raw_updates or "stage" in raw_updates:
+            _refresh_follow_up_due(cur, chunk)
+        if remove_tag_ids:
+          cur.execute(
+            f"DELETE FROM opportunity_tags WHERE opportunity_id IN ({placeholders}) "
+            f"AND tag_id IN ({', '.join(['%s'] * len(remove_tag_ids))})",
+            (*chunk, *remove_tag_ids)
+          )
+        if add_tag_ids:
+          cur.executemany(
+            "INSERT IGNORE INTO opportunity_tags (opportunity_id, tag_id) VALUES (%s, %s)",
+            [(opportunity_id, tag_id) for opportunity_id in chunk for tag_id in add_tag_ids]
+          )
+
+  matched_set = set(matched_ids)
+  if requested_ids:
+    results = [
+      {"id": opportunity_id, "status": "updated" if opportunity_id in matched_set else "not_found"}
+      for opportunity_id in requested_ids
+    ]
+  else:
+    results = [{"id": opportunity_id, "status": "updated"} for opportunity_id in matched_ids]
+  return jsonify(
+    {
+      "data": results,
+      "summary": {
+        "updated": len(matched_ids),
+        "not_found": len(results) - len(matched_ids)
+      }
+    }
+  )
+
+
+def _name_grams(name_key):
+  if len(name_key) < 3:
+    return {name_key}
+  return {name_key[idx:idx + 2] for idx in range(len(name_key) - 1)}
+
+
+def _find_duplicate_clusters(rows, threshold=OPPORTUNITY_DEDUP_SIMILARITY):
+  """Group rows into duplicate clusters.
+
+  Phone/email keys and exact (name key, city) are strong keys and are unioned
+  directly. Fuzzy names are blocked on character bigrams: an inverted index maps
+  each bigram to the rows containing it, bigrams shared by more than
+  OPPORTUNITY_DEDUP_MAX_BLOCK rows are dropped, and only pairs sharing enough
+  bigrams get a Dice score. Cost is linear in rows times the block cap.
+  Rows are only matched inside the same company.
+  """
+  parent = list(range(len(rows)))
+  reasons = {}
+
+  def find(idx):
+    while parent[idx] != idx:
+      parent[idx] = parent[parent[idx]]
+      idx = parent[idx]
+    return idx
+
+  def union(left, right, reason):
+    left_root, right_root = find(left), find(right)
+    if left_root != right_root:
+      parent[right_root] = left_root
+    reasons.setdefault(left, set()).add(reason)
+    reasons.setdefault(right, set()).add(reason)
+
+  exact_blocks = {}
+  for idx, row in enumerate(rows):
+    company_id = row.get("company_id")
+    for reason, key in (
+      ("phone", row["phone_key"] and ("phone", company_id, row["phone_key"])),
+      ("email", row["email_key"] and ("email", company_id, row["email_key"])),
+      ("name_city", row["name_key"] and ("name", company_id, row["name_key"], row.get("city") or ""))
+    ):
+      if not key:
+        continue
+      first = exact_blocks.setdefault(key, idx)
+      if first != idx:
+        union(first, idx, reason)
+
+  gram_sets = [_name_grams(row["name_key"]) if row["name_key"] else None for row in rows]
+  company_rows = {}
+  for idx, row in enumerate(rows):
+    if gram_sets[idx]:
+      company_rows.setdefault(row.get("company_id"), []).append(idx)
+
+  size_ratio = threshold / (2 - threshold)
+  for members in company_rows.values():
+    gram_index = {}
+    for idx in members:
+      grams = gram_sets[idx]
+      city = rows[idx].get("city")
+      shared = {}
+      for gram in grams:
+        posting = gram_index.get(gram)
+        if posting is None:
+          # most bigrams are seen once; a bare int keeps the index from allocating a list each
+          gram_index[gram] = idx
+          continue
+        if isinstance(posting, int):
+          shared[posting] = shared.get(posting, 0) + 1
+          gram_index[gram] = [posting, idx]
+          continue
+        if len(posting) <= OPPORTUNITY_DEDUP_MAX_BLOCK:
+          for other in posting:
+            shared[other] = shared.get(other, 0) + 1
+        posting.append(idx)
+      min_shared = 1 if len(grams) <= 2 else 2
+      for other, count in shared.items():
+        if count < min_shared:
+          continue
+        other_grams = gram_sets[other]
+        small, large = sorted((len(grams), len(other_grams)))
+        if small < large * size_ratio:
+          continue
+        other_city = rows[other].get("city")
+        if city and other_city and city != other_city:
+          continue
+        if find(idx) == find(other):
+          continue
+        dice = 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+        if dice >= threshold:
+          union(other, idx, "similar_name")
+
+  clusters = {}
+  for idx in range(len(rows)):
+    clusters.setdefault(find(idx), []).append(idx)
+  result = []
+  for members in clusters.values():
+    if len(members) < 2:
+      continue
+    cluster_reasons = set()
+    for idx in members:
+      cluster_reasons.update(reasons.get(idx, ()))
+    result.append({"members": members, "reasons": sorted(cluster_reasons)})
+  result.sort(key=lambda cluster: (-len(cluster["members"]), cluster["members"][0]))
+  return result
+
+
+@app.route("/opportunities/duplicates", methods=["GET"])
+@require_user
+def list_duplicate_opportunities():
+  user = g.user
+  filters = []
+  params = []
+  company_id = request.args.get("company_id", type=int)
+  if is_group_admin(user):
+    # the scan loads every opportunity in scope; one company at a time
+    if not company_id:
+      return jsonify({"error": "company_id_required"}), 400
+    filters.append("company_id = %s")
+    params.append(company_id)
+  else:
+    if not user.get("company_id"):
+      return jsonify({"error": "user_missing_company"}), 400
+    filters.append("company_id = %s")
+    params.append(user["company_id"])
+
+  threshold = request.args.get("threshold", default=OPPORTUNITY_DEDUP_SIMILARITY, type=float)
+  if not 0 < threshold <= 1:
+    return jsonify({"error": "invalid_threshold"}), 400
+  limit = min(max(request.args.get("limit", default=100, type=int), 1), 500)
+
+  columns = [
+    "id", "name", "city", "company_id", "owner_id", "contact_phone", "contact_email",
+    "company_phone", "company_email", "updated_at"
+  ]
+  if OPPORTUNITY_DEDUP_COLUMNS_READY:
+    columns.extend(["name_key", "phone_key", "email_key"])
+  where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
+  db = get_db()
+  with db.cursor() as cur:
+    cur.execute(f"SELECT {', '.join(columns)} FROM opportunities {where_clause} ORDER BY id", params)
+    rows = cur.fetchall()
+
+  for row in rows:
+    # rows written before the key columns existed are keyed on the fly
+    if row.get("name_key") is None or "phone_key" not in row:
+      row.update(_opportunity_dedup_keys(row))
+
+  clusters = _find_duplicate_clusters(rows, threshold)
+  member_fields = ("id", "name", "city", "company_id", "owner_id", "contact_phone", "contact_email", "updated_at")
+  data = [
+    {
+      "size": len(cluster["members"]),
+      "reasons": cluster["reasons"],
+      "members": [{field: rows[idx].get(field) for field in member_fields} for idx in cluster["members"]]
+    }
+    for cluster in clusters[:limit]
+  ]
+  return jsonify(
+    {
+      "data": data,
+      "summary": {
+        "scanned": len(rows),
+        "clusters": len(clusters),
+        "duplicates": sum(len(cluster["members"]) for cluster in clusters)
+      }
+    }
+  )
+
+
+def _encode_keyset_cursor(timestamp_value, row_id):
+  return f"{timestamp_value.strftime('%Y-%m-%dT%H:%M:%S')}_{row_id}"
+
+
+def _decode_keyset_cursor(raw_cursor):
+  if not raw_cursor:
+    return None
+  try:
+    raw_timestamp, raw_id = raw_cursor.rsplit("_", 1)
+    return datetime.strptime(raw_timestamp, "%Y-%m-%dT%H:%M:%S"), int(raw_id)
+  except ValueError:
+    raise ValueError("invalid_cursor")
+
+
+@app.route("/opportunities/overdue", methods=["GET"])
+@require_user
+def list_overdue_opportunities():
+  """Opportunities whose next follow-up is past due, most overdue first.
+
+  Keyset-paginated on (next_follow_up_due_at, id): pass next_cursor back as ?cursor=.
+  """
+  user = g.user
+  if not FOLLOW_UP_TABLES_READY:
+    return jsonify({"error": "follow_up_unavailable"}), 503
+  filters = ["next_follow_up_due_at <= CURRENT_TIMESTAMP"]
+  params = []
+  company_id = request.args.get("company_id", type=int)
+  if is_group_admin(user):
+    if company_id:
+      filters.append("company_id = %s")
+      params.append(company_id)
+  else:
+    if not user.get("company_id"):
+      return jsonify({"error": "user_missing_company"}), 400
+    filters.append("company_id = %s")
+    params.append(user["company_id"])
+  owner_id = request.args.get("owner_id", type=int)
+  if owner_id:
+    filters.append("owner_id = %s")
+    params.append(owner_id)
+  try:
+    cursor = _decode_keyset_cursor(request.args.get("cursor"))
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
+  if cursor:
+    filters.append("(next_follow_up_due_at > %s OR (next_follow_up_due_at = %s AND id > %s))")
+    params.extend([cursor[0], cursor[0], cursor[1]])
+  limit = min(max(request.args.get("limit", default=50, type=int), 1), 200)
+
   db = get_db()
   with db.cursor() as cur:
-    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
-    opportunity = cur.fetchone()
+    cur.execute(
+      "SELECT id, name, type, status, stage, owner_id, company_id, city, contact_name, contact_phone, "
+      "last_follow_up_at, next_follow_up_due_at, "
+      "TIMESTAMPDIFF(MINUTE, next_follow_up_due_at, CURRENT_TIMESTAMP) AS overdue_minutes "
+      f"FROM opportunities WHERE {' AND '.join(filters)} "
+      "ORDER BY next_follow_up_due_at, id LIMIT %s",
+      (*params, limit + 1)
+    )
+    rows = cur.fetchall()
 
-  if not opportunity:
-    return jsonify({"error": "not_found"}), 404
+  next_cursor = None
+  if len(rows) > limit:
+    rows = rows[:limit]
+    next_cursor = _encode_keyset_cursor(rows[-1]["next_follow_up_due_at"], rows[-1]["id"])
+  return jsonify({"data": rows, "next_cursor": next_cursor})
 
-  if not is_group_admin(user) and opportunity.get("company_id") != user.get("company_id"):
-    return jsonify({"error": "not_found"}), 404
 
-  return jsonify({"data": opportunity})
+def _serialize_follow_up_reminder(row):
+  return {
+    "id": row["id"],
+    "owner_id": row["owner_id"],
+    "company_id": row["company_id"],
+    "opportunity_count": row["opportunity_count"],
+    "opportunity_ids": _safe_json_load(row.get("opportunity_ids_json")) or [],
+    "earliest_due_at": row["earliest_due_at"],
+    "acknowledged_at": row["acknowledged_at"],
+    "created_at": row["created_at"]
+  }
 
 
-@app.route("/opportunities/<int:opportunity_id>", methods=["PATCH"])
+@app.route("/follow-up-reminders", methods=["GET"])
 @require_user
-def update_opportunity(opportunity_id):
+def list_follow_up_reminders():
+  """Reminder batches produced by the overdue scanner for the current user."""
   user = g.user
+  if not FOLLOW_UP_TABLES_READY:
+    return jsonify({"error": "follow_up_unavailable"}), 503
+  filters = ["owner_id = %s"]
+  params = [user["id"]]
+  if request.args.get("unacknowledged") in ("1", "true"):
+    filters.append("acknowledged_at IS NULL")
+  limit = min(max(request.args.get("limit", default=20, type=int), 1), 100)
   db = get_db()
-
   with db.cursor() as cur:
-    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
-    opportunity = cur.fetchone()
-
-  if not opportunity:
-    return jsonify({"error": "not_found"}), 404
-
-  if not is_group_admin(user) and opportunity.get("company_id") != user.get("company_id"):
-    return jsonify({"error": "not_found"}), 404
-
-  body = request.get_json(silent=True) or {}
-  contacts_in_body = "contacts" in body
-  contacts = _normalize_contacts(body.get("contacts"))
-  allowed = {
-    "name",
-    "type",
-    "source",
-    "industry",
-    "city",
-    "status",
-    "stage",
-    "organizer_name",
-    "organizer_type",
-    "exhibition_name",
-    "exhibition_start_date",
-    "exhibition_end_date",
-    "venue_name",
-    "venue_address",
-    "booth_count",
-    "exhibition_area_sqm",
-    "expected_visitors",
-    "exhibition_theme",
-    "budget_range",
-    "risk_notes",
-    "contact_name",
-    "contact_title",
-    "contact_phone",
-    "contact_email",
-    "contact_wechat",
-    "company_name",
-    "company_phone",
-    "company_email",
-    "contact_department",
-    "contact_person",
-    "contact_address",
-    "website",
-    "country",
-    "hall_no",
-    "booth_no",
-    "booth_type",
-    "booth_area_sqm",
-    "invalid_reason",
-    "owner_id"
-  }
-
-  updates = []
-  params = []
-
-  for key in allowed:
-    if key not in body:
-      continue
-    if key == "type" and body[key] not in OPPORTUNITY_TYPES:
-      return jsonify({"error": "invalid_type"}), 400
-    if key == "status" and body[key] not in OPPORTUNITY_STATUSES:
-      return jsonify({"error": "invalid_status"}), 400
-    if key == "stage" and body[key] not in OPPORTUNITY_STAGES:
-      return jsonify({"error": "invalid_stage"}), 400
-    if key == "organizer_type" and body[key] and body[key] not in ORGANIZER_TYPES:
-      return jsonify({"error": "invalid_organizer_type"}), 400
-    if key == "owner_id" and not is_group_admin(user):
-      continue
-
-    updates.append(f"{key} = %s")
-    params.append(body[key])
-
-  if not updates:
-    if not contacts_in_body:
-      return jsonify({"error": "no_updates"}), 400
+    cur.execute(
+      f"SELECT * FROM follow_up_reminders WHERE {' AND '.join(filters)} ORDER BY id DESC LIMIT %s",
+      (*params, limit)
+    )
+    rows = cur.fetchall()
+  return jsonify({"data": [_serialize_follow_up_reminder(row) for row in rows]})
 
-  params.append(opportunity_id)
 
+@app.route("/follow-up-reminders/<int:reminder_id>/ack", methods=["POST"])
+@require_user
+def acknowledge_follow_up_reminder(reminder_id):
+  user = g.user
+  if not FOLLOW_UP_TABLES_READY:
+    return jsonify({"error": "follow_up_unavailable"}), 503
+  db = get_db()
   with db.cursor() as cur:
-    if updates:
-      cur.execute(f"UPDATE opportunities SET {', '.join(updates)} WHERE id = %s", params)
-    if contacts_in_body:
-      cur.execute("DELETE FROM opportunity_contacts WHERE opportunity_id = %s", (opportunity_id,))
-      _insert_contacts(cur, opportunity_id, contacts)
-    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
-    updated = cur.fetchone()
-
-  return jsonify({"data": updated})
+    cur.execute(
+      "UPDATE follow_up_reminders SET acknowledged_at = COALESCE(acknowledged_at, CURRENT_TIMESTAMP) "
+      "WHERE id = %s AND owner_id = %s",
+      (reminder_id, user["id"])
+    )
+    cur.execute("SELECT * FROM follow_up_reminders WHERE id = %s AND owner_id = %s", (reminder_id, user["id"]))
+    row = cur.fetchone()
+  if not row:
+    return jsonify({"error": "not_found"}), 404
+  return jsonify({"data": _serialize_follow_up_reminder(row)})
 
 
 @app.route("/opportunities/<int:opportunity_id>/analysis", methods=["GET"])
@@ -5879,7 +8738,7 @@ def analyze_opportunity(opportunity_id):
     else os.getenv("OPENAI_MODEL_ID", DEFAULT_ANALYSIS_MODEL)
   )
 
-  with db.cursor() as cur:
+  with db.cursor() as cur, _track_opportunity_rollups(cur, [opportunity_id]):
     cur.execute(
       "INSERT INTO opportunity_insights (opportunity_id, analysis_json, contacts_json, sources_json, provider, model) "
       "VALUES (%s, %s, %s, %s, %s, %s) "
@@ -5888,9 +8747,9 @@ def analyze_opportunity(opportunity_id):
       "updated_at = CURRENT_TIMESTAMP",
       (
         opportunity_id,
-        json.dumps(analysis_data, ensure_ascii=False),
-        json.dumps(contacts, ensure_ascii=False),
-        json.dumps(sources_payload, ensure_ascii=False),
+        _dump_json_column(analysis_data),
+        _dump_json_column(contacts),
+        _dump_json_column(sources_payload),
         provider,
         model
       )
@@ -5992,6 +8851,8 @@ def import_opportunities():
       return None
     return _stringify_cell(row[idx])
 
+  rollups_before = {}
+  touched_ids = set()
   with get_db().cursor() as cur:
     for row in sheet.iter_rows(min_row=header_row_index + 1, values_only=True):
       if not row or not any(row):
@@ -6070,6 +8931,8 @@ def import_opportunities():
       existing = cur.fetchone()
 
       if existing:
+        if existing["id"] not in touched_ids:
+          rollups_before.update(_capture_opportunity_rollups(cur, [existing["id"]]))
         updates = {}
         if is_group_admin(user) and target_company_id and existing.get("company_id") != target_company_id:
           updates["company_id"] = target_company_id
@@ -6117,6 +8980,8 @@ def import_opportunities():
             f"UPDATE opportunities SET {set_clause} WHERE id = %s",
             (*updates.values(), existing["id"])
           )
+          if any(key in updates for key in OPPORTUNITY_DEDUP_SOURCE_FIELDS):
+            _store_opportunity_dedup_keys(cur, existing["id"], {**existing, **updates})
           updated += 1
         opportunity_id = existing["id"]
       else:
@@ -6152,6 +9017,17 @@ def import_opportunities():
           )
         )
         opportunity_id = cur.lastrowid
+        _store_opportunity_dedup_keys(
+          cur,
+          opportunity_id,
+          {
+            "name": name,
+            "contact_phone": primary_phone,
+            "contact_email": primary_email,
+            "company_phone": company_phone,
+            "company_email": company_email
+          }
+        )
         inserted += 1
 
       contacts = []
@@ -6176,7 +9052,15 @@ def import_opportunities():
           }
         )
       contacts_added += _insert_contacts(cur, opportunity_id, contacts)
+      touched_ids.add(opportunity_id)
 
+    _refresh_follow_up_due(cur, touched_ids)
+    _apply_opportunity_rollup_delta(cur, rollups_before, _capture_opportunity_rollups(cur, touched_ids))
+
+  for result, count in (
+    ("inserted", inserted), ("updated", updated), ("skipped", skipped), ("contacts_added", contacts_added)
+  ):
+    _increment_metric(THROUGHPUT_COUNTERS, ("import_rows", result), count)
   return jsonify(
     {
       "data": {
@@ -6194,6 +9078,10 @@ def import_opportunities():
 def list_host_pool_events():
   filters = []
   params = []
+  try:
+    columns = _parse_list_fields(request.args.get("fields"), HOST_POOL_EVENT_COLUMNS, HOST_POOL_EVENT_DEFAULT_FIELDS)
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
 
   keyword = (request.args.get("keyword") or "").strip()
   if keyword:
@@ -6247,7 +9135,7 @@ def list_host_pool_events():
     )
     summary_row = cur.fetchone() or {}
     cur.execute(
-      f"SELECT * FROM host_opportunity_pool_events {where_clause} "
+      f"SELECT {', '.join(columns)} FROM host_opportunity_pool_events {where_clause} "
       "ORDER BY "
       "CASE WHEN exhibition_start_date IS NULL THEN 1 ELSE 0 END, "
       "exhibition_start_date ASC, id DESC "
@@ -6371,6 +9259,10 @@ def sync_host_pool_events():
         except Exception:
           skipped += 1
 
+  for result, count in (
+    ("inserted", inserted), ("updated", updated), ("skipped", skipped), ("detail_failed", detail_failed)
+  ):
+    _increment_metric(THROUGHPUT_COUNTERS, ("host_pool_sync_events", result), count)
   return jsonify(
     {
       "data": {
@@ -6502,6 +9394,9 @@ def convert_host_pool_event(event_id):
       )
     )
     new_opportunity_id = cur.lastrowid
+    _store_opportunity_dedup_keys(cur, new_opportunity_id, {"name": event.get("name")})
+    _refresh_follow_up_due(cur, [new_opportunity_id])
+    _apply_opportunity_rollup_delta(cur, {}, _capture_opportunity_rollups(cur, [new_opportunity_id]))
     cur.execute("SELECT * FROM opportunities WHERE id = %s", (new_opportunity_id,))
     created = cur.fetchone()
     cur.execute(
@@ -6514,13 +9409,57 @@ def convert_host_pool_event(event_id):
   return jsonify({"data": {"already_exists": False, "opportunity": created}})
 
 
+def _normalize_activity_payload(body):
+  """(activity, error) from an activity request body; a rich-text comment becomes the result."""
+  comment = body.get("comment")
+  channel = body.get("channel")
+  if comment and not channel:
+    channel = "other"
+  if channel not in ACTIVITY_CHANNELS:
+    return None, "invalid_channel"
+  result = body.get("result")
+  next_step = body.get("next_step")
+  if comment:
+    result = comment
+    next_step = None
+  return {"channel": channel, "result": result, "next_step": next_step, "follow_up_at": body.get("follow_up_at")}, None
+
+
+def _record_activities(cur, user_id, activities):
+  """Insert activities and touch their opportunities once each; returns the first new activity id."""
+  opportunity_ids = list(dict.fromkeys(activity["opportunity_id"] for activity in activities))
+  with _track_opportunity_rollups(cur, opportunity_ids):
+    cur.executemany(
+      "INSERT INTO activities (opportunity_id, user_id, channel, result, next_step, follow_up_at) VALUES (%s, %s, %s, %s, %s, %s)",
+      [
+        (
+          activity["opportunity_id"],
+          user_id,
+          activity["channel"],
+          activity["result"],
+          activity["next_step"],
+          activity["follow_up_at"]
+        )
+        for activity in activities
+      ]
+    )
+    first_activity_id = cur.lastrowid
+    for chunk in _chunked(opportunity_ids, BULK_OPPORTUNITY_CHUNK):
+      cur.execute(
+        f"UPDATE opportunities SET last_follow_up_at = CURRENT_TIMESTAMP WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+        tuple(chunk)
+      )
+    _refresh_follow_up_due(cur, opportunity_ids)
+  return first_activity_id
+
+
 @app.route("/opportunities/<int:opportunity_id>/activities", methods=["POST"])
 @require_user
 def add_activity(opportunity_id):
   user = g.user
   db = get_db()
   with db.cursor() as cur:
-    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
+    cur.execute("SELECT id, company_id FROM opportunities WHERE id = %s", (opportunity_id,))
     opportunity = cur.fetchone()
 
   if not opportunity:
@@ -6530,49 +9469,94 @@ def add_activity(opportunity_id):
     return jsonify({"error": "not_found"}), 404
 
   body = request.get_json(silent=True) or {}
-  comment = body.get("comment")
-  channel = body.get("channel")
-  if comment and not channel:
-    channel = "other"
-  if channel not in ACTIVITY_CHANNELS:
-    return jsonify({"error": "invalid_channel"}), 400
-
-  result = body.get("result")
-  next_step = body.get("next_step")
-  if comment:
-    result = comment
-    next_step = None
+  activity, error = _normalize_activity_payload(body)
+  if error:
+    return jsonify({"error": error}), 400
 
   with db.cursor() as cur:
-    cur.execute(
-      "INSERT INTO activities (opportunity_id, user_id, channel, result, next_step, follow_up_at) VALUES (%s, %s, %s, %s, %s, %s)",
-      (
-        opportunity_id,
-        user["id"],
-        channel,
-        result,
-        next_step,
-        body.get("follow_up_at")
-      )
-    )
-    activity_id = cur.lastrowid
-    cur.execute(
-      "UPDATE opportunities SET last_follow_up_at = CURRENT_TIMESTAMP WHERE id = %s",
-      (opportunity_id,)
-    )
+    activity_id = _record_activities(cur, user["id"], [{**activity, "opportunity_id": opportunity_id}])
     cur.execute("SELECT * FROM activities WHERE id = %s", (activity_id,))
     created = cur.fetchone()
 
   return jsonify({"data": created}), 201
 
 
+@app.route("/activities/batch", methods=["POST"])
+@require_user
+def add_activities_batch():
+  """Log many activities at once, e.g. after a trade show; all or nothing."""
+  user = g.user
+  body = request.get_json(silent=True) or {}
+  raw_activities = body.get("activities")
+  if not isinstance(raw_activities, list) or not raw_activities:
+    return jsonify({"error": "activities_required"}), 400
+  if len(raw_activities) > ACTIVITY_BATCH_MAX_ITEMS:
+    return jsonify({"error": "too_many_activities", "max": ACTIVITY_BATCH_MAX_ITEMS}), 400
+
+  activities = []
+  errors = []
+  for index, item in enumerate(raw_activities):
+    if not isinstance(item, dict):
+      errors.append({"index": index, "error": "invalid_activity"})
+      continue
+    opportunity_id = item.get("opportunity_id")
+    if isinstance(opportunity_id, bool) or not isinstance(opportunity_id, int) or opportunity_id <= 0:
+      errors.append({"index": index, "error": "invalid_opportunity_id"})
+      continue
+    activity, error = _normalize_activity_payload(item)
+    if error:
+      errors.append({"index": index, "error": error})
+      continue
+    activities.append({**activity, "opportunity_id": opportunity_id, "index": index})
+
+  db = get_db()
+  opportunity_ids = list(dict.fromkeys(activity["opportunity_id"] for activity in activities))
+  visible_ids = set()
+  with db.cursor() as cur:
+    for chunk in _chunked(opportunity_ids, BULK_OPPORTUNITY_CHUNK):
+      sql = f"SELECT id FROM opportunities WHERE id IN ({', '.join(['%s'] * len(chunk))})"
+      params = list(chunk)
+      if not is_group_admin(user):
+        sql += " AND company_id = %s"
+        params.append(user.get("company_id"))
+      cur.execute(sql, params)
+      visible_ids.update(row["id"] for row in cur.fetchall())
+  errors.extend(
+    {"index": activity["index"], "error": "not_found"}
+    for activity in activities
+    if activity["opportunity_id"] not in visible_ids
+  )
+  if errors:
+    return jsonify({"error": "invalid_activities", "details": sorted(errors, key=lambda item: item["index"])}), 400
+
+  with _db_transaction(db):
+    with db.cursor() as cur:
+      _record_activities(cur, user["id"], activities)
+
+  per_opportunity = {}
+  for activity in activities:
+    per_opportunity[activity["opportunity_id"]] = per_opportunity.get(activity["opportunity_id"], 0) + 1
+  return jsonify(
+    {
+      "data": {
+        "created": len(activities),
+        "opportunities": [
+          {"opportunity_id": opportunity_id, "created": count}
+          for opportunity_id, count in per_opportunity.items()
+        ]
+      }
+    }
+  ), 201
+
+
 @app.route("/opportunities/<int:opportunity_id>/activities", methods=["GET"])
 @require_user
 def list_activities(opportunity_id):
+  """Activity timeline, newest first, keyset-paginated on (created_at, id) via ?cursor=."""
   user = g.user
   db = get_db()
   with db.cursor() as cur:
-    cur.execute("SELECT * FROM opportunities WHERE id = %s", (opportunity_id,))
+    cur.execute("SELECT id, company_id FROM opportunities WHERE id = %s", (opportunity_id,))
     opportunity = cur.fetchone()
 
   if not opportunity:
@@ -6581,14 +9565,29 @@ def list_activities(opportunity_id):
   if not is_group_admin(user) and opportunity.get("company_id") != user.get("company_id"):
     return jsonify({"error": "not_found"}), 404
 
+  try:
+    cursor = _decode_keyset_cursor(request.args.get("cursor"))
+  except ValueError as err:
+    return jsonify({"error": str(err)}), 400
+  limit = min(max(request.args.get("limit", default=50, type=int), 1), 200)
+  filters = ["opportunity_id = %s"]
+  params = [opportunity_id]
+  if cursor:
+    filters.append("(created_at < %s OR (created_at = %s AND id < %s))")
+    params.extend([cursor[0], cursor[0], cursor[1]])
+
   with db.cursor() as cur:
     cur.execute(
-      "SELECT * FROM activities WHERE opportunity_id = %s ORDER BY created_at DESC",
-      (opportunity_id,)
+      f"SELECT * FROM activities WHERE {' AND '.join(filters)} ORDER BY created_at DESC, id DESC LIMIT %s",
+      (*params, limit + 1)
     )
     rows = cur.fetchall()
 
-  return jsonify({"data": rows})
+  next_cursor = None
+  if len(rows) > limit:
+    rows = rows[:limit]
+    next_cursor = _encode_keyset_cursor(rows[-1]["created_at"], rows[-1]["id"])
+  return jsonify({"data": rows, "next_cursor": next_cursor})
 
 
 @app.route("/opportunities/<int:opportunity_id>/contacts", methods=["GET"])
@@ -6659,6 +9658,7 @@ def replace_tags(opportunity_id):
 
 @app.route("/tags", methods=["GET"])
 @require_user
+@cached_read("tags")
 def list_tags():
   filters = []
   params = []
@@ -6680,6 +9680,7 @@ def list_tags():
 
 @app.route("/tags", methods=["POST"])
 @require_user
+@bumps_resource_version("tags")
 def create_tag():
   body = request.get_json(silent=True) or {}
   name = body.get("name")
@@ -6705,6 +9706,7 @@ def create_tag():
 
 @app.route("/approval/form-templates", methods=["GET"])
 @require_user
+@cached_read("approval_form_templates")
 def list_approval_form_templates():
   include_schema = request.args.get("include_schema", "1") != "0"
   status = request.args.get("status")
@@ -6812,6 +9814,7 @@ def get_approval_form_template(template_id):
 
 @app.route("/approval/form-templates", methods=["POST"])
 @require_user
+@bumps_resource_version("approval_form_templates")
 def create_approval_form_template():
   guard = ensure_org_access()
   if guard:
@@ -6879,6 +9882,7 @@ def create_approval_form_template():
 
 @app.route("/approval/form-templates/<int:template_id>", methods=["PATCH"])
 @require_user
+@bumps_resource_version("approval_form_templates")
 def update_approval_form_template(template_id):
   guard = ensure_org_access()
   if guard:
@@ -6968,6 +9972,7 @@ def update_approval_form_template(template_id):
 def list_approval_process_templates():
   include_steps = request.args.get("include_steps", "1") != "0"
   include_form_schema = request.args.get("include_form_schema", "0") == "1"
+  include_definition = request.args.get("include_definition", "1") != "0"
   status = request.args.get("status")
   company_id = request.args.get("company_id", type=int)
   try:
@@ -6999,6 +10004,18 @@ def list_approval_process_templates():
       params.append(company_id)
 
   where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
+  select_parts = [
+    WORKFLOW_PROCESS_TEMPLATE_LIST_COLUMNS,
+    "c.name AS company_name, ft.name AS form_template_name, cu.name AS created_by_name, uu.name AS updated_by_name"
+  ]
+  if include_steps or include_definition:
+    select_parts.append("apt.steps_json")
+  else:
+    # only rows missing step_count need the definition to count steps
+    select_parts.append("CASE WHEN apt.step_count IS NULL THEN apt.steps_json END AS steps_json")
+  if include_form_schema:
+    select_parts.append("ft.schema_json AS form_schema_json")
+  select_columns = ", ".join(select_parts)
 
   db = get_db()
   total = None
@@ -7013,8 +10030,7 @@ def list_approval_process_templates():
       )
       total = int((cur.fetchone() or {}).get("total") or 0)
       cur.execute(
-        "SELECT apt.*, c.name AS company_name, ft.name AS form_template_name, ft.schema_json AS form_schema_json, "
-        "cu.name AS created_by_name, uu.name AS updated_by_name "
+        f"SELECT {select_columns} "
         "FROM approval_process_templates apt "
         "JOIN approval_form_templates ft ON ft.id = apt.form_template_id "
         "LEFT JOIN companies c ON c.id = apt.company_id "
@@ -7029,8 +10045,7 @@ def list_approval_process_templates():
   else:
     with db.cursor() as cur:
       cur.execute(
-        "SELECT apt.*, c.name AS company_name, ft.name AS form_template_name, ft.schema_json AS form_schema_json, "
-        "cu.name AS created_by_name, uu.name AS updated_by_name "
+        f"SELECT {select_columns} "
         "FROM approval_process_templates apt "
         "JOIN approval_form_templates ft ON ft.id = apt.form_template_id "
         "LEFT JOIN companies c ON c.id = apt.company_id "
@@ -7047,14 +10062,15 @@ def list_approval_process_templates():
       _serialize_process_template(
         row,
         include_steps=include_steps,
-        include_form_schema=include_form_schema
+        include_form_schema=include_form_schema,
+        include_definition=include_definition
       )
       for row in rows
     ]
   }
   if pagination:
     response.update({"page": page, "page_size": page_size, "total": total})
-  return jsonify(response)
+  return _json_response_with_etag(response)
 
 
 @app.route("/approval/process-templates/<int:template_id>", methods=["GET"])
@@ -7213,6 +10229,7 @@ def validate_workflow_condition_expression():
 
 @app.route("/approval/process-templates", methods=["POST"])
 @require_user
+@bumps_resource_version("approval_form_templates")
 def create_approval_process_template():
   guard = ensure_org_access()
   if guard:
@@ -7341,14 +10358,15 @@ def create_approval_process_template():
       with db.cursor() as cur:
         cur.execute(
           "INSERT INTO approval_process_templates "
-          "(name, description, company_id, form_template_id, steps_json, current_version, published_version, status, created_by, updated_by) "
-          "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+          "(name, description, company_id, form_template_id, steps_json, step_count, current_version, published_version, status, created_by, updated_by) "
+          "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
           (
             name,
             description,
             company_id,
             effective_form_template_id,
             _workflow_json_dump(definition),
+            len(_extract_steps_from_definition(definition)),
             initial_version_no,
             published_version_no,
             status,
@@ -7406,6 +10424,7 @@ def create_approval_process_template():
 
 @app.route("/approval/process-templates/<int:template_id>", methods=["PATCH"])
 @require_user
+@bumps_resource_version("approval_form_templates")
 def update_approval_process_template(template_id):
   guard = ensure_org_access()
   if guard:
@@ -7601,6 +10620,8 @@ def update_approval_process_template(template_id):
         params.append(next_form_template_id)
         updates.append("steps_json = %s")
         params.append(_workflow_json_dump(next_definition))
+        updates.append("step_count = %s")
+        params.append(len(_extract_steps_from_definition(next_definition)))
         updates.append("current_version = %s")
         params.append(next_current_version)
         if publish_requested:
@@ -7734,7 +10755,7 @@ def list_approval_instances():
       )
       total = int((cur.fetchone() or {}).get("total") or 0)
       cur.execute(
-        "SELECT ai.*, c.name AS company_name, au.name AS applicant_name, "
+        f"SELECT {WORKFLOW_INSTANCE_LIST_COLUMNS}, c.name AS company_name, au.name AS applicant_name, "
         "EXISTS(SELECT 1 FROM approval_instance_tasks ait "
         "WHERE ait.instance_id = ai.id AND ait.approver_id = %s AND ait.status = 'pending') AS pending_action "
         "FROM approval_instances ai "
@@ -7749,7 +10770,7 @@ def list_approval_instances():
   else:
     with db.cursor() as cur:
       cur.execute(
-        "SELECT ai.*, c.name AS company_name, au.name AS applicant_name, "
+        f"SELECT {WORKFLOW_INSTANCE_LIST_COLUMNS}, c.name AS company_name, au.name AS applicant_name, "
         "EXISTS(SELECT 1 FROM approval_instance_tasks ait "
         "WHERE ait.instance_id = ai.id AND ait.approver_id = %s AND ait.status = 'pending') AS pending_action "
         "FROM approval_instances ai "
@@ -7775,6 +10796,10 @@ def create_approval_instance():
   process_template_id = body.get("process_template_id")
   title = str(body.get("title") or "").strip()
   form_data_raw = body.get("form_data")
+  try:
+    detail_fields = _normalize_instance_detail_fields(request.args.get("fields") or body.get("fields"))
+  except ValueError:
+    return jsonify({"error": "invalid_fields"}), 400
 
   try:
     process_template_id = int(process_template_id)
@@ -7809,13 +10834,13 @@ def create_approval_instance():
     if template_company_id not in (None, user_company_id):
       return jsonify({"error": "forbidden"}), 403
 
-  version_row = _get_process_template_version(db, process_template_id, published_version)
+  version_row = _load_compiled_process_version(db, process_template_id, published_version)
   if not version_row:
     return jsonify({"error": "process_template_not_published_version"}), 400
 
   with db.cursor() as cur:
     cur.execute(
-      "SELECT id, company_id, schema_json FROM approval_form_templates WHERE id = %s",
+      "SELECT id, company_id, schema_json, SHA1(schema_json) AS schema_hash FROM approval_form_templates WHERE id = %s",
       (version_row.get("form_template_id"),)
     )
     form_template = cur.fetchone()
@@ -7823,46 +10848,54 @@ def create_approval_instance():
   if not form_template:
     return jsonify({"error": "invalid_form_template"}), 400
 
-  schema = _safe_json_load(form_template.get("schema_json"))
-  if not isinstance(schema, list):
+  # content-addressed like the snapshot cache; MySQL hashes the text it already
+  # reads, matching the sha1 _get_compiled_form_schema would compute
+  compiled_schema = _get_compiled_form_schema(
+    form_template.get("schema_json"),
+    schema_hash=form_template.get("schema_hash")
+  )
+  if not compiled_schema:
     return jsonify({"error": "invalid_form_schema"}), 400
+  schema = compiled_schema["schema"]
 
   try:
-    normalized_form_data = _validate_workflow_form_data(schema, form_data_raw)
+    normalized_form_data = compiled_schema["validate"](form_data_raw)
   except ValueError as err:
     return jsonify({"error": str(err)}), 400
 
-  raw_definition = _safe_json_load(version_row.get("definition_json"))
-  try:
-    definition = _normalize_workflow_definition(raw_definition)
-  except ValueError:
-    return jsonify({"error": "invalid_process_steps"}), 400
-
-  if not definition.get("nodes"):
-    return jsonify({"error": "invalid_process_steps"}), 400
-  validation = _validate_workflow_definition(definition)
-  if not validation["valid"]:
-    first_issue = validation["errors"][0]
-    return jsonify({"error": first_issue["code"], "details": validation["errors"]}), 400
+  if version_row["errors"]:
+    first_issue = version_row["errors"][0]
+    return jsonify({"error": first_issue["code"], "details": version_row["errors"]}), 400
+  definition = version_row["definition"]
 
   instance_company_id = template_company_id or g.user.get("company_id")
 
   if not title:
     title = f"{process_template.get('name')} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
 
-  process_snapshot = {
-    "id": process_template.get("id"),
-    "name": process_template.get("name"),
-    "version": published_version,
-    "definition": definition
-  }
+  # The snapshot embeds the template name, which can change without a new version.
+  process_snapshot_hash = version_row["snapshot_hashes"].get(process_template.get("name"))
+  if not process_snapshot_hash:
+    process_snapshot_hash = _store_workflow_snapshot(
+      db,
+      {
+        "id": process_template.get("id"),
+        "name": process_template.get("name"),
+        "version": published_version,
+        "definition": definition
+      }
+    )
+    _remember_process_snapshot_hash(version_row, process_template.get("name"), process_snapshot_hash)
+  if not compiled_schema["snapshot_hash"]:
+    compiled_schema["snapshot_hash"] = _store_workflow_snapshot(db, schema)
 
   with db.cursor() as cur:
     cur.execute(
       "INSERT INTO approval_instances "
       "(process_template_id, form_template_id, process_name, title, company_id, applicant_id, "
-      "process_snapshot_json, form_schema_json, form_data_json, status, current_step, total_steps, current_step_name, current_node_id) "
-      "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending', 0, %s, NULL, %s)",
+      "process_snapshot_json, form_schema_json, form_data_json, process_snapshot_hash, form_schema_hash, "
+      "status, current_step, total_steps, current_step_name, current_node_id) "
+      "VALUES (%s, %s, %s, %s, %s, %s, '', '', %s, %s, %s, 'pending', 0, %s, NULL, %s)",
       (
         process_template.get("id"),
         version_row.get("form_template_id"),
@@ -7870,10 +10903,10 @@ def create_approval_instance():
         title,
         instance_company_id,
         g.user.get("id"),
-        _workflow_json_dump(process_snapshot),
-        _workflow_json_dump(schema),
         _workflow_json_dump(normalized_form_data),
-        len(_extract_steps_from_definition(definition)),
+        process_snapshot_hash,
+        compiled_schema["snapshot_hash"],
+        version_row["total_steps"],
         definition.get("start_node_id")
       )
     )
@@ -7885,20 +10918,44 @@ def create_approval_instance():
 
   _route_instance_forward(db, instance_row, definition.get("start_node_id"))
 
-  data = _get_instance_detail(db, instance_id, g.user)
+  data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
   return jsonify({"data": data}), 201
 
 
 @app.route("/approval/instances/<int:instance_id>", methods=["GET"])
 @require_user
 def get_approval_instance(instance_id):
+  try:
+    detail_fields = _normalize_instance_detail_fields(request.args.get("fields"))
+  except ValueError:
+    return jsonify({"error": "invalid_fields"}), 400
   db = get_db()
-  data = _get_instance_detail(db, instance_id, g.user)
+  data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
   if not data:
     return jsonify({"error": "not_found"}), 404
   return jsonify({"data": data})
 
 
+@app.route("/approval/instances/<int:instance_id>/events", methods=["GET"])
+@require_user
+def list_approval_instance_events(instance_id):
+  before_id = request.args.get("before_id", type=int)
+  limit = request.args.get("limit", type=int) or WORKFLOW_DETAIL_EVENT_LIMIT
+  if limit <= 0 or (before_id is not None and before_id <= 0):
+    return jsonify({"error": "invalid_pagination"}), 400
+  limit = min(limit, WORKFLOW_EVENT_PAGE_MAX)
+
+  db = get_db()
+  if not _get_instance_detail(db, instance_id, g.user, fields="summary"):
+    return jsonify({"error": "not_found"}), 404
+  events, has_more = _list_instance_events(db, instance_id, before_id=before_id, limit=limit)
+  return jsonify({
+    "data": events,
+    "has_more": has_more,
+    "next_before_id": events[-1]["id"] if has_more and events else None
+  })
+
+
 @app.route("/approval/instances/<int:instance_id>/actions", methods=["POST"])
 @require_user
 def handle_approval_instance_action(instance_id):
@@ -7912,6 +10969,20 @@ def handle_approval_instance_action(instance_id):
 
   if action not in WORKFLOW_INSTANCE_ACTIONS:
     return jsonify({"error": "invalid_action"}), 400
+  try:
+    detail_fields = _normalize_instance_detail_fields(request.args.get("fields") or body.get("fields"))
+  except ValueError:
+    return jsonify({"error": "invalid_fields"}), 400
+
+  if idempotency_key:
+    cached_body, cached_status = _get_cached_action_idempotency_response(
+      idempotency_key,
+      instance_id,
+      g.user.get("id"),
+      action
+    )
+    if cached_body is not None:
+      return jsonify(cached_body), cached_status
 
   db = get_db()
   def respond_success(payload, status_code=200):
@@ -7926,6 +10997,20 @@ def handle_approval_instance_action(instance_id):
         response_body,
         status_code
       )
+
+      # Only cache once the surrounding transaction has committed.
+      @after_this_request
+      def remember_response(response):
+        if response.status_code < 400:
+          _remember_action_idempotency_response(
+            idempotency_key,
+            instance_id,
+            g.user.get("id"),
+            action,
+            response_body,
+            status_code
+          )
+        return response
     return jsonify(response_body), status_code
 
   with _db_transaction(db):
@@ -7954,6 +11039,14 @@ def handle_approval_instance_action(instance_id):
         action
       )
       if cached_body is not None:
+        _remember_action_idempotency_response(
+          idempotency_key,
+          instance_id,
+          g.user.get("id"),
+          action,
+          cached_body,
+          cached_status
+        )
         return jsonify(cached_body), cached_status
 
     if instance.get("status") != "pending":
@@ -7984,7 +11077,7 @@ def handle_approval_instance_action(instance_id):
         "withdraw",
         comment=comment
       )
-      data = _get_instance_detail(db, instance_id, g.user)
+      data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
       return respond_success(data)
 
     if action == "remind":
@@ -8007,7 +11100,7 @@ def handle_approval_instance_action(instance_id):
         comment=comment,
         detail={"reminded_user_ids": reminded_user_ids}
       )
-      data = _get_instance_detail(db, instance_id, g.user)
+      data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
       return respond_success(data)
 
     with db.cursor() as cur:
@@ -8038,7 +11131,7 @@ def handle_approval_instance_action(instance_id):
       if invalid_keys:
         return jsonify({"error": "field_update_forbidden", "details": {"fields": invalid_keys}}), 400
 
-      schema = _safe_json_load(instance.get("form_schema_json"))
+      schema = _get_instance_form_schema(instance, db)
       if not isinstance(schema, list):
         return jsonify({"error": "invalid_form_schema"}), 400
       current_form_data = _load_instance_form_data(instance)
@@ -8047,7 +11140,11 @@ def handle_approval_instance_action(instance_id):
         merged_form_data[key] = value
         updated_form_fields.append(key)
       try:
-        normalized_form_data = _validate_workflow_form_data(schema, merged_form_data)
+        normalized_form_data = _validate_workflow_form_data(
+          schema,
+          merged_form_data,
+          schema_hash=instance.get("form_schema_hash")
+        )
       except ValueError as err:
         return jsonify({"error": str(err)}), 400
       for field_key, permission in current_field_permission_map.items():
@@ -8112,7 +11209,7 @@ def handle_approval_instance_action(instance_id):
         comment=comment,
         detail={"from_user_id": g.user.get("id"), "to_user_id": target_user_id}
       )
-      data = _get_instance_detail(db, instance_id, g.user)
+      data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
       return respond_success(data)
 
     if action == "add_sign":
@@ -8179,7 +11276,7 @@ def handle_approval_instance_action(instance_id):
         comment=comment,
         detail={"added_user_ids": [row[4] for row in insert_rows]}
       )
-      data = _get_instance_detail(db, instance_id, g.user)
+      data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
       return respond_success(data)
 
     if action in {"reject", "return"}:
@@ -8207,7 +11304,7 @@ def handle_approval_instance_action(instance_id):
         task_id=task.get("id"),
         comment=action_comment
       )
-      data = _get_instance_detail(db, instance_id, g.user)
+      data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
       return respond_success(data)
 
     with db.cursor() as cur:
@@ -8232,10 +11329,40 @@ def handle_approval_instance_action(instance_id):
       latest_instance = cur.fetchone()
     _advance_approval_instance(db, latest_instance)
 
-    data = _get_instance_detail(db, instance_id, g.user)
+    data = _get_instance_detail(db, instance_id, g.user, fields=detail_fields)
     return respond_success(data)
 
 
+def _warm_workflow_version_cache(db):
+  if not WORKFLOW_TABLES_READY or WORKER_WARMUP_PROCESS_TEMPLATES <= 0:
+    return 0
+  with db.cursor() as cur:
+    cur.execute(
+      "SELECT id, published_version FROM approval_process_templates "
+      "WHERE status = 'active' AND published_version IS NOT NULL "
+      "ORDER BY updated_at DESC LIMIT %s",
+      (WORKER_WARMUP_PROCESS_TEMPLATES,)
+    )
+    rows = cur.fetchall()
+  return sum(1 for row in rows if _load_compiled_process_version(db, row["id"], row["published_version"]))
+
+
+def init_worker():
+  """Per-process startup hook for the WSGI server (gunicorn post_worker_init, waitress start).
+
+  Connects once, runs the schema checks and compiles the most recent published
+  approval processes so the first real request does not pay for them. Returns
+  the number of cached process versions, or None when the database was down.
+  """
+  with app.app_context():
+    try:
+      return _warm_workflow_version_cache(get_db())
+    except OperationalError as err:
+      app.logger.warning("worker %s warmup skipped: %s", os.getpid(), err)
+      return None
+
+
 if __name__ == "__main__":
+  # development server; see wsgi.py and gunicorn.conf.py for production
   port = int(os.getenv("PORT", "3000"))
   app.run(host="0.0.0.0", port=port)
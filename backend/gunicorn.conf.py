@@ -0,0 +1,48 @@
+"""gunicorn settings; every value can be overridden from the environment.
+
+  gunicorn -c backend/gunicorn.conf.py wsgi:application
+
+Graceful reload: `kill -HUP <master pid>` (systemctl reload) starts workers on
+the deployed code and lets the old ones finish in-flight requests within
+graceful_timeout. Application code is imported per worker (no preload) so a
+HUP picks it up.
+"""
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '3000')}")
+workers = max(int(os.getenv("WEB_WORKERS", str(min(multiprocessing.cpu_count() * 2 + 1, 9)))), 1)
+threads = max(int(os.getenv("WEB_THREADS", "4")), 1)
+worker_class = "gthread" if threads > 1 else "sync"
+# imports and AI analysis requests can legitimately run for a while
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+# recycle workers now and then so slow leaks in caches cannot grow unbounded
+max_requests = max(int(os.getenv("WEB_MAX_REQUESTS", "5000")), 0)
+max_requests_jitter = max_requests // 10
+preload_app = False
+accesslog = os.getenv("WEB_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+def post_worker_init(worker):
+  import time
+
+  import app as app_module
+
+  started = time.perf_counter()
+  warmed = app_module.init_worker()
+  if warmed is not None:
+    worker.log.info(
+      "worker %s warmed in %.0f ms (%s process versions cached)", worker.pid, (time.perf_counter() - started) * 1000, warmed
+    )
+
+
+def on_reload(server):
+  server.log.info("reloading: new workers start on the deployed code, old ones drain")
+
+
+def worker_abort(worker):
+  worker.log.warning("worker %s timed out after %ss", worker.pid, timeout)
@@ -81,6 +81,9 @@ CREATE TABLE IF NOT EXISTS user_org_positions (
 CREATE TABLE IF NOT EXISTS opportunities (
   id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
   name VARCHAR(255) NOT NULL,
+  name_key VARCHAR(255) NULL,
+  phone_key VARCHAR(32) NULL,
+  email_key VARCHAR(100) NULL,
   type ENUM('normal', 'host') NOT NULL,
   source VARCHAR(100) NOT NULL,
   industry VARCHAR(100),
@@ -109,11 +112,22 @@ CREATE TABLE IF NOT EXISTS opportunities (
   contact_wechat VARCHAR(100),
   invalid_reason VARCHAR(255),
   last_follow_up_at TIMESTAMP NULL,
+  next_follow_up_due_at TIMESTAMP NULL,
+  next_follow_up_due_changed_at TIMESTAMP NULL,
   created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   INDEX idx_company_status (company_id, status),
   INDEX idx_company_stage (company_id, stage),
   INDEX idx_owner (owner_id),
+  INDEX idx_opportunity_company_created (company_id, created_at),
+  INDEX idx_opportunity_name (name),
+  INDEX idx_opportunity_name_key (name_key, city),
+  INDEX idx_opportunity_phone_key (phone_key),
+  INDEX idx_opportunity_email_key (email_key),
+  INDEX idx_opportunity_follow_up_due (next_follow_up_due_at),
+  INDEX idx_opportunity_follow_up_due_changed (next_follow_up_due_changed_at),
+  INDEX idx_opportunity_company_follow_up_due (company_id, next_follow_up_due_at),
+  INDEX idx_opportunity_owner_follow_up_due (owner_id, next_follow_up_due_at),
   CONSTRAINT fk_opportunities_owner FOREIGN KEY (owner_id) REFERENCES users(id),
   CONSTRAINT fk_opportunities_company FOREIGN KEY (company_id) REFERENCES companies(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -179,6 +193,7 @@ CREATE TABLE IF NOT EXISTS activities (
   follow_up_at TIMESTAMP NULL,
   created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   INDEX idx_opportunity (opportunity_id),
+  INDEX idx_activity_timeline (opportunity_id, created_at, id),
   CONSTRAINT fk_activities_opportunity FOREIGN KEY (opportunity_id) REFERENCES opportunities(id) ON DELETE CASCADE,
   CONSTRAINT fk_activities_user FOREIGN KEY (user_id) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -238,6 +253,7 @@ CREATE TABLE IF NOT EXISTS approval_process_templates (
   company_id BIGINT UNSIGNED NULL,
   form_template_id BIGINT UNSIGNED NOT NULL,
   steps_json LONGTEXT NOT NULL,
+  step_count INT NULL,
   current_version INT NOT NULL DEFAULT 1,
   published_version INT NULL,
   status ENUM('active', 'inactive') NOT NULL DEFAULT 'inactive',
@@ -259,6 +275,8 @@ CREATE TABLE IF NOT EXISTS approval_process_template_versions (
   version_no INT NOT NULL,
   form_template_id BIGINT UNSIGNED NOT NULL,
   definition_json LONGTEXT NOT NULL,
+  compiled_json LONGTEXT NULL,
+  total_steps INT NULL,
   status ENUM('draft', 'published', 'archived') NOT NULL DEFAULT 'draft',
   published_at TIMESTAMP NULL,
   created_by BIGINT UNSIGNED NOT NULL,
@@ -284,6 +302,8 @@ CREATE TABLE IF NOT EXISTS approval_instances (
   process_snapshot_json LONGTEXT NOT NULL,
   form_schema_json LONGTEXT NOT NULL,
   form_data_json LONGTEXT NOT NULL,
+  process_snapshot_hash CHAR(64) NULL,
+  form_schema_hash CHAR(64) NULL,
   status ENUM('pending', 'approved', 'rejected', 'withdrawn') NOT NULL DEFAULT 'pending',
   current_step INT NOT NULL DEFAULT 1,
   total_steps INT NOT NULL DEFAULT 1,
@@ -302,6 +322,12 @@ CREATE TABLE IF NOT EXISTS approval_instances (
   CONSTRAINT fk_instance_applicant FOREIGN KEY (applicant_id) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+CREATE TABLE IF NOT EXISTS approval_snapshots (
+  snapshot_hash CHAR(64) NOT NULL PRIMARY KEY,
+  body_json LONGTEXT NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 CREATE TABLE IF NOT EXISTS approval_instance_tasks (
   id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
   instance_id BIGINT UNSIGNED NOT NULL,
@@ -332,12 +358,28 @@ CREATE TABLE IF NOT EXISTS approval_instance_events (
   comment TEXT NULL,
   created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   INDEX idx_instance_event_instance (instance_id, created_at),
+  INDEX idx_instance_event_instance_id (instance_id, id),
   INDEX idx_instance_event_action (action),
   CONSTRAINT fk_instance_event_instance FOREIGN KEY (instance_id) REFERENCES approval_instances(id) ON DELETE CASCADE,
   CONSTRAINT fk_instance_event_task FOREIGN KEY (task_id) REFERENCES approval_instance_tasks(id) ON DELETE SET NULL,
   CONSTRAINT fk_instance_event_user FOREIGN KEY (user_id) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+CREATE TABLE IF NOT EXISTS approval_instance_events_archive (
+  id BIGINT UNSIGNED NOT NULL PRIMARY KEY,
+  instance_id BIGINT UNSIGNED NOT NULL,
+  task_id BIGINT UNSIGNED NULL,
+  user_id BIGINT UNSIGNED NOT NULL,
+  action VARCHAR(32) NOT NULL,
+  detail_json LONGTEXT NULL,
+  comment TEXT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_event_archive_instance (instance_id, id),
+  INDEX idx_event_archive_created (created_at),
+  CONSTRAINT fk_event_archive_instance FOREIGN KEY (instance_id) REFERENCES approval_instances(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 CREATE TABLE IF NOT EXISTS approval_action_idempotency (
   id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
   idem_key VARCHAR(128) NOT NULL,
@@ -345,6 +387,7 @@ CREATE TABLE IF NOT EXISTS approval_action_idempotency (
   actor_id BIGINT UNSIGNED NOT NULL,
   action VARCHAR(32) NOT NULL,
   response_json LONGTEXT NULL,
+  response_gz LONGBLOB NULL,
   status_code INT NOT NULL DEFAULT 200,
   created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -353,3 +396,54 @@ CREATE TABLE IF NOT EXISTS approval_action_idempotency (
   CONSTRAINT fk_action_idem_instance FOREIGN KEY (instance_id) REFERENCES approval_instances(id) ON DELETE CASCADE,
   CONSTRAINT fk_action_idem_actor FOREIGN KEY (actor_id) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS resource_versions (
+  resource VARCHAR(64) NOT NULL PRIMARY KEY,
+  version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS opportunity_daily_rollups (
+  rollup_date DATE NOT NULL,
+  company_id BIGINT UNSIGNED NOT NULL,
+  owner_id BIGINT UNSIGNED NOT NULL,
+  type VARCHAR(20) NOT NULL,
+  source VARCHAR(100) NOT NULL,
+  status VARCHAR(20) NOT NULL,
+  stage VARCHAR(32) NOT NULL,
+  organizer_type VARCHAR(32) NOT NULL DEFAULT '',
+  opportunity_count INT NOT NULL DEFAULT 0,
+  key_contact_count INT NOT NULL DEFAULT 0,
+  contact_count INT NOT NULL DEFAULT 0,
+  persona_count INT NOT NULL DEFAULT 0,
+  followed_count INT NOT NULL DEFAULT 0,
+  followed_24h_count INT NOT NULL DEFAULT 0,
+  activity_count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (rollup_date, company_id, owner_id, type, source, status, stage, organizer_type),
+  INDEX idx_rollup_company_date (company_id, rollup_date),
+  INDEX idx_rollup_owner_date (owner_id, rollup_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS follow_up_scans (
+  id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+  window_start TIMESTAMP NULL,
+  window_end TIMESTAMP NOT NULL,
+  overdue_count INT NOT NULL DEFAULT 0,
+  reminder_count INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_follow_up_scan_window (window_end)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS follow_up_reminders (
+  id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+  scan_id BIGINT UNSIGNED NOT NULL,
+  owner_id BIGINT UNSIGNED NOT NULL,
+  company_id BIGINT UNSIGNED NOT NULL,
+  opportunity_count INT NOT NULL,
+  opportunity_ids_json LONGTEXT NOT NULL,
+  earliest_due_at TIMESTAMP NULL,
+  acknowledged_at TIMESTAMP NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_follow_up_reminder_owner (owner_id, id),
+  INDEX idx_follow_up_reminder_scan (scan_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,35 @@
+"""Move approval events of long-finished instances into the archive table.
+
+Run from cron (e.g. nightly):
+
+  python backend/scripts/archive_workflow_events.py --days 90 --batch 200
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Archive approval events of finished instances")
+  parser.add_argument("--days", type=int, default=app_module.WORKFLOW_EVENT_ARCHIVE_AFTER_DAYS)
+  parser.add_argument("--batch", type=int, default=200, help="instances moved per transaction")
+  args = parser.parse_args()
+
+  total = 0
+  with app_module.app.app_context():
+    db = app_module.get_db()
+    while True:
+      moved = app_module._archive_finished_instance_events(db, older_than_days=args.days, batch_size=args.batch)
+      total += moved
+      if moved < args.batch:
+        break
+  print(f"Archived events of {total} instances")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,67 @@
+"""Fill next_follow_up_due_at for opportunities written before the column existed.
+
+By default only open opportunities without a due date are touched, so an
+interrupted run simply resumes where it stopped; --all recomputes every row
+(e.g. after changing FOLLOW_UP_FIRST_SLA_HOURS or FOLLOW_UP_CADENCE_HOURS).
+Run it once after deploying the follow-up reminders, before the scanner:
+
+  python backend/scripts/backfill_follow_up_due.py --batch 1000
+  python backend/scripts/backfill_follow_up_due.py --all --start-id 250000
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Backfill opportunity follow-up due dates")
+  parser.add_argument("--batch", type=int, default=1000, help="opportunities updated per statement")
+  parser.add_argument("--all", action="store_true", help="recompute every opportunity, not only missing due dates")
+  parser.add_argument("--start-id", type=int, default=0, help="resume an --all run after this opportunity id")
+  args = parser.parse_args()
+  if args.batch <= 0:
+    parser.error("--batch must be positive")
+
+  total = 0
+  last_id = args.start_id
+  with app_module.app.app_context():
+    db = app_module._open_maintenance_connection()
+    try:
+      if not app_module.FOLLOW_UP_TABLES_READY:
+        print("opportunities.next_follow_up_due_at is missing and could not be added; check the database user can ALTER TABLE")
+        sys.exit(1)
+      missing_clause = ""
+      missing_params = ()
+      if not args.all:
+        statuses = app_module.FOLLOW_UP_CLOSED_STATUSES
+        stages = app_module.FOLLOW_UP_CLOSED_STAGES
+        missing_clause = (
+          f"AND next_follow_up_due_at IS NULL AND status NOT IN ({', '.join(['%s'] * len(statuses))}) "
+          f"AND stage NOT IN ({', '.join(['%s'] * len(stages))}) "
+        )
+        missing_params = (*statuses, *stages)
+      while True:
+        with db.cursor() as cur:
+          cur.execute(
+            f"SELECT id FROM opportunities WHERE id > %s {missing_clause}ORDER BY id LIMIT %s",
+            (last_id, *missing_params, args.batch)
+          )
+          ids = [row["id"] for row in cur.fetchall()]
+          if not ids:
+            break
+          app_module._refresh_follow_up_due(cur, ids)
+        total += len(ids)
+        last_id = ids[-1]
+        print(f"  up to id {last_id}: {total}", file=sys.stderr)
+    finally:
+      db.close()
+  print(f"Updated follow-up due dates of {total} opportunities")
+
+
+if __name__ == "__main__":
+  main()
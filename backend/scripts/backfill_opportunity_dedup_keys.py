@@ -0,0 +1,55 @@
+"""Fill name_key/phone_key/email_key for opportunities written before the dedup columns existed.
+
+Safe to re-run; rows are rewritten in id order:
+
+  python backend/scripts/backfill_opportunity_dedup_keys.py --batch 1000
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Backfill opportunity dedup keys")
+  parser.add_argument("--batch", type=int, default=1000, help="rows updated per statement batch")
+  parser.add_argument("--only-missing", action="store_true", help="skip rows that already have a name_key")
+  args = parser.parse_args()
+
+  total = 0
+  last_id = 0
+  with app_module.app.app_context():
+    db = app_module.get_db()
+    if not app_module.OPPORTUNITY_DEDUP_COLUMNS_READY:
+      print("opportunities.name_key is missing and could not be added; check the database user can ALTER TABLE")
+      sys.exit(1)
+    missing_clause = "AND name_key IS NULL " if args.only_missing else ""
+    while True:
+      with db.cursor() as cur:
+        cur.execute(
+          "SELECT id, name, contact_phone, contact_email, company_phone, company_email "
+          f"FROM opportunities WHERE id > %s {missing_clause}ORDER BY id LIMIT %s",
+          (last_id, args.batch)
+        )
+        rows = cur.fetchall()
+        if not rows:
+          break
+        params = []
+        for row in rows:
+          keys = app_module._opportunity_dedup_keys(row)
+          params.append((keys["name_key"], keys["phone_key"], keys["email_key"], row["id"]))
+        cur.executemany(
+          "UPDATE opportunities SET name_key = %s, phone_key = %s, email_key = %s, updated_at = updated_at WHERE id = %s",
+          params
+        )
+      total += len(rows)
+      last_id = rows[-1]["id"]
+  print(f"Updated dedup keys of {total} opportunities")
+
+
+if __name__ == "__main__":
+  main()
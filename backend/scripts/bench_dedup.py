@@ -0,0 +1,58 @@
+"""Duplicate clustering benchmark.
+
+Builds synthetic company names (a share of them near-duplicates of the
+previous row) and times _find_duplicate_clusters. No database needed.
+
+  python backend/scripts/bench_dedup.py --sizes 10000 50000 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+CHARS = [chr(0x4E00 + idx) for idx in range(2500)]
+CITIES = ["上海", "北京", "深圳", "广州", None]
+
+
+def build_rows(size, duplicate_every, rng):
+  rows = []
+  for idx in range(size):
+    if rows and idx % duplicate_every == 0:
+      base = rows[-1]
+      name = app_module._normalize_opportunity_name(base["name"]) + "展览有限公司"
+      city = base["city"]
+    else:
+      name = "".join(rng.choice(CHARS) for _ in range(rng.randint(6, 12))) + "有限公司"
+      city = rng.choice(CITIES)
+    row = {"id": idx + 1, "name": name, "city": city, "company_id": 1 + idx % 3}
+    if rows and idx % duplicate_every == 0:
+      row["company_id"] = rows[-1]["company_id"]
+    row.update(app_module._opportunity_dedup_keys(row))
+    rows.append(row)
+  return rows
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Duplicate clustering benchmark")
+  parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+  parser.add_argument("--duplicate-every", type=int, default=20)
+  args = parser.parse_args()
+
+  rng = random.Random(7)
+  print(f"{'rows':>8}{'clusters':>10}{'ms':>10}{'us/row':>9}")
+  for size in args.sizes:
+    rows = build_rows(size, args.duplicate_every, rng)
+    started = time.perf_counter()
+    clusters = app_module._find_duplicate_clusters(rows)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"{size:>8}{len(clusters):>10}{elapsed_ms:>10.1f}{elapsed_ms * 1000 / size:>9.2f}")
+
+
+if __name__ == "__main__":
+  main()
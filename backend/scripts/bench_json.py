@@ -0,0 +1,158 @@
+"""JSON serialization micro-benchmark.
+
+Compares Flask's stdlib provider with the app's provider (orjson when
+installed) on a 500-row opportunity page and an approval instance detail,
+plus the *_json column dump used for stored blobs. No database needed.
+
+  python backend/scripts/bench_json.py --rows 500 --repeat 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import app as app_module  # noqa: E402
+
+
+def build_opportunity_page(row_count):
+  base_time = datetime(2024, 6, 1, 9, 30)
+  rows = []
+  for idx in range(row_count):
+    rows.append({
+      "id": idx + 1,
+      "name": f"2025 国际智能制造博览会 {idx}",
+      "type": "host" if idx % 3 == 0 else "normal",
+      "source": "qufair",
+      "industry": "工业自动化",
+      "city": "上海",
+      "status": "in_progress",
+      "stage": "interest",
+      "owner_id": 10 + idx % 7,
+      "owner_name": f"销售{idx % 7}",
+      "company_id": 2,
+      "company_name": "Subsidiary A",
+      "organizer_name": "国际展览有限公司",
+      "organizer_type": "commercial",
+      "exhibition_name": f"智能制造展 {idx}",
+      "exhibition_start_date": date(2025, 3, 1) + timedelta(days=idx % 200),
+      "exhibition_end_date": date(2025, 3, 4) + timedelta(days=idx % 200),
+      "venue_name": "国家会展中心",
+      "venue_address": "上海市青浦区崧泽大道333号",
+      "booth_count": 1200 + idx,
+      "exhibition_area_sqm": 80000,
+      "expected_visitors": 150000,
+      "exhibition_theme": "数字化转型与智能工厂",
+      "budget_range": "100-300万",
+      "risk_notes": "竞争对手已接触主办方，需尽快推进。" * 4,
+      "contact_name": "王经理",
+      "contact_title": "市场总监",
+      "contact_phone": "13800000000",
+      "contact_email": "contact@example.com",
+      "contact_wechat": "wx_contact",
+      "invalid_reason": None,
+      "budget_amount": Decimal("1250000.00"),
+      "last_follow_up_at": base_time + timedelta(hours=idx),
+      "created_at": base_time,
+      "updated_at": base_time + timedelta(minutes=idx),
+      "tags": [{"id": 1, "name": "重点", "type": "custom"}, {"id": 2, "name": "华东", "type": "region"}],
+      "contact_count": 3,
+      "activity_count": idx % 12,
+      "raw_json": json.dumps({"source_url": f"https://example.com/fair/{idx}", "heat_score": idx % 100}),
+      "is_domestic": 1,
+      "heat_score": idx % 100,
+      "cycle_text": "一年一届",
+      "source_url": f"https://example.com/fair/{idx}",
+      "exhibitors_count": 900,
+      "visitors_count": 120000
+    })
+  return {"data": rows, "page": 1, "page_size": row_count, "total": row_count * 20}
+
+
+def build_instance_detail(task_count=40, event_count=50):
+  base_time = datetime(2024, 6, 1, 9, 30)
+  form_data = {f"field_{idx}": f"value {idx}" for idx in range(60)}
+  form_data["lines"] = [{"item": f"item {idx}", "qty": idx, "unit": "box"} for idx in range(100)]
+  return {
+    "data": {
+      "id": 1,
+      "title": "采购申请",
+      "status": "pending",
+      "form_data": form_data,
+      "tasks": [
+        {
+          "id": idx,
+          "step_no": idx // 2 + 1,
+          "step_name": f"审批 {idx}",
+          "approver_id": 100 + idx,
+          "approver_name": f"审批人{idx}",
+          "status": "approved",
+          "comment": "同意",
+          "acted_at": base_time + timedelta(minutes=idx),
+          "created_at": base_time
+        }
+        for idx in range(task_count)
+      ],
+      "events": [
+        {
+          "id": idx,
+          "action": "approve",
+          "operator_id": 100 + idx,
+          "detail": {"task_id": idx, "node_id": f"n{idx}", "comment": "同意"},
+          "created_at": base_time + timedelta(minutes=idx)
+        }
+        for idx in range(event_count)
+      ],
+      "created_at": base_time,
+      "updated_at": base_time
+    }
+  }
+
+
+def _best_ms(fn, repeat):
+  best = None
+  for _ in range(repeat):
+    started = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - started) * 1000
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description="JSON serialization micro-benchmark")
+  parser.add_argument("--rows", type=int, default=500)
+  parser.add_argument("--repeat", type=int, default=20)
+  args = parser.parse_args()
+
+  app = app_module.app
+  stdlib_provider = DefaultJSONProvider(app)
+  payloads = {
+    f"opportunities x{args.rows}": build_opportunity_page(args.rows),
+    "instance detail": build_instance_detail()
+  }
+  backend = "orjson" if app_module.USE_ORJSON else "stdlib"
+  print(f"app provider backend: {backend}")
+  print(f"{'payload':<22}{'KB':>8}{'stdlib ms':>11}{'app ms':>9}{'speedup':>9}")
+  with app.app_context():
+    for name, payload in payloads.items():
+      size_kb = len(app.json.response(payload).get_data()) / 1024
+      stdlib_ms = _best_ms(lambda: stdlib_provider.response(payload), args.repeat)
+      app_ms = _best_ms(lambda: app.json.response(payload), args.repeat)
+      print(f"{name:<22}{size_kb:>8.1f}{stdlib_ms:>11.2f}{app_ms:>9.2f}{stdlib_ms / app_ms:>8.1f}x")
+
+  form_data = build_instance_detail()["data"]["form_data"]
+  stdlib_ms = _best_ms(lambda: json.dumps(form_data, ensure_ascii=False), args.repeat)
+  column_ms = _best_ms(lambda: app_module._dump_json_column(form_data), args.repeat)
+  print(f"{'form_data_json column':<22}{'':>8}{stdlib_ms:>11.3f}{column_ms:>9.3f}{stdlib_ms / column_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,121 @@
+"""Development server vs production serving benchmark.
+
+Starts each serving mode on its own port, waits for /health, runs
+scripts/load_test.py against it over HTTP and prints the results side by
+side. Needs a manifest from scripts/generate_load_data.py and the same DB_*
+settings the servers will use; the default mix is read-only.
+
+  python backend/scripts/bench_serving.py --manifest load_manifest.json --duration 30 --concurrency 32
+  python backend/scripts/bench_serving.py --modes dev gunicorn --workers 4 --threads 8
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BASE_DIR)
+
+MODES = ["dev", "gunicorn", "waitress"]
+DEFAULT_MIX = "list=35,filter=25,detail=20,messages=20"
+
+
+def server_command(mode, port, args):
+  env = dict(os.environ, PORT=str(port), WEB_THREADS=str(args.threads))
+  if mode == "dev":
+    return [sys.executable, os.path.join(BACKEND_DIR, "app.py")], env
+  if mode == "gunicorn":
+    env.update(GUNICORN_BIND=f"127.0.0.1:{port}", WEB_WORKERS=str(args.workers), WEB_ACCESS_LOG="")
+    return [sys.executable, "-m", "gunicorn", "-c", os.path.join(BACKEND_DIR, "gunicorn.conf.py"), "wsgi:application"], env
+  env.update(HOST="127.0.0.1")
+  return [sys.executable, os.path.join(BACKEND_DIR, "wsgi.py")], env
+
+
+def wait_until_healthy(port, process, timeout):
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if process.poll() is not None:
+      return False
+    try:
+      with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as response:
+        if response.status == 200:
+          return True
+    except (urllib.error.URLError, OSError):
+      pass
+    time.sleep(0.25)
+  return False
+
+
+def run_mode(mode, port, args, results_path):
+  command, env = server_command(mode, port, args)
+  process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  try:
+    if not wait_until_healthy(port, process, args.startup_timeout):
+      print(f"{mode}: server did not become healthy (exit code {process.poll()})", file=sys.stderr)
+      return False
+    subprocess.run(
+      [
+        sys.executable, os.path.join(BASE_DIR, "load_test.py"),
+        "--manifest", args.manifest,
+        "--base-url", f"http://127.0.0.1:{port}",
+        "--mix", args.mix,
+        "--duration", str(args.duration),
+        "--concurrency", str(args.concurrency),
+        "--label", mode,
+        "--json", results_path
+      ],
+      check=True
+    )
+    return True
+  finally:
+    # SIGTERM is a graceful shutdown for gunicorn and waitress alike
+    process.send_signal(signal.SIGTERM)
+    try:
+      process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+      process.kill()
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare the dev server with the production serving modes")
+  parser.add_argument("--manifest", default="load_manifest.json")
+  parser.add_argument("--modes", nargs="+", choices=MODES, default=["dev", "gunicorn"])
+  parser.add_argument("--workers", type=int, default=4, help="gunicorn worker processes")
+  parser.add_argument("--threads", type=int, default=4, help="threads per gunicorn worker / waitress threads")
+  parser.add_argument("--mix", default=DEFAULT_MIX)
+  parser.add_argument("--duration", type=float, default=30)
+  parser.add_argument("--concurrency", type=int, default=32)
+  parser.add_argument("--port", type=int, default=5100, help="first port; one per mode")
+  parser.add_argument("--startup-timeout", type=float, default=60)
+  parser.add_argument("--json", dest="json_path", help="also keep the raw load test results here")
+  args = parser.parse_args()
+  args.manifest = os.path.abspath(args.manifest)
+
+  results_path = args.json_path or tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False).name
+  open(results_path, "w").close()
+  for offset, mode in enumerate(args.modes):
+    print(f"== {mode}")
+    run_mode(mode, args.port + offset, args, results_path)
+
+  with open(results_path, encoding="utf-8") as file:
+    results = [json.loads(line) for line in file if line.strip()]
+  print()
+  print(f"{'mode':<10}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+  for result in results:
+    errors = sum(result["errors"].values())
+    print(
+      f"{result['label']:<10}{result['total_requests']:>10}{result['rps']:>10}{result['p50_ms']:>10}"
+      f"{result['p95_ms']:>10}{result['p99_ms']:>10}{errors:>8}"
+    )
+  if not args.json_path:
+    os.unlink(results_path)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,465 @@
+"""Approval engine throughput benchmark.
+
+Generates synthetic process definitions (sequential approvals, condition
+branches, parallel_start/parallel_join, approver_groups), then drives many
+instances through create/approve/reject/transfer/add_sign using the Flask test
+client. Every action runs the real engine against the MySQL database from
+DB_* in .env, so point it at a disposable schema (BENCH_DB_NAME overrides
+DB_NAME): the run leaves its users, templates and instances behind.
+
+  python backend/scripts/bench_workflow.py --instances 2000 --shape mixed
+  python backend/scripts/bench_workflow.py --shape parallel --width 8 --json bench.json --fail-p95-ms 250
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+if os.getenv("BENCH_DB_NAME"):
+  os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME")
+
+from pymysql.cursors import Cursor  # noqa: E402
+
+import app as app_module  # noqa: E402
+
+SHAPES = ["sequential", "condition", "parallel", "groups", "mixed"]
+ACTIONS = ["create", "approve", "reject", "transfer", "add_sign"]
+MAX_ACTIONS_PER_INSTANCE = 200
+
+_query_counter = threading.local()
+_original_execute = Cursor.execute
+
+
+def _counting_execute(self, query, args=None):
+  _query_counter.count = getattr(_query_counter, "count", 0) + 1
+  return _original_execute(self, query, args)
+
+
+Cursor.execute = _counting_execute
+
+
+def _reset_query_count():
+  _query_counter.count = 0
+
+
+def _query_count():
+  return getattr(_query_counter, "count", 0)
+
+
+def _approval_node(node_id, name, approver_ids, approval_type="any"):
+  return {
+    "id": node_id,
+    "name": name,
+    "node_type": "approval",
+    "approver_type": "user",
+    "approval_type": approval_type,
+    "approver_user_ids": approver_ids
+  }
+
+
+def _pick(approver_ids, rng, count):
+  return rng.sample(approver_ids, min(count, len(approver_ids)))
+
+
+def _build_sequential(rng, approver_ids, depth, width):
+  nodes = [{"id": "start", "node_type": "start"}]
+  edges = []
+  previous_id = "start"
+  for idx in range(1, depth + 1):
+    node_id = f"seq_{idx}"
+    approval_type = ["any", "all", "sequential"][idx % 3]
+    nodes.append(_approval_node(node_id, f"顺序审批{idx}", _pick(approver_ids, rng, width), approval_type))
+    edges.append({"source": previous_id, "target": node_id})
+    previous_id = node_id
+  nodes.append({"id": "end", "node_type": "end"})
+  edges.append({"source": previous_id, "target": "end"})
+  return nodes, edges
+
+
+def _build_condition(rng, approver_ids, depth, width):
+  nodes = [{"id": "start", "node_type": "start"}, {"id": "cond", "node_type": "condition"}]
+  edges = [{"source": "start", "target": "cond"}]
+  for branch, rule in [
+    ("high", {"field": "amount", "operator": "gte", "value": 10000}),
+    ("mid", {"field": "amount", "operator": "gte", "value": 1000}),
+    ("low", None)
+  ]:
+    previous_id = "cond"
+    for idx in range(1, depth + 1):
+      node_id = f"{branch}_{idx}"
+      nodes.append(_approval_node(node_id, f"{branch}审批{idx}", _pick(approver_ids, rng, width)))
+      edge = {"source": previous_id, "target": node_id}
+      if previous_id == "cond":
+        if rule:
+          edge["condition"] = {"logic": "and", "rules": [rule]}
+        else:
+          edge["is_default"] = True
+      edges.append(edge)
+      previous_id = node_id
+    edges.append({"source": previous_id, "target": "end"})
+  nodes.append({"id": "end", "node_type": "end"})
+  return nodes, edges
+
+
+def _build_parallel(rng, approver_ids, depth, width):
+  nodes = [
+    {"id": "start", "node_type": "start"},
+    {"id": "fork", "node_type": "parallel_start"},
+    {"id": "join", "node_type": "parallel_join"},
+    {"id": "end", "node_type": "end"}
+  ]
+  edges = [{"source": "start", "target": "fork"}, {"source": "join", "target": "end"}]
+  for branch in range(1, width + 1):
+    previous_id = "fork"
+    for idx in range(1, depth + 1):
+      node_id = f"par_{branch}_{idx}"
+      nodes.append(_approval_node(node_id, f"并行{branch}-{idx}", _pick(approver_ids, rng, 1)))
+      edges.append({"source": previous_id, "target": node_id})
+      previous_id = node_id
+    edges.append({"source": previous_id, "target": "join"})
+  return nodes, edges
+
+
+def _build_groups(rng, approver_ids, depth, width):
+  nodes = [{"id": "start", "node_type": "start"}]
+  edges = []
+  previous_id = "start"
+  for idx in range(1, depth + 1):
+    node_id = f"grp_{idx}"
+    nodes.append({
+      "id": node_id,
+      "name": f"审批组{idx}",
+      "node_type": "approval",
+      "approval_type": "all",
+      "approver_groups": [
+        {
+          "id": f"g{group_no}",
+          "name": f"组{group_no}",
+          "approver_type": "user",
+          "approver_user_ids": _pick(approver_ids, rng, 2)
+        }
+        for group_no in range(1, width + 1)
+      ]
+    })
+    edges.append({"source": previous_id, "target": node_id})
+    previous_id = node_id
+  nodes.append({"id": "end", "node_type": "end"})
+  edges.append({"source": previous_id, "target": "end"})
+  return nodes, edges
+
+
+def _build_mixed(rng, approver_ids, depth, width):
+  # condition -> parallel block -> grouped approval -> end
+  nodes = [
+    {"id": "start", "node_type": "start"},
+    {"id": "cond", "node_type": "condition"},
+    _approval_node("big", "大额审批", _pick(approver_ids, rng, width), "sequential"),
+    _approval_node("small", "小额审批", _pick(approver_ids, rng, width), "any"),
+    {"id": "fork", "node_type": "parallel_start"},
+    {"id": "join", "node_type": "parallel_join"},
+    {"id": "end", "node_type": "end"}
+  ]
+  edges = [
+    {"source": "start", "target": "cond"},
+    {
+      "source": "cond",
+      "target": "big",
+      "condition": {"logic": "and", "rules": [{"field": "amount", "operator": "gte", "value": 10000}]}
+    },
+    {"source": "cond", "target": "small", "is_default": True},
+    {"source": "big", "target": "fork"},
+    {"source": "small", "target": "fork"}
+  ]
+  par_nodes, par_edges = _build_parallel(rng, approver_ids, max(depth - 1, 1), width)
+  for node in par_nodes:
+    if node["node_type"] == "approval":
+      nodes.append(node)
+  for edge in par_edges:
+    if edge["source"] not in {"start", "join"}:
+      edges.append(edge)
+  nodes.append({
+    "id": "final",
+    "name": "会签",
+    "node_type": "approval",
+    "approval_type": "all",
+    "approver_groups": [
+      {"id": "fin", "approver_type": "user", "approver_user_ids": _pick(approver_ids, rng, 2)}
+    ]
+  })
+  edges.append({"source": "join", "target": "final"})
+  edges.append({"source": "final", "target": "end"})
+  return nodes, edges
+
+
+BUILDERS = {
+  "sequential": _build_sequential,
+  "condition": _build_condition,
+  "parallel": _build_parallel,
+  "groups": _build_groups,
+  "mixed": _build_mixed
+}
+
+
+def build_definition(shape, rng, approver_ids, depth, width):
+  nodes, edges = BUILDERS[shape](rng, approver_ids, depth, width)
+  for idx, edge in enumerate(edges, start=1):
+    edge.setdefault("id", f"e{idx}")
+    edge.setdefault("priority", idx)
+  return {"version": "graph_v1", "start_node_id": "start", "nodes": nodes, "edges": edges}
+
+
+def _setup_actors(approver_count):
+  run_tag = uuid.uuid4().hex[:8]
+  with app_module.app.app_context():
+    db = app_module.get_db()
+    with db.cursor() as cur:
+      cur.execute(
+        "INSERT INTO companies (name, code, status) VALUES (%s, %s, 'active')",
+        (f"bench-{run_tag}", f"bench-{run_tag}")
+      )
+      company_id = cur.lastrowid
+      cur.execute(
+        "INSERT INTO users (name, role, company_id, status) VALUES (%s, 'group_admin', NULL, 'active')",
+        (f"bench-admin-{run_tag}",)
+      )
+      admin_id = cur.lastrowid
+      cur.execute(
+        "INSERT INTO users (name, role, company_id, status) VALUES (%s, 'sales', %s, 'active')",
+        (f"bench-applicant-{run_tag}", company_id)
+      )
+      applicant_id = cur.lastrowid
+      cur.executemany(
+        "INSERT INTO users (name, role, company_id, status) VALUES (%s, 'sales', %s, 'active')",
+        [(f"bench-approver-{run_tag}-{idx}", company_id) for idx in range(approver_count)]
+      )
+      cur.execute(
+        "SELECT id FROM users WHERE name LIKE %s ORDER BY id ASC",
+        (f"bench-approver-{run_tag}-%",)
+      )
+      approver_ids = [row["id"] for row in cur.fetchall()]
+  return admin_id, applicant_id, approver_ids
+
+
+def _create_process(client, admin_id, definition, run_no):
+  response = client.post(
+    "/approval/process-templates",
+    headers={"x-user-id": str(admin_id)},
+    json={
+      "name": f"bench-process-{run_no}-{uuid.uuid4().hex[:6]}",
+      "status": "active",
+      "form_schema": [{"key": "amount", "label": "金额", "type": "number", "required": True}],
+      "definition": definition
+    }
+  )
+  body = response.get_json() or {}
+  if response.status_code != 201:
+    raise RuntimeError(f"process template rejected: {response.status_code} {body}")
+  return body["data"]["id"]
+
+
+class Recorder:
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.samples = {action: [] for action in ACTIONS}
+    self.queries = {action: 0 for action in ACTIONS}
+    self.errors = {}
+
+  def record(self, action, elapsed, queries, status_code):
+    with self.lock:
+      self.samples[action].append(elapsed)
+      self.queries[action] += queries
+      if status_code >= 400:
+        key = f"{action}:{status_code}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def _timed(recorder, action, call):
+  _reset_query_count()
+  started = time.perf_counter()
+  response = call()
+  elapsed = time.perf_counter() - started
+  recorder.record(action, elapsed, _query_count(), response.status_code)
+  return response
+
+
+def _pending_tasks(detail):
+  return [task for task in detail.get("tasks") or [] if task.get("status") == "pending"]
+
+
+def run_instance(client, recorder, process_id, applicant_id, approver_ids, rng, mix, fields):
+  amount = rng.choice([500, 5000, 50000])
+  response = _timed(
+    recorder,
+    "create",
+    lambda: client.post(
+      f"/approval/instances?fields={fields}",
+      headers={"x-user-id": str(applicant_id)},
+      json={"process_template_id": process_id, "title": "bench", "form_data": {"amount": amount}}
+    )
+  )
+  if response.status_code != 201:
+    return
+  instance_id = response.get_json()["data"]["id"]
+
+  for _ in range(MAX_ACTIONS_PER_INSTANCE):
+    # Task lookup between actions is untimed so fields=summary runs stay comparable.
+    detail = client.get(
+      f"/approval/instances/{instance_id}",
+      headers={"x-user-id": str(applicant_id)}
+    ).get_json()["data"]
+    if detail.get("status") != "pending":
+      return
+    pending = _pending_tasks(detail)
+    if not pending:
+      return
+    task = rng.choice(pending)
+    actor_id = task["approver_id"]
+    step_approvers = {item.get("approver_id") for item in detail.get("tasks") or [] if item.get("step_no") == task.get("step_no")}
+    free_ids = [user_id for user_id in approver_ids if user_id not in step_approvers]
+
+    roll = rng.random()
+    if roll < mix["reject"]:
+      action, extra = "reject", {}
+    elif roll < mix["reject"] + mix["transfer"] and free_ids:
+      action, extra = "transfer", {"target_user_id": rng.choice(free_ids)}
+    elif roll < mix["reject"] + mix["transfer"] + mix["add_sign"] and free_ids:
+      action, extra = "add_sign", {"target_user_ids": [rng.choice(free_ids)]}
+    else:
+      action, extra = "approve", {}
+
+    payload = dict(extra, action=action, comment="bench")
+    _timed(
+      recorder,
+      action,
+      lambda: client.post(
+        f"/approval/instances/{instance_id}/actions?fields={fields}",
+        headers={"x-user-id": str(actor_id)},
+        json=payload
+      )
+    )
+
+
+def _percentile(values, pct):
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  rank = max(int(round(pct / 100.0 * len(ordered))) - 1, 0)
+  return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(recorder, wall_seconds):
+  rows = []
+  total_actions = 0
+  total_queries = 0
+  for action in ACTIONS:
+    samples = recorder.samples[action]
+    if not samples:
+      continue
+    total_actions += len(samples)
+    total_queries += recorder.queries[action]
+    rows.append({
+      "action": action,
+      "count": len(samples),
+      "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+      "p50_ms": round(_percentile(samples, 50) * 1000, 2),
+      "p95_ms": round(_percentile(samples, 95) * 1000, 2),
+      "queries_per_action": round(recorder.queries[action] / len(samples), 2)
+    })
+  all_samples = [value for action in ACTIONS for value in recorder.samples[action]]
+  return {
+    "actions": rows,
+    "total_actions": total_actions,
+    "wall_seconds": round(wall_seconds, 3),
+    "actions_per_second": round(total_actions / wall_seconds, 2) if wall_seconds > 0 else 0,
+    "queries_per_action": round(total_queries / total_actions, 2) if total_actions else 0,
+    "p95_ms": round(_percentile(all_samples, 95) * 1000, 2),
+    "errors": recorder.errors
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Approval engine throughput benchmark")
+  parser.add_argument("--shape", choices=SHAPES, default="mixed")
+  parser.add_argument("--instances", type=int, default=200)
+  parser.add_argument("--workers", type=int, default=4, help="concurrent client threads")
+  parser.add_argument("--depth", type=int, default=3, help="approval nodes per branch")
+  parser.add_argument("--width", type=int, default=3, help="approvers per node / parallel branches")
+  parser.add_argument("--approvers", type=int, default=24)
+  parser.add_argument("--reject", type=float, default=0.05)
+  parser.add_argument("--transfer", type=float, default=0.05)
+  parser.add_argument("--add-sign", type=float, default=0.05)
+  parser.add_argument("--fields", choices=["full", "summary"], default="full")
+  parser.add_argument("--seed", type=int, default=42)
+  parser.add_argument("--json", dest="json_path", help="write the summary as JSON")
+  parser.add_argument("--fail-p95-ms", type=float, help="exit 1 when overall p95 exceeds this")
+  args = parser.parse_args()
+
+  rng = random.Random(args.seed)
+  admin_id, applicant_id, approver_ids = _setup_actors(args.approvers)
+  client = app_module.app.test_client()
+  definition = build_definition(args.shape, rng, approver_ids, args.depth, args.width)
+  process_id = _create_process(client, admin_id, definition, args.seed)
+  mix = {"reject": args.reject, "transfer": args.transfer, "add_sign": args.add_sign}
+
+  recorder = Recorder()
+  seeds = [rng.randrange(1 << 30) for _ in range(args.instances)]
+
+  def worker(instance_seed):
+    run_instance(
+      app_module.app.test_client(),
+      recorder,
+      process_id,
+      applicant_id,
+      approver_ids,
+      random.Random(instance_seed),
+      mix,
+      args.fields
+    )
+
+  started = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+    list(executor.map(worker, seeds))
+  summary = summarize(recorder, time.perf_counter() - started)
+  summary["config"] = {
+    "shape": args.shape,
+    "instances": args.instances,
+    "workers": args.workers,
+    "depth": args.depth,
+    "width": args.width,
+    "nodes": len(definition["nodes"]),
+    "fields": args.fields
+  }
+
+  print(f"shape={args.shape} nodes={len(definition['nodes'])} instances={args.instances} workers={args.workers}")
+  print(f"{'action':<10}{'count':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'q/action':>10}")
+  for row in summary["actions"]:
+    print(
+      f"{row['action']:<10}{row['count']:>8}{row['mean_ms']:>10}{row['p50_ms']:>10}"
+      f"{row['p95_ms']:>10}{row['queries_per_action']:>10}"
+    )
+  print(
+    f"total={summary['total_actions']} actions/s={summary['actions_per_second']} "
+    f"queries/action={summary['queries_per_action']} p95={summary['p95_ms']}ms"
+  )
+  if summary["errors"]:
+    print(f"errors={summary['errors']}")
+
+  if args.json_path:
+    with open(args.json_path, "w", encoding="utf-8") as file:
+      json.dump(summary, file, ensure_ascii=False, indent=2)
+
+  if args.fail_p95_ms is not None and summary["p95_ms"] > args.fail_p95_ms:
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,93 @@
+"""Workflow definition validation benchmark.
+
+Times normalization and validation of synthetic graphs with 50/500/5,000
+nodes. Pure Python, no database needed.
+
+  python backend/scripts/bench_workflow_validation.py --sizes 50 500 5000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def build_chain(size):
+  nodes = [{"id": "start", "node_type": "start"}]
+  nodes.extend({"id": f"n{idx}", "node_type": "approval", "approver_type": "manager"} for idx in range(size - 2))
+  nodes.append({"id": "end", "node_type": "end"})
+  edges = [
+    {"source": nodes[idx]["id"], "target": nodes[idx + 1]["id"]}
+    for idx in range(len(nodes) - 1)
+  ]
+  return {"nodes": nodes, "edges": edges}
+
+
+def build_branches(size):
+  # condition fan-out where every branch is a parallel block of two approvals
+  branch_count = max((size - 4) // 4, 2)
+  nodes = [
+    {"id": "start", "node_type": "start"},
+    {"id": "cond", "node_type": "condition"},
+    {"id": "end", "node_type": "end"}
+  ]
+  edges = [{"source": "start", "target": "cond"}]
+  for idx in range(branch_count):
+    fork_id, join_id = f"f{idx}", f"j{idx}"
+    nodes.append({"id": fork_id, "node_type": "parallel_start"})
+    nodes.append({"id": join_id, "node_type": "parallel_join"})
+    edge = {"source": "cond", "target": fork_id}
+    if idx == 0:
+      edge["is_default"] = True
+    else:
+      edge["condition"] = {"logic": "and", "rules": [{"field": "amount", "operator": "gte", "value": idx}]}
+    edges.append(edge)
+    for side in ("a", "b"):
+      node_id = f"a{idx}{side}"
+      nodes.append({"id": node_id, "node_type": "approval", "approver_type": "manager"})
+      edges.append({"source": fork_id, "target": node_id})
+      edges.append({"source": node_id, "target": join_id})
+    edges.append({"source": join_id, "target": "end"})
+  return {"nodes": nodes, "edges": edges}
+
+
+SHAPES = {"chain": build_chain, "branches": build_branches}
+
+
+def _best_ms(fn, repeat):
+  best = None
+  for _ in range(repeat):
+    started = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - started) * 1000
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Workflow definition validation benchmark")
+  parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+
+  print(f"{'shape':<10}{'nodes':>7}{'edges':>7}{'normalize ms':>14}{'validate ms':>13}{'us/node':>9}  valid")
+  for shape, builder in SHAPES.items():
+    for size in args.sizes:
+      raw_definition = builder(size)
+      definition = app_module._normalize_workflow_definition(raw_definition)
+      normalize_ms = _best_ms(lambda: app_module._normalize_workflow_definition(raw_definition), args.repeat)
+      validate_ms = _best_ms(lambda: app_module._validate_workflow_definition(definition), args.repeat)
+      result = app_module._validate_workflow_definition(definition)
+      per_node_us = (normalize_ms + validate_ms) * 1000 / len(definition["nodes"])
+      print(
+        f"{shape:<10}{len(definition['nodes']):>7}{len(definition['edges']):>7}"
+        f"{normalize_ms:>14.2f}{validate_ms:>13.2f}{per_node_us:>9.2f}  {result['valid']}"
+      )
+
+
+if __name__ == "__main__":
+  main()
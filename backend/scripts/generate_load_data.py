@@ -0,0 +1,429 @@
+"""Bulk demo/load-test data generator.
+
+Creates a tagged set of companies and users, then streams opportunities with
+their contacts and activities, host pool events and approval instances into
+the database from DB_* in .env (BENCH_DB_NAME overrides DB_NAME). Rows are
+written with multi-row INSERTs in batches of --batch opportunities; derived
+state (follow-up due dates, dashboard rollups) is refreshed the same way the
+app does it. Approval instances go through the real engine via the Flask test
+client so their tasks, events and snapshots are consistent.
+
+A manifest with the generated ids is written for scripts/load_test.py.
+
+  python backend/scripts/generate_load_data.py --opportunities 1000000 --activities 10000000
+  python backend/scripts/generate_load_data.py --companies 4 --opportunities 20000 --manifest small.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+if os.getenv("BENCH_DB_NAME"):
+  os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME")
+
+import app as app_module  # noqa: E402
+
+CITIES = ("上海", "北京", "广州", "深圳", "杭州", "成都", "武汉", "南京", "苏州", "西安", "重庆", "厦门")
+INDUSTRIES = ("制造业", "医药", "会展", "新能源", "零售", "工业设备", "汽车", "电子", "食品", "教育")
+SOURCES = ("推荐", "电话", "邮件", "市场活动", "合作伙伴", "展会线索", "官网")
+NAME_PREFIXES = ("星辰", "远航", "星河", "湾区", "华信", "博远", "恒通", "瑞丰", "云启", "海纳", "金桥", "东方")
+NAME_SUFFIXES = ("科技", "集团", "实业", "贸易", "医药", "智能", "装备", "电子", "文化", "新材料")
+PROJECT_WORDS = ("年度采购", "展会主场", "营销支持", "渠道拓展", "展位合作", "品牌推广", "新品发布")
+ORGANIZER_TYPES = ("foreign", "state_owned", "gov_joint", "government", "commercial")
+CHANNELS = ("phone", "email", "wechat", "onsite", "other")
+ACTIVITY_RESULTS = ("已确认需求范围", "发送案例资料", "完成场地踏勘", "收到预算区间", "客户暂无回复")
+ACTIVITY_NEXT_STEPS = ("准备报价清单", "等待客户反馈", "整理风险清单", "安排下一次会面", "一周后再跟进")
+CONTACT_TITLES = ("采购经理", "市场总监", "招商主管", "总经理", "项目经理")
+SURNAMES = ("王", "李", "张", "刘", "陈", "杨", "赵", "黄", "周", "吴")
+# (value, weight) pairs; roughly the funnel shape of the production data
+STATUS_WEIGHTS = (("new", 30), ("assigned", 20), ("in_progress", 30), ("valid", 12), ("invalid", 8))
+STAGE_WEIGHTS = (("cold", 35), ("interest", 25), ("need_defined", 20), ("bid_preparing", 12), ("ready_for_handoff", 8))
+
+OPPORTUNITY_COLUMNS = (
+  "id", "name", "name_key", "phone_key", "email_key", "type", "source", "industry", "city", "status", "stage",
+  "owner_id", "company_id", "organizer_name", "organizer_type", "exhibition_name", "exhibition_start_date",
+  "exhibition_end_date", "venue_name", "booth_count", "expected_visitors", "contact_name", "contact_title",
+  "contact_phone", "contact_email", "last_follow_up_at", "created_at", "updated_at"
+)
+CONTACT_COLUMNS = ("opportunity_id", "name", "title", "phone", "email", "wechat", "created_at")
+ACTIVITY_COLUMNS = ("opportunity_id", "user_id", "channel", "result", "next_step", "follow_up_at", "created_at")
+HOST_EVENT_COLUMNS = (
+  "source_site", "external_id", "name", "industry", "country", "city", "organizer_name", "venue_name",
+  "exhibition_start_date", "exhibition_end_date", "exhibition_area_sqm", "exhibitors_count", "visitors_count",
+  "heat_score", "source_url", "is_domestic", "pool_status"
+)
+
+
+def _weighted(rng, pairs):
+  values, weights = zip(*pairs)
+  return rng.choices(values, weights)[0]
+
+
+def _insert_rows(cur, table, columns, rows):
+  if not rows:
+    return
+  # pymysql folds executemany of a plain INSERT ... VALUES into multi-row statements
+  cur.executemany(
+    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+    rows
+  )
+
+
+class Throughput:
+  def __init__(self):
+    self.rows = {}
+    self.seconds = {}
+
+  def add(self, table, count, seconds):
+    self.rows[table] = self.rows.get(table, 0) + count
+    self.seconds[table] = self.seconds.get(table, 0.0) + seconds
+
+  def report(self):
+    for table, count in self.rows.items():
+      seconds = self.seconds[table]
+      rate = count / seconds if seconds > 0 else 0
+      print(f"{table:<34}{count:>12}{seconds:>10.1f}s{rate:>12.0f} rows/s")
+
+
+def setup_actors(db, tag, company_count, owners_per_company):
+  with db.cursor() as cur:
+    cur.execute("SELECT id FROM companies WHERE parent_id IS NULL ORDER BY id ASC LIMIT 1")
+    root = cur.fetchone()
+    if root:
+      group_id = root["id"]
+    else:
+      cur.execute(
+        "INSERT INTO companies (name, code, status) VALUES (%s, %s, 'active')",
+        (f"集团总部-{tag}", f"load-{tag}-hq")
+      )
+      group_id = cur.lastrowid
+    _insert_rows(
+      cur,
+      "companies",
+      ("name", "code", "parent_id", "status"),
+      [(f"压测子公司{idx + 1}-{tag}", f"load-{tag}-{idx + 1}", group_id, "active") for idx in range(company_count)]
+    )
+    cur.execute("SELECT id FROM companies WHERE code LIKE %s AND parent_id = %s ORDER BY id", (f"load-{tag}-%", group_id))
+    company_ids = [row["id"] for row in cur.fetchall()]
+
+    cur.execute(
+      "INSERT INTO users (name, role, company_id, status) VALUES (%s, 'group_admin', NULL, 'active')",
+      (f"load-admin-{tag}",)
+    )
+    admin_id = cur.lastrowid
+    user_rows = []
+    for company_id in company_ids:
+      user_rows.append((f"load-manager-{tag}-{company_id}", "subsidiary_admin", company_id, "active"))
+      for idx in range(owners_per_company):
+        role = "marketing" if idx % 4 == 3 else "sales"
+        user_rows.append((f"load-{role}-{tag}-{company_id}-{idx}", role, company_id, "active"))
+    _insert_rows(cur, "users", ("name", "role", "company_id", "status"), user_rows)
+    cur.execute("SELECT id, role, company_id FROM users WHERE name LIKE %s ORDER BY id", (f"load-%-{tag}-%",))
+    users = cur.fetchall()
+  return group_id, company_ids, admin_id, users
+
+
+def generate_opportunities(db, args, rng, tag, owners_by_company, stats):
+  """Stream opportunities with their contacts and activities; returns the id range."""
+  now = datetime.now().replace(microsecond=0)
+  activity_mean = args.activities / args.opportunities if args.opportunities else 0
+  company_ids = sorted(owners_by_company)
+  with db.cursor() as cur:
+    cur.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM opportunities")
+    # explicit ids keep children linkable without reading ids back; run against a quiet schema
+    first_id = cur.fetchone()["max_id"] + 1
+
+  opportunities, contacts, activities = [], [], []
+  batch_ids = []
+
+  def flush():
+    with app_module._db_transaction(db):
+      with db.cursor() as cur:
+        for table, columns, rows in (
+          ("opportunities", OPPORTUNITY_COLUMNS, opportunities),
+          ("opportunity_contacts", CONTACT_COLUMNS, contacts),
+          ("activities", ACTIVITY_COLUMNS, activities)
+        ):
+          started = time.perf_counter()
+          _insert_rows(cur, table, columns, rows)
+          stats.add(table, len(rows), time.perf_counter() - started)
+        if not args.skip_derived:
+          started = time.perf_counter()
+          app_module._refresh_follow_up_due(cur, batch_ids)
+          stats.add("follow_up_due (derived)", len(batch_ids), time.perf_counter() - started)
+    opportunities.clear()
+    contacts.clear()
+    activities.clear()
+    batch_ids.clear()
+
+  for offset in range(args.opportunities):
+    opportunity_id = first_id + offset
+    company_id = rng.choice(company_ids)
+    owner_id = rng.choice(owners_by_company[company_id])
+    is_host = rng.random() < 0.2
+    city = rng.choice(CITIES)
+    industry = rng.choice(INDUSTRIES)
+    name = f"{rng.choice(NAME_PREFIXES)}{rng.choice(NAME_SUFFIXES)}{rng.choice(PROJECT_WORDS)}{opportunity_id}"
+    contact_name = rng.choice(SURNAMES) + rng.choice(("伟", "芳", "娜", "敏", "静", "磊", "洋", "雪"))
+    contact_phone = f"13{rng.randrange(10 ** 9):09d}"
+    contact_email = f"contact{opportunity_id}@example.com"
+    created_at = now - timedelta(seconds=rng.randrange(args.days * 86400))
+    start_date = (created_at + timedelta(days=rng.randrange(30, 240))).date() if is_host else None
+
+    last_follow_up_at = None
+    activity_count = int(rng.expovariate(1 / activity_mean)) if activity_mean else 0
+    span = max(int((now - created_at).total_seconds()), 1)
+    for offset_seconds in sorted(rng.randrange(span) for _ in range(activity_count)):
+      activity_at = created_at + timedelta(seconds=offset_seconds)
+      activities.append((
+        opportunity_id,
+        owner_id,
+        rng.choice(CHANNELS),
+        rng.choice(ACTIVITY_RESULTS),
+        rng.choice(ACTIVITY_NEXT_STEPS),
+        activity_at + timedelta(days=rng.randrange(1, 15)),
+        activity_at
+      ))
+      last_follow_up_at = activity_at
+
+    for idx in range(rng.randint(0, 2 * args.contacts)):
+      contacts.append((
+        opportunity_id,
+        rng.choice(SURNAMES) + rng.choice(("晨", "倩", "梓", "秋", "宁", "珂")),
+        rng.choice(CONTACT_TITLES),
+        f"13{rng.randrange(10 ** 9):09d}",
+        f"c{opportunity_id}-{idx}@example.com",
+        None,
+        created_at
+      ))
+
+    row = {"name": name, "contact_phone": contact_phone, "contact_email": contact_email}
+    keys = app_module._opportunity_dedup_keys(row)
+    opportunities.append((
+      opportunity_id,
+      name,
+      keys["name_key"],
+      keys["phone_key"],
+      keys["email_key"],
+      "host" if is_host else "normal",
+      rng.choice(SOURCES),
+      industry,
+      city,
+      _weighted(rng, STATUS_WEIGHTS),
+      _weighted(rng, STAGE_WEIGHTS),
+      owner_id,
+      company_id,
+      f"{rng.choice(NAME_PREFIXES)}会展" if is_host else None,
+      rng.choice(ORGANIZER_TYPES) if is_host else None,
+      f"{city}{industry}博览会" if is_host else None,
+      start_date,
+      start_date + timedelta(days=rng.randrange(1, 5)) if is_host else None,
+      f"{city}国际会展中心" if is_host else None,
+      rng.randrange(50, 600) if is_host else None,
+      rng.randrange(2000, 50000) if is_host else None,
+      contact_name,
+      rng.choice(CONTACT_TITLES),
+      contact_phone,
+      contact_email,
+      last_follow_up_at,
+      created_at,
+      last_follow_up_at or created_at
+    ))
+    batch_ids.append(opportunity_id)
+    if len(opportunities) >= args.batch:
+      flush()
+      done = offset + 1
+      if done % (args.batch * 20) == 0:
+        print(f"  {done}/{args.opportunities} opportunities")
+  if opportunities:
+    flush()
+  return first_id, first_id + args.opportunities - 1
+
+
+def generate_host_events(db, args, rng, tag, stats):
+  today = datetime.now().date()
+  rows = []
+  for idx in range(args.host_events):
+    city = rng.choice(CITIES)
+    industry = rng.choice(INDUSTRIES)
+    start_date = today + timedelta(days=rng.randrange(-90, 365))
+    rows.append((
+      "load",
+      f"{tag}-{idx}",
+      f"{city}{industry}展览会{idx}",
+      industry,
+      "中国",
+      city,
+      f"{rng.choice(NAME_PREFIXES)}会展",
+      f"{city}国际会展中心",
+      start_date,
+      start_date + timedelta(days=rng.randrange(1, 5)),
+      rng.randrange(5000, 200000),
+      rng.randrange(50, 3000),
+      rng.randrange(2000, 200000),
+      rng.randrange(0, 100),
+      f"https://example.invalid/{tag}/{idx}",
+      1,
+      "active"
+    ))
+    if len(rows) >= args.batch:
+      _flush_host_events(db, rows, stats)
+  _flush_host_events(db, rows, stats)
+
+
+def _flush_host_events(db, rows, stats):
+  if not rows:
+    return
+  started = time.perf_counter()
+  with app_module._db_transaction(db):
+    with db.cursor() as cur:
+      _insert_rows(cur, "host_opportunity_pool_events", HOST_EVENT_COLUMNS, rows)
+  stats.add("host_opportunity_pool_events", len(rows), time.perf_counter() - started)
+  rows.clear()
+
+
+def generate_approvals(args, rng, tag, admin_id, applicants, approver_ids, stats):
+  """Create a one-step process and run instances through the real approval engine."""
+  if not args.approval_instances or not applicants or not approver_ids:
+    return None
+  client = app_module.app.test_client()
+  definition = {
+    "version": "graph_v1",
+    "start_node_id": "start",
+    "nodes": [
+      {"id": "start", "node_type": "start"},
+      {
+        "id": "review",
+        "name": "主管审批",
+        "node_type": "approval",
+        "approver_type": "user",
+        "approval_type": "any",
+        "approver_user_ids": approver_ids
+      },
+      {"id": "end", "node_type": "end"}
+    ],
+    "edges": [
+      {"id": "e1", "priority": 1, "source": "start", "target": "review"},
+      {"id": "e2", "priority": 2, "source": "review", "target": "end"}
+    ]
+  }
+  response = client.post(
+    "/approval/process-templates",
+    headers={"x-user-id": str(admin_id)},
+    json={
+      "name": f"load-process-{tag}",
+      "status": "active",
+      "form_schema": [{"key": "amount", "label": "金额", "type": "number", "required": True}],
+      "definition": definition
+    }
+  )
+  body = response.get_json() or {}
+  if response.status_code != 201:
+    raise RuntimeError(f"process template rejected: {response.status_code} {body}")
+  process_id = body["data"]["id"]
+
+  started = time.perf_counter()
+  created = 0
+  for _ in range(args.approval_instances):
+    applicant_id = rng.choice(applicants)
+    response = client.post(
+      "/approval/instances?fields=summary",
+      headers={"x-user-id": str(applicant_id)},
+      json={"process_template_id": process_id, "title": f"load-{tag}", "form_data": {"amount": rng.randrange(100, 100000)}}
+    )
+    if response.status_code != 201:
+      continue
+    created += 1
+    if rng.random() >= args.approval_pending_ratio:
+      instance_id = response.get_json()["data"]["id"]
+      # any approver on the node may act; pick one and finish the instance
+      client.post(
+        f"/approval/instances/{instance_id}/actions?fields=summary",
+        headers={"x-user-id": str(rng.choice(approver_ids))},
+        json={"action": rng.choice(("approve", "approve", "reject")), "comment": "load"}
+      )
+  stats.add("approval_instances (via engine)", created, time.perf_counter() - started)
+  return process_id
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Bulk-load demo data for load testing")
+  parser.add_argument("--companies", type=int, default=20)
+  parser.add_argument("--owners", type=int, default=10, help="sales/marketing users per company")
+  parser.add_argument("--opportunities", type=int, default=100000)
+  parser.add_argument("--activities", type=int, default=1000000, help="total, spread unevenly over opportunities")
+  parser.add_argument("--contacts", type=int, default=1, help="average extra contacts per opportunity")
+  parser.add_argument("--host-events", type=int, default=20000)
+  parser.add_argument("--approval-instances", type=int, default=2000)
+  parser.add_argument("--approval-pending-ratio", type=float, default=0.6)
+  parser.add_argument("--days", type=int, default=365, help="creation dates spread over this many days")
+  parser.add_argument("--batch", type=int, default=2000, help="opportunities per transaction")
+  parser.add_argument("--skip-derived", action="store_true", help="skip follow-up due dates and rollup rebuild")
+  parser.add_argument("--seed", type=int, default=42)
+  parser.add_argument("--manifest", default="load_manifest.json", help="ids for scripts/load_test.py")
+  args = parser.parse_args()
+  if args.companies <= 0 or args.owners <= 0 or args.batch <= 0:
+    parser.error("--companies, --owners and --batch must be positive")
+
+  rng = random.Random(args.seed)
+  tag = uuid.uuid4().hex[:8]
+  stats = Throughput()
+  started = time.perf_counter()
+
+  with app_module.app.app_context():
+    # bulk inserts and the rollup rebuild outlast the request read_timeout;
+    # closed by the app context teardown like a request connection
+    db = app_module.g.db = app_module._open_maintenance_connection()
+    group_id, company_ids, admin_id, users = setup_actors(db, tag, args.companies, args.owners)
+    owners_by_company = {}
+    for user in users:
+      if user["role"] in {"sales", "marketing"}:
+        owners_by_company.setdefault(user["company_id"], []).append(user["id"])
+    managers = [user["id"] for user in users if user["role"] == "subsidiary_admin"]
+    sales = [user["id"] for user in users if user["role"] == "sales"]
+    print(f"tag={tag} companies={len(company_ids)} users={len(users) + 1}")
+
+    with db.cursor() as cur:
+      # generated ids are consistent by construction; skip per-row checks while loading
+      cur.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+    first_id, last_id = generate_opportunities(db, args, rng, tag, owners_by_company, stats)
+    generate_host_events(db, args, rng, tag, stats)
+    with db.cursor() as cur:
+      cur.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+
+    process_id = generate_approvals(args, rng, tag, admin_id, sales, managers, stats)
+
+    if not args.skip_derived:
+      rollup_started = time.perf_counter()
+      aggregated = app_module._rebuild_dashboard_rollups(db)
+      stats.add("opportunity_daily_rollups (rebuild, opportunities)", aggregated, time.perf_counter() - rollup_started)
+
+  manifest = {
+    "tag": tag,
+    "group_company_id": group_id,
+    "company_ids": company_ids,
+    "admin_id": admin_id,
+    "manager_ids": managers,
+    "sales_ids": sales,
+    "opportunity_id_range": [first_id, last_id],
+    "process_template_id": process_id,
+    "cities": list(CITIES),
+    "industries": list(INDUSTRIES)
+  }
+  with open(args.manifest, "w", encoding="utf-8") as file:
+    json.dump(manifest, file, ensure_ascii=False, indent=2)
+
+  stats.report()
+  print(f"done in {time.perf_counter() - started:.1f}s, manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,370 @@
+"""Scenario load test: list, filter, detail, import, approve and message polling.
+
+Replays a weighted mix of the requests the frontend makes, from --concurrency
+threads, against a running server (--base-url) or in-process through the Flask
+test client when no URL is given. Actors and ids come from the manifest
+written by scripts/generate_load_data.py. Prints throughput and latency
+percentiles per operation; --json appends a labelled result so builds can be
+compared.
+
+  python backend/scripts/load_test.py --base-url http://127.0.0.1:5000 --duration 60 --concurrency 16
+  python backend/scripts/load_test.py --mix list=50,detail=50 --requests 2000 --label "$(git rev-parse --short HEAD)" --json load.jsonl
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BASE_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from openpyxl import Workbook  # noqa: E402
+
+DEFAULT_MIX = "list=30,filter=25,detail=20,messages=20,approve=4,import=1"
+STATUSES = ("new", "assigned", "in_progress", "valid", "invalid")
+STAGES = ("cold", "interest", "need_defined", "bid_preparing", "ready_for_handoff")
+DETAIL_INCLUDES = "contacts,activities,tags"
+
+
+class HttpClient:
+  def __init__(self, base_url, timeout):
+    self.base_url = base_url.rstrip("/")
+    self.timeout = timeout
+
+  def request(self, method, path, user_id, json_body=None, files=None):
+    headers = {"x-user-id": str(user_id), "Accept-Encoding": "identity"}
+    data = None
+    if json_body is not None:
+      data = json.dumps(json_body).encode("utf-8")
+      headers["Content-Type"] = "application/json"
+    elif files:
+      boundary = uuid.uuid4().hex
+      parts = []
+      for field, (filename, content) in files.items():
+        parts.append(
+          f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+          "Content-Type: application/octet-stream\r\n\r\n".encode("utf-8") + content + b"\r\n"
+        )
+      data = b"".join(parts) + f"--{boundary}--\r\n".encode("utf-8")
+      headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+    req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+    try:
+      with urllib.request.urlopen(req, timeout=self.timeout) as response:
+        return response.status, _parse_json(response.read())
+    except urllib.error.HTTPError as err:
+      return err.code, _parse_json(err.read())
+    except (urllib.error.URLError, OSError):
+      return 0, None
+
+
+class InProcessClient:
+  def __init__(self):
+    import app as app_module
+    self.client = app_module.app.test_client()
+
+  def request(self, method, path, user_id, json_body=None, files=None):
+    kwargs = {"headers": {"x-user-id": str(user_id)}}
+    if json_body is not None:
+      kwargs["json"] = json_body
+    elif files:
+      kwargs["data"] = {field: (io.BytesIO(content), filename) for field, (filename, content) in files.items()}
+      kwargs["content_type"] = "multipart/form-data"
+    response = self.client.open(path, method=method, **kwargs)
+    return response.status_code, response.get_json(silent=True)
+
+
+def _parse_json(raw):
+  try:
+    return json.loads(raw)
+  except ValueError:
+    return None
+
+
+class Recorder:
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.samples = {}
+    self.errors = {}
+
+  def record(self, operation, elapsed, status_code):
+    with self.lock:
+      self.samples.setdefault(operation, []).append(elapsed)
+      if status_code == 0 or status_code >= 400:
+        key = f"{operation}:{status_code}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def _timed(recorder, operation, call):
+  started = time.perf_counter()
+  status_code, body = call()
+  recorder.record(operation, time.perf_counter() - started, status_code)
+  return status_code, body
+
+
+def scenario_list(client, ctx, rng, recorder):
+  user_id = rng.choice(ctx["browsers"])
+  page = rng.randint(1, 5)
+  _timed(recorder, "list", lambda: client.request("GET", f"/opportunities?page={page}&page_size=20", user_id))
+
+
+def scenario_filter(client, ctx, rng, recorder):
+  user_id = rng.choice(ctx["browsers"])
+  params = [f"status={rng.choice(STATUSES)}", f"stage={rng.choice(STAGES)}"]
+  roll = rng.random()
+  if roll < 0.3:
+    params.append(f"city={urllib.parse.quote(rng.choice(ctx['cities']))}")
+  elif roll < 0.45:
+    # name filters fall back to the table scan summary, keep them a minority
+    params.append(f"name={urllib.parse.quote(rng.choice(ctx['industries'])[:2])}")
+  _timed(recorder, "filter", lambda: client.request("GET", f"/opportunities?page_size=20&{'&'.join(params)}", user_id))
+
+
+def scenario_detail(client, ctx, rng, recorder):
+  first_id, last_id = ctx["opportunity_id_range"]
+  if last_id < first_id:
+    return
+  ids = ",".join(str(rng.randint(first_id, last_id)) for _ in range(rng.randint(1, 5)))
+  _timed(
+    recorder,
+    "detail",
+    lambda: client.request("GET", f"/opportunities/details?ids={ids}&include={DETAIL_INCLUDES}", ctx["admin_id"])
+  )
+
+
+def scenario_messages(client, ctx, rng, recorder):
+  # the message center polls both lists on every tick
+  user_id = rng.choice(ctx["manager_ids"] + ctx["sales_ids"])
+  for scope in ("pending", "mine"):
+    _timed(recorder, "messages", lambda: client.request("GET", f"/approval/instances?scope={scope}", user_id))
+
+
+def scenario_approve(client, ctx, rng, recorder):
+  if not ctx.get("process_template_id"):
+    return
+  applicant_id = rng.choice(ctx["sales_ids"])
+  status_code, body = _timed(
+    recorder,
+    "approval_submit",
+    lambda: client.request(
+      "POST",
+      "/approval/instances",
+      applicant_id,
+      json_body={
+        "process_template_id": ctx["process_template_id"],
+        "title": "load-test",
+        "form_data": {"amount": rng.randrange(100, 100000)}
+      }
+    )
+  )
+  if status_code != 201 or not body:
+    return
+  data = body.get("data") or {}
+  pending = [task for task in data.get("tasks") or [] if task.get("status") == "pending"]
+  if not pending:
+    return
+  task = rng.choice(pending)
+  _timed(
+    recorder,
+    "approve",
+    lambda: client.request(
+      "POST",
+      f"/approval/instances/{data['id']}/actions?fields=summary",
+      task["approver_id"],
+      json_body={"action": "approve", "comment": "load-test"}
+    )
+  )
+
+
+def scenario_import(client, ctx, rng, recorder):
+  if not ctx.get("import_filename"):
+    return
+  _timed(
+    recorder,
+    "import",
+    lambda: client.request(
+      "POST",
+      "/imports/opportunities",
+      ctx["admin_id"],
+      json_body={"filename": ctx["import_filename"], "sheet": "总表", "company_id": rng.choice(ctx["company_ids"])}
+    )
+  )
+
+
+SCENARIOS = {
+  "list": scenario_list,
+  "filter": scenario_filter,
+  "detail": scenario_detail,
+  "messages": scenario_messages,
+  "approve": scenario_approve,
+  "import": scenario_import
+}
+
+
+def parse_mix(raw):
+  mix = {}
+  for item in raw.split(","):
+    name, _, weight = item.partition("=")
+    name = name.strip()
+    if name not in SCENARIOS:
+      raise ValueError(f"unknown scenario: {name}")
+    mix[name] = float(weight or 1)
+  if not any(weight > 0 for weight in mix.values()):
+    raise ValueError("mix needs a positive weight")
+  return mix
+
+
+def build_import_workbook(tag, rows):
+  workbook = Workbook()
+  sheet = workbook.active
+  sheet.title = "总表"
+  sheet.append(["公司名称", "联系人", "手机号码", "邮箱", "地区"])
+  for idx in range(rows):
+    sheet.append([f"压测导入{tag}-{idx}", f"联系人{idx}", f"139{idx:08d}", f"import{idx}@{tag}.example.com", "上海"])
+  buffer = io.BytesIO()
+  workbook.save(buffer)
+  return buffer.getvalue()
+
+
+def _percentile(values, pct):
+  if not values:
+    return 0.0
+  ordered = sorted(values)
+  rank = max(int(round(pct / 100.0 * len(ordered))) - 1, 0)
+  return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(recorder, wall_seconds):
+  rows = []
+  for operation, samples in sorted(recorder.samples.items()):
+    rows.append({
+      "operation": operation,
+      "count": len(samples),
+      "errors": sum(count for key, count in recorder.errors.items() if key.startswith(f"{operation}:")),
+      "rps": round(len(samples) / wall_seconds, 2) if wall_seconds > 0 else 0,
+      "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+      "p50_ms": round(_percentile(samples, 50) * 1000, 2),
+      "p90_ms": round(_percentile(samples, 90) * 1000, 2),
+      "p95_ms": round(_percentile(samples, 95) * 1000, 2),
+      "p99_ms": round(_percentile(samples, 99) * 1000, 2),
+      "max_ms": round(max(samples) * 1000, 2)
+    })
+  all_samples = [value for samples in recorder.samples.values() for value in samples]
+  return {
+    "operations": rows,
+    "total_requests": len(all_samples),
+    "wall_seconds": round(wall_seconds, 3),
+    "rps": round(len(all_samples) / wall_seconds, 2) if wall_seconds > 0 else 0,
+    "p50_ms": round(_percentile(all_samples, 50) * 1000, 2),
+    "p95_ms": round(_percentile(all_samples, 95) * 1000, 2),
+    "p99_ms": round(_percentile(all_samples, 99) * 1000, 2),
+    "errors": recorder.errors
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Scenario load test")
+  parser.add_argument("--manifest", default="load_manifest.json", help="written by generate_load_data.py")
+  parser.add_argument("--base-url", help="running server; omitted = in-process test client")
+  parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight list")
+  parser.add_argument("--concurrency", type=int, default=8)
+  parser.add_argument("--duration", type=float, default=30, help="seconds; ignored with --requests")
+  parser.add_argument("--requests", type=int, help="stop after this many scenario runs")
+  parser.add_argument("--import-rows", type=int, default=200)
+  parser.add_argument("--timeout", type=float, default=30)
+  parser.add_argument("--seed", type=int, default=42)
+  parser.add_argument("--label", default=os.getenv("BUILD_LABEL", ""), help="build id stored with --json results")
+  parser.add_argument("--json", dest="json_path", help="append the summary as one JSON line")
+  parser.add_argument("--fail-p95-ms", type=float, help="exit 1 when overall p95 exceeds this")
+  args = parser.parse_args()
+
+  try:
+    mix = parse_mix(args.mix)
+  except ValueError as err:
+    parser.error(str(err))
+  with open(args.manifest, encoding="utf-8") as file:
+    ctx = json.load(file)
+  ctx["browsers"] = [ctx["admin_id"]] + ctx["manager_ids"] + ctx["sales_ids"]
+
+  def make_client():
+    return HttpClient(args.base_url, args.timeout) if args.base_url else InProcessClient()
+
+  if mix.get("import"):
+    workbook = build_import_workbook(ctx["tag"], args.import_rows)
+    status_code, body = make_client().request(
+      "POST", "/imports/upload", ctx["admin_id"], files={"file": (f"load-{ctx['tag']}.xlsx", workbook)}
+    )
+    if status_code != 200 or not body:
+      parser.error(f"import upload failed: {status_code} {body}")
+    ctx["import_filename"] = body["data"]["filename"]
+
+  names, weights = zip(*mix.items())
+  recorder = Recorder()
+  counter_lock = threading.Lock()
+  remaining = [args.requests]
+  deadline = time.perf_counter() + args.duration
+
+  def take_turn():
+    if args.requests is None:
+      return time.perf_counter() < deadline
+    with counter_lock:
+      if remaining[0] <= 0:
+        return False
+      remaining[0] -= 1
+      return True
+
+  def worker(worker_seed):
+    rng = random.Random(worker_seed)
+    client = make_client()
+    while take_turn():
+      SCENARIOS[rng.choices(names, weights)[0]](client, ctx, rng, recorder)
+
+  started = time.perf_counter()
+  seed_rng = random.Random(args.seed)
+  with ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as executor:
+    list(executor.map(worker, [seed_rng.randrange(1 << 30) for _ in range(max(args.concurrency, 1))]))
+  summary = summarize(recorder, time.perf_counter() - started)
+  summary["label"] = args.label
+  summary["finished_at"] = datetime.now().isoformat(timespec="seconds")
+  summary["config"] = {
+    "target": args.base_url or "in-process",
+    "mix": mix,
+    "concurrency": args.concurrency,
+    "duration": None if args.requests else args.duration,
+    "requests": args.requests
+  }
+
+  print(f"target={summary['config']['target']} concurrency={args.concurrency} label={args.label or '-'}")
+  print(f"{'operation':<16}{'count':>8}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+  for row in summary["operations"]:
+    print(
+      f"{row['operation']:<16}{row['count']:>8}{row['errors']:>8}{row['rps']:>9}{row['p50_ms']:>9}"
+      f"{row['p90_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}"
+    )
+  print(
+    f"total={summary['total_requests']} rps={summary['rps']} "
+    f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms"
+  )
+  if summary["errors"]:
+    print(f"errors={summary['errors']}")
+
+  if args.json_path:
+    with open(args.json_path, "a", encoding="utf-8") as file:
+      file.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+  if args.fail_p95_ms is not None and summary["p95_ms"] > args.fail_p95_ms:
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,66 @@
+"""Merge request profiles written under PROFILE_DIR into one profile per endpoint.
+
+Sampled profiles (.collapsed) are summed into a single collapsed-stack file
+that flamegraph.pl or speedscope can render; cProfile dumps (.pstats) are
+combined with pstats and printed or saved.
+
+  python backend/scripts/merge_request_profiles.py --endpoint handle_approval_instance_action --out action.collapsed
+  python backend/scripts/merge_request_profiles.py --endpoint import_opportunities --kind pstats --top 30
+"""
+import argparse
+import glob
+import os
+import pstats
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def merge_collapsed(paths):
+  stacks = {}
+  for path in paths:
+    with open(path, encoding="utf-8") as handle:
+      for line in handle:
+        stack, _, count = line.rstrip("\n").rpartition(" ")
+        if stack and count.isdigit():
+          stacks[stack] = stacks.get(stack, 0) + int(count)
+  return stacks
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Merge per-request profiles by endpoint")
+  parser.add_argument("--dir", default=app_module.PROFILE_DIR, help="defaults to PROFILE_DIR")
+  parser.add_argument("--endpoint", required=True, help="Flask endpoint name, e.g. import_opportunities")
+  parser.add_argument("--kind", choices=["collapsed", "pstats"], default="collapsed")
+  parser.add_argument("--out", help="output file; collapsed stacks go to stdout without it")
+  parser.add_argument("--top", type=int, default=25, help="pstats rows printed when --out is not given")
+  args = parser.parse_args()
+  if not args.dir:
+    parser.error("--dir is required when PROFILE_DIR is not set")
+
+  paths = sorted(glob.glob(os.path.join(args.dir, f"{args.endpoint}-*.{args.kind}")))
+  if not paths:
+    print(f"No {args.kind} profiles for {args.endpoint} in {args.dir}", file=sys.stderr)
+    sys.exit(1)
+
+  if args.kind == "pstats":
+    stats = pstats.Stats(*paths)
+    if args.out:
+      stats.dump_stats(args.out)
+    else:
+      stats.sort_stats("cumulative").print_stats(args.top)
+  else:
+    lines = [f"{stack} {count}" for stack, count in sorted(merge_collapsed(paths).items())]
+    if args.out:
+      with open(args.out, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(lines) + "\n")
+    else:
+      print("\n".join(lines))
+  print(f"Merged {len(paths)} profiles", file=sys.stderr)
+
+
+if __name__ == "__main__":
+  main()
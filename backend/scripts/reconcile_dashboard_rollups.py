@@ -0,0 +1,44 @@
+"""Rebuild the dashboard rollups from opportunities, activities, contacts and insights.
+
+The API keeps opportunity_daily_rollups current on every write; this job
+seeds the table after it is first created and corrects any drift
+(concurrent writes, manual SQL). The rebuild runs in place, one company and
+date slice per transaction, so the API keeps serving and updating the
+rollups meanwhile. Run from cron nightly:
+
+  python backend/scripts/reconcile_dashboard_rollups.py
+  python backend/scripts/reconcile_dashboard_rollups.py --slice-days 7
+"""
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Rebuild opportunity_daily_rollups in place")
+  parser.add_argument("--slice-days", type=int, default=31, help="creation days per company rebuilt in one transaction")
+  args = parser.parse_args()
+  if args.slice_days <= 0:
+    parser.error("--slice-days must be positive")
+
+  started = time.perf_counter()
+  with app_module.app.app_context():
+    db = app_module._open_maintenance_connection()
+    try:
+      if not app_module.DASHBOARD_ROLLUP_TABLE_READY and not app_module.DASHBOARD_ROLLUP_SEED_PENDING:
+        print("opportunity_daily_rollups is missing and could not be created")
+        sys.exit(1)
+      aggregated = app_module._rebuild_dashboard_rollups(db, slice_days=args.slice_days)
+    finally:
+      db.close()
+  print(f"Rebuilt rollups for {aggregated} opportunities in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+  main()
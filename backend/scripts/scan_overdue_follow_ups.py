@@ -0,0 +1,30 @@
+"""Create per-owner reminders for opportunities that became overdue since the last scan.
+
+Run from cron (e.g. every 15 minutes):
+
+  python backend/scripts/scan_overdue_follow_ups.py
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+import app as app_module  # noqa: E402
+
+
+def main():
+  with app_module.app.app_context():
+    db = app_module.get_db()
+    if not app_module.FOLLOW_UP_TABLES_READY:
+      print("follow-up tables are missing and could not be created")
+      sys.exit(1)
+    result = app_module._scan_overdue_follow_ups(db)
+  print(
+    f"Scan {result['scan_id']}: {result['overdue']} newly overdue opportunities, "
+    f"{result['reminders']} reminders (window {result['window_start']} .. {result['window_end']})"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,41 @@
+"""Production WSGI entry point.
+
+  gunicorn -c backend/gunicorn.conf.py wsgi:application
+  python backend/wsgi.py        # waitress, for hosts without gunicorn (e.g. Windows)
+
+`python backend/app.py` stays the single-process development server.
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import app as app_module  # noqa: E402
+
+
+def create_app(warm=False):
+  """Return the configured Flask app; warm=True also runs the per-worker init.
+
+  Routes are registered on the module-level app, so every worker process gets
+  its own copy of the module state (schema flags, caches, metrics) when it
+  imports this module.
+  """
+  if warm:
+    app_module.init_worker()
+  return app_module.app
+
+
+application = create_app()
+
+
+if __name__ == "__main__":
+  from waitress import serve
+
+  create_app(warm=True)
+  serve(
+    application,
+    host=os.getenv("HOST", "0.0.0.0"),
+    port=int(os.getenv("PORT", "3000")),
+    threads=max(int(os.getenv("WEB_THREADS", "8")), 1)
+  )
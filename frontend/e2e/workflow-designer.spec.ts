@@ -9,6 +9,30 @@ type DesignerStats = {
   end: number;
 };
 
+const MOCK_PROCESS_TEMPLATE = {
+  id: 9101,
+  name: "请假流程模板",
+  description: "请假审批",
+  company_id: 1,
+  company_name: "Pico 集团",
+  status: "active",
+  form_template_id: 7001,
+  form_template_name: "请假单",
+  form_schema: [
+    {
+      key: "reason",
+      label: "申请说明",
+      type: "text",
+      required: true
+    }
+  ],
+  steps: [],
+  definition: null,
+  step_count: 3,
+  current_version: 1,
+  published_version: 1
+};
+
 const respondJson = async (route: Route, body: Record<string, unknown>, status = 200) => {
   await route.fulfill({
     status,
@@ -114,36 +138,18 @@ test.beforeEach(async ({ page }) => {
     }
 
     if (method === "GET" && path === "/approval/process-templates") {
+      // lean list projection; the detail route below carries steps, definition and form schema
       await respondJson(route, {
-        data: [
-          {
-            id: 9101,
-            name: "请假流程模板",
-            description: "请假审批",
-            company_id: 1,
-            company_name: "Pico 集团",
-            status: "active",
-            form_template_id: 7001,
-            form_template_name: "请假单",
-            form_schema: [
-              {
-                key: "reason",
-                label: "申请说明",
-                type: "text",
-                required: true
-              }
-            ],
-            steps: [],
-            definition: null,
-            step_count: 3,
-            current_version: 1,
-            published_version: 1
-          }
-        ]
+        data: [{ ...MOCK_PROCESS_TEMPLATE, form_schema: undefined, steps: undefined, definition: undefined }]
       });
       return;
     }
 
+    if (method === "GET" && path === `/approval/process-templates/${MOCK_PROCESS_TEMPLATE.id}`) {
+      await respondJson(route, { data: MOCK_PROCESS_TEMPLATE });
+      return;
+    }
+
     if (method === "GET" && path === "/approval/instances") {
       const scope = url.searchParams.get("scope") || "all";
       if (scope === "pending") {
@@ -513,6 +513,7 @@ function App() {
   const [activityOpen, setActivityOpen] = useState(false);
   const [activityLoading, setActivityLoading] = useState(false);
   const [activities, setActivities] = useState<Activity[]>([]);
+  const [activityCursor, setActivityCursor] = useState<string | null>(null);
   const [selectedOpportunity, setSelectedOpportunity] = useState<Opportunity | null>(null);
   const [commentHtml, setCommentHtml] = useState("");
   const commentRef = useRef<HTMLDivElement | null>(null);
@@ -808,17 +809,37 @@ function App() {
     }
   };
 
-  const fetchActivities = async (opportunityId: number) => {
+  const fetchOpportunityDetail = async (opportunityId: number) => {
+    try {
+      const response = await apiFetch(`/opportunities/${opportunityId}`, {
+        headers: headers()
+      });
+      const body = await response.json();
+      if (!response.ok) {
+        throw new Error(body.error || "加载失败");
+      }
+      return body.data as Opportunity;
+    } catch (err) {
+      const errorMessage = err instanceof Error ? err.message : "加载失败";
+      message.error(errorMessage);
+      return null;
+    }
+  };
+
+  const fetchActivities = async (opportunityId: number, cursor?: string) => {
     setActivityLoading(true);
     try {
-      const response = await apiFetch(`/opportunities/${opportunityId}/activities`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const response = await apiFetch(`/opportunities/${opportunityId}/activities${query}`, {
         headers: headers()
       });
       const body = await response.json();
       if (!response.ok) {
         throw new Error(body.error || "加载失败");
       }
-      setActivities(body.data || []);
+      const page = (body.data || []) as Activity[];
+      setActivities((prev) => (cursor ? [...prev, ...page] : page));
+      setActivityCursor(body.next_cursor || null);
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : "加载失败";
       message.error(errorMessage);
@@ -1734,7 +1755,32 @@ function App() {
       commentRef.current.innerHTML = "";
     }
     setActivityOpen(true);
-    fetchActivities(record.id);
+    // list rows omit risk_notes; load the full record and the first timeline page in one request
+    setActivityLoading(true);
+    apiFetch(`/opportunities/details?ids=${record.id}&include=activities`, {
+      headers: headers()
+    })
+      .then(async (response) => {
+        const body = await response.json();
+        if (!response.ok) {
+          throw new Error(body.error || "加载失败");
+        }
+        const detail = Array.isArray(body.data) ? body.data[0] : null;
+        if (!detail) {
+          throw new Error("商机不存在");
+        }
+        const opportunity = detail.opportunity as Opportunity;
+        setSelectedOpportunity((current) =>
+          current && current.id === opportunity.id ? { ...current, ...opportunity } : current
+        );
+        setActivities((detail.activities || []) as Activity[]);
+        setActivityCursor(detail.activities_next_cursor || null);
+      })
+      .catch((err) => {
+        const errorMessage = err instanceof Error ? err.message : "加载失败";
+        message.error(errorMessage);
+      })
+      .finally(() => setActivityLoading(false));
   };
 
   const handleAddActivity = async () => {
@@ -2460,6 +2506,11 @@ function App() {
       owner_id: record.owner_id ?? undefined
     });
     fetchOpportunityContacts(record.id);
+    fetchOpportunityDetail(record.id).then((detail) => {
+      if (detail) {
+        createForm.setFieldsValue({ risk_notes: detail.risk_notes || undefined });
+      }
+    });
     if (isGroupAdmin && !companies.length) {
       fetchCompanies();
     }
@@ -4974,6 +5025,7 @@ function App() {
           setActivityOpen(false);
           setSelectedOpportunity(null);
           setActivities([]);
+          setActivityCursor(null);
           setCommentHtml("");
           if (commentRef.current) {
             commentRef.current.innerHTML = "";
@@ -5121,6 +5173,17 @@ function App() {
                     />
                   </List.Item>
                 )}
+                loadMore={
+                  activityCursor ? (
+                    <Button
+                      type="link"
+                      block
+                      onClick={() => fetchActivities(selectedOpportunity.id, activityCursor)}
+                    >
+                      加载更早记录
+                    </Button>
+                  ) : null
+                }
               />
             </Card>
           </>
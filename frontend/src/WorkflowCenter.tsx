@@ -697,6 +697,7 @@ function WorkflowCenter(props: WorkflowCenterProps) {
   const [selectedProcess, setSelectedProcess] = useState<ProcessTemplate | null>(null);
   const [startDraftSavedAt, setStartDraftSavedAt] = useState<number | null>(null);
   const startDraftSignatureRef = useRef("");
+  const processTemplateDetailCacheRef = useRef(new Map<number, ProcessTemplate>());
 
   const [detailDrawerOpen, setDetailDrawerOpen] = useState(false);
   const [detailLoading, setDetailLoading] = useState(false);
@@ -864,13 +865,12 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     }
   }, [getStartDraftStorageKey, processTemplates]);
 
-  const restoreStartLocalDraft = useCallback(() => {
+  const restoreStartLocalDraft = useCallback((template: ProcessTemplate | null) => {
     const draft = readStartLocalDraft();
     if (!draft) {
       setStartDraftSavedAt(null);
       return false;
     }
-    const template = processTemplates.find((item) => item.id === draft.process_template_id) || null;
     const schema = template?.form_schema || [];
     const sourceFormData = (draft.form_data || {}) as Record<string, unknown>;
     const hydratedFormData: Record<string, unknown> = {};
@@ -928,7 +928,7 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     setStartDraftSavedAt(draft.saved_at);
     message.info(`已恢复发起审批草稿（${new Date(draft.saved_at).toLocaleString()}）`);
     return true;
-  }, [processTemplates, readStartLocalDraft, startForm]);
+  }, [readStartLocalDraft, startForm]);
 
   const toReadableError = useCallback((errorCode: string, details?: Record<string, unknown>) => {
     if (errorCode.startsWith("missing_required_field:")) {
@@ -1108,10 +1108,12 @@ function WorkflowCenter(props: WorkflowCenterProps) {
   const fetchProcessTemplates = useCallback(async () => {
     setProcessesLoading(true);
     try {
+      // lean list for the table and pickers; definition and form schema are loaded per template
       const data = await requestJson<ProcessTemplate[]>(
-        "/approval/process-templates?include_steps=1&include_form_schema=1",
+        "/approval/process-templates?include_steps=0&include_definition=0",
         { headers: authHeaders }
       );
+      processTemplateDetailCacheRef.current.clear();
       setProcessTemplates(data || []);
     } catch (err) {
       message.error(err instanceof Error ? err.message : "加载流程模板失败");
@@ -1120,6 +1122,23 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     }
   }, [authHeaders, requestJson]);
 
+  const loadProcessTemplateDetail = useCallback(async (templateId: number) => {
+    const cached = processTemplateDetailCacheRef.current.get(templateId);
+    if (cached) {
+      return cached;
+    }
+    try {
+      const detail = await requestJson<ProcessTemplate>(`/approval/process-templates/${templateId}`, {
+        headers: authHeaders
+      });
+      processTemplateDetailCacheRef.current.set(templateId, detail);
+      return detail;
+    } catch (err) {
+      message.error(err instanceof Error ? err.message : "加载流程模板失败");
+      return null;
+    }
+  }, [authHeaders, requestJson]);
+
   const fetchInstances = useCallback(async (
     scope: "all" | "mine" | "pending",
     status: "pending" | "approved" | "rejected" | "withdrawn" | "",
@@ -1375,10 +1394,14 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     setProcessDrawerOpen(true);
   };
 
-  const openEditProcessTemplate = async (row: ProcessTemplate) => {
+  const openEditProcessTemplate = async (listRow: ProcessTemplate) => {
     if (!companies.length || !users.length) {
       await refreshOrg();
     }
+    const row = await loadProcessTemplateDetail(listRow.id);
+    if (!row) {
+      return;
+    }
     processEditorForm.resetFields();
     const initialValues: ProcessTemplateEditorValues = {
       name: row.name,
@@ -1414,10 +1437,14 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     setProcessDrawerOpen(true);
   };
 
-  const openCopyProcessTemplate = async (row: ProcessTemplate) => {
+  const openCopyProcessTemplate = async (listRow: ProcessTemplate) => {
     if (!companies.length || !users.length) {
       await refreshOrg();
     }
+    const row = await loadProcessTemplateDetail(listRow.id);
+    if (!row) {
+      return;
+    }
     processEditorForm.resetFields();
     const copiedSchema = cloneJson((row.form_schema || []) as WorkflowField[]);
     const copiedDefinition = cloneJson(row.definition || createDefaultDefinition());
@@ -1711,8 +1738,13 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     try {
       setProcessesLoading(true);
       if (nextStatus === "active") {
+        // list rows are the lean projection; validate the full definition
+        const detail = await loadProcessTemplateDetail(process.id);
+        if (!detail) {
+          return;
+        }
         const validation = await validateProcessDefinition(
-          process.definition ? { definition: process.definition } : { steps: process.steps || [] }
+          detail.definition ? { definition: detail.definition } : { steps: detail.steps || [] }
         );
         if (!validation.valid) {
           const errorText = validation.errors.map(toValidationMessage).join("；");
@@ -1733,15 +1765,20 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     }
   };
 
-  const openStartInstanceDrawer = () => {
+  const openStartInstanceDrawer = async () => {
     setSelectedProcess(null);
     startForm.resetFields();
-    restoreStartLocalDraft();
     setStartDrawerOpen(true);
+    const draft = readStartLocalDraft();
+    restoreStartLocalDraft(draft ? await loadProcessTemplateDetail(draft.process_template_id) : null);
   };
 
-  const onSelectProcess = (processId: number) => {
-    const template = processTemplates.find((item) => item.id === processId) || null;
+  const onSelectProcess = async (processId: number) => {
+    const template = await loadProcessTemplateDetail(processId);
+    if (startForm.getFieldValue("process_template_id") !== processId) {
+      // another process was picked while this one was loading
+      return;
+    }
     setSelectedProcess(template);
     setStartDraftSavedAt(null);
     const defaults: Record<string, FormDataValue | undefined> = {};
@@ -1846,7 +1883,10 @@ function WorkflowCenter(props: WorkflowCenterProps) {
   const startInstance = async () => {
     try {
       const values = await startForm.validateFields();
-      const template = processTemplates.find((item) => item.id === values.process_template_id);
+      const template =
+        selectedProcess?.id === values.process_template_id
+          ? selectedProcess
+          : await loadProcessTemplateDetail(values.process_template_id);
       if (!template) {
         throw new Error("请选择流程模板");
       }
@@ -2388,7 +2428,7 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     if (!Number.isFinite(processTemplateId) || processTemplateId <= 0) {
       return;
     }
-    const template = processTemplates.find((item) => item.id === processTemplateId);
+    const template = selectedProcess?.id === processTemplateId ? selectedProcess : null;
     if (!template) {
       return;
     }
@@ -2424,7 +2464,7 @@ function WorkflowCenter(props: WorkflowCenterProps) {
     return () => {
       window.clearTimeout(timer);
     };
-  }, [getStartDraftStorageKey, processTemplates, startDrawerOpen, startFormValues]);
+  }, [getStartDraftStorageKey, selectedProcess, startDrawerOpen, startFormValues]);
 
   const closeEditorWithConfirm = (dirty: boolean, onConfirm: () => void) => {
     if (!dirty) {